@@ -1,23 +1,192 @@
-from typing import Tuple, Callable, List
+from typing import Tuple, Callable, List, Optional
 
 import numpy as np
-from scipy.interpolate import interp1d
+
+from analysis_tools.utilities.lazy_import import LazyModule
+
+interpolate = LazyModule("scipy.interpolate")
+optimize = LazyModule("scipy.optimize")
 
 __all__ = [
+    "LogLogInterpolator",
     "logarithmic_interpolation",
     "find_intersections_between_interpolations",
+    "INTERSECTION_DTYPE",
+    "find_intersections_between_curves",
 ]
 
+# Maximum number of cells of the segment lookup table of the LogLogInterpolator. The lookup is used instead of a
+# binary search for inputs of at least _MIN_SIZE_FOR_LOOKUP values, at least _MIN_SEGMENTS_FOR_LOOKUP segments
+# and at most _MAX_CORRECTION_STEPS correction steps after the lookup.
+_MAX_LOOKUP_CELLS = 1 << 16
+_MIN_SIZE_FOR_LOOKUP = 256
+_MIN_SEGMENTS_FOR_LOOKUP = 16
+_MAX_CORRECTION_STEPS = 4
+
+# Record of a crossing of curves[curve_id] and reference_curves[ref_id] at x, with direction +1 if the curve
+# crosses the reference curve from below and -1 if it crosses from above.
+INTERSECTION_DTYPE = np.dtype([("curve_id", np.int64), ("ref_id", np.int64), ("x", np.float64), ("direction", np.int8)])
+
+
+class LogLogInterpolator:
+    """
+    Piecewise power law interpolation, i.e. linear interpolation of log10(y) in log10(x).
+
+    Slopes and intercepts of the segments are precomputed in log space. The segment of every value is found with
+    a lookup table over equally sized cells in log10(x) followed by a few vectorized correction steps, which
+    avoids a binary search per value. Results can be written into a given output buffer and, unlike a closure
+    around scipy's interp1d, instances can be pickled and sent to worker processes.
+    """
+
+    def __init__(self, x: np.ndarray, y: np.ndarray) -> None:
+        x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+        if x.ndim != 1 or x.shape != y.shape or len(x) < 2:
+            raise ValueError(
+                f"x and y must be one dimensional arrays of the same length >= 2, got {x.shape} and {y.shape}!"
+            )
+        if np.any(x <= 0) or np.any(y <= 0):
+            raise ValueError("The log-log interpolation requires positive x and y values!")
+
+        order = np.argsort(x, kind="stable")
+        self._x_range = (float(x[order[0]]), float(x[order[-1]]))
+        self._log_x = np.log10(x[order])
+        self._log_y = np.log10(y[order])
+        if np.any(np.diff(self._log_x) == 0):
+            raise ValueError("The x values must be unique!")
+        self._slopes = np.diff(self._log_y) / np.diff(self._log_x)
+
+        # y = exp(intercept + slope * log10(x)) per segment, the factor ln(10) is absorbed into both coefficients.
+        self._exp_slopes = self._slopes * np.log(10.0)
+        self._exp_intercepts = (self._log_y[:-1] - self._slopes * self._log_x[:-1]) * np.log(10.0)
+        # Upper knot of every segment, infinite for the last one such that the correction steps stop there.
+        self._upper_log_x = np.append(self._log_x[1:-1], np.inf)
+
+        # The cells are made narrower than the shortest segment where possible, such that few corrections are needed.
+        log_x_range = self._log_x[-1] - self._log_x[0]
+        n_cells = int(
+            min(max(2.0 * log_x_range / np.min(np.diff(self._log_x)), 4 * len(self._slopes)), _MAX_LOOKUP_CELLS)
+        )
+        self._cell_width_inverse = n_cells / log_x_range
+        cell_edges = self._log_x[0] + np.arange(n_cells + 1) / self._cell_width_inverse
+        # Conservative by one segment to be safe against rounding in the cell computation.
+        self._lookup = np.maximum(np.searchsorted(self._log_x, cell_edges, side="right") - 2, 0)[:-1]
+        lookup_ahead = np.append(self._lookup[2:], [len(self._slopes) - 1] * 2)
+        self._correction_steps = int(np.max(lookup_ahead - self._lookup)) + 1
+        # A binary search is just as fast for few segments and faster for very unevenly spaced knots.
+        self._use_lookup = (
+            len(self._slopes) >= _MIN_SEGMENTS_FOR_LOOKUP and self._correction_steps <= _MAX_CORRECTION_STEPS
+        )
+
+        for array in (self._log_x, self._log_y, self._slopes, self._exp_slopes, self._exp_intercepts, self._lookup):
+            array.flags.writeable = False
+
+    def __call__(self, x: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        :param x: Values within the range of the knots.
+        :param out: Optional float64 array of the same shape as x, which receives the result.
+        :return: Interpolated values, out if given.
+        """
+        x = np.asarray(x, dtype=float)
+        # Checked before taking the logarithm, which may differ in the last bit between vectorized code paths.
+        if x.size > 0 and (x.min() < self._x_range[0] or x.max() > self._x_range[1]):
+            raise ValueError(f"A value in x is outside of the interpolation range {self._x_range}!")
+        log_x = np.log10(x, out=out)
+
+        if log_x.size < _MIN_SIZE_FOR_LOOKUP or not self._use_lookup:
+            log_y = np.interp(log_x, self._log_x, self._log_y)
+            if out is None and np.ndim(log_y) > 0:
+                out = log_y
+            return np.power(10.0, log_y, out=out)
+
+        buffer = np.subtract(log_x, self._log_x[0])
+        buffer *= self._cell_width_inverse
+        with np.errstate(invalid="ignore"):  # NaN values are mapped to some segment and stay NaN
+            segments = buffer.astype(np.intp)
+        np.clip(segments, 0, len(self._lookup) - 1, out=segments)
+        segments = self._lookup[segments]
+        for _ in range(self._correction_steps):
+            segments += log_x >= self._upper_log_x[segments]
+
+        np.take(self._exp_slopes, segments, out=buffer)
+        buffer *= log_x
+        buffer += self._exp_intercepts[segments]
+        return np.exp(buffer, out=log_x)
+
+    @property
+    def log_knots(self) -> Tuple[np.ndarray, np.ndarray]:
+        return self._log_x, self._log_y
+
+    @property
+    def slopes(self) -> np.ndarray:
+        """Power law exponents of the segments between consecutive knots."""
+        return self._slopes
+
+    @property
+    def x_range(self) -> Tuple[float, float]:
+        return self._x_range
+
 
 def logarithmic_interpolation(
     x: np.ndarray,
     y: np.ndarray,
-) -> Callable:
-    logx = np.log10(x)
-    logy = np.log10(y)
-    lin_interp = interp1d(logx, logy, kind="linear")
-    log_interp = lambda zz: np.power(10.0, lin_interp(np.log10(zz)))
-    return log_interp
+) -> LogLogInterpolator:
+    return LogLogInterpolator(x=x, y=y)
+
+
+def _get_linear_knots(interpolation: Callable) -> Optional[Tuple[np.ndarray, np.ndarray, bool]]:
+    # Returns the knots (u, v) between which the interpolation is linear and whether u = log10(x) and v = log10(y).
+    if isinstance(interpolation, LogLogInterpolator):
+        u, v = interpolation.log_knots
+        return np.asarray(u), np.asarray(v), True
+    if isinstance(interpolation, interpolate.interp1d) and np.ndim(interpolation.y) == 1:
+        x, y = np.asarray(interpolation.x), np.asarray(interpolation.y)
+        # interp1d does not expose its kind, so it is checked at two points within every segment. Up to cubic
+        # order, a segment which is linear at both ends and both points is linear everywhere.
+        fractions = np.array([[1.0 / 3.0], [2.0 / 3.0]])
+        linear = y[:-1] + fractions * np.diff(y)
+        if np.allclose(interpolation(x[:-1] + fractions * np.diff(x)), linear, rtol=1e-10, atol=0.0):
+            return x, y, False
+    return None
+
+
+def _get_scan_points(lower: np.ndarray, upper: np.ndarray, accuracy: int, use_log: bool) -> np.ndarray:
+    # Grids of `accuracy` points from lower[i] to upper[i], one row per bracket
+    lower, upper = lower[:, np.newaxis], upper[:, np.newaxis]
+    fractions = np.linspace(0.0, 1.0, accuracy)
+    if use_log:
+        scan_points = np.power(10.0, np.log10(lower) + fractions * (np.log10(upper) - np.log10(lower)))
+    else:
+        scan_points = lower + fractions * (upper - lower)
+    scan_points[:, -1] = upper[:, 0]
+    return scan_points
+
+
+def _get_sign_changes(diff: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    # Indices i with diff[i] == 0 and indices i with a sign change between diff[i] and diff[i + 1]
+    signs = np.sign(diff)
+    return np.flatnonzero(signs == 0), np.flatnonzero(signs[:-1] * signs[1:] < 0)
+
+
+def _find_exact_intersections(
+    lower: float,
+    upper: float,
+    knots_1: Tuple[np.ndarray, np.ndarray, bool],
+    knots_2: Tuple[np.ndarray, np.ndarray, bool],
+) -> np.ndarray:
+    (u_1, v_1, use_log), (u_2, v_2, _) = knots_1, knots_2
+    if use_log:
+        lower, upper = np.log10(lower), np.log10(upper)
+    if lower < max(u_1[0], u_2[0]) or upper > min(u_1[-1], u_2[-1]):
+        raise ValueError("The points exceed the range of the interpolations!")
+
+    # Both interpolations are linear between the union of their knots, and so is their difference.
+    u = np.unique(np.concatenate([u_1, u_2, [lower, upper]]))
+    u = u[(u >= lower) & (u <= upper)]
+    diff = np.interp(u, u_1, v_1) - np.interp(u, u_2, v_2)
+    zeros, changes = _get_sign_changes(diff=diff)
+    crossings = u[changes] - diff[changes] * (u[changes + 1] - u[changes]) / (diff[changes + 1] - diff[changes])
+    intersections = np.sort(np.concatenate([u[zeros], crossings]))
+    return np.power(10.0, intersections) if use_log else intersections
 
 
 def find_intersections_between_interpolations(
@@ -26,32 +195,128 @@ def find_intersections_between_interpolations(
     accuracy: int = 2000,
     use_log: bool = False,
     debug=False,
+    method: str = "scan",
+    tolerance: float = 1e-12,
+    scan_all_brackets: bool = False,
 ) -> List[float]:
-    intersections = []
-    for i in range(len(points) - 1):
-        inter_1, inter_2 = interpolations
-        lower, upper = points[i], points[i + 1]
-        diff = inter_1(np.array([lower, upper])) - inter_2(np.array([lower, upper]))
-        if np.sign(diff[0]) == np.sign(diff[1]):
-            continue
-
-        if use_log:
-            check_points = np.geomspace(lower, upper, accuracy)
-        else:
-            check_points = np.linspace(lower, upper, accuracy)
-        diff = inter_1(check_points) - inter_2(check_points)
+    """
+    Finds all x values between points[0] and points[-1] at which the two interpolations intersect.
 
-        if all(v > 0 for v in diff) or all(v < 0 for v in diff):
-            continue
+    The difference of the interpolations is evaluated at the points first. Brackets between two consecutive points
+    in which it changes sign are scanned with `accuracy` points, such that several intersections within one bracket
+    are found as well. Brackets without sign change are only scanned if scan_all_brackets is set.
+
+    :param points: Increasing x values.
+    :param interpolations: The two interpolations to be intersected.
+    :param accuracy: Number of scan points per bracket.
+    :param use_log: Whether the scan points are spaced logarithmically.
+    :param debug: Whether the found intersections are printed.
+    :param method: "scan" returns the first scan point after each sign change, which is only accurate to the
+                   spacing of the scan points, "brent" finds the intersection in every bracket with a sign change
+                   with Brent's method to the given tolerance and "exact" solves analytically if both
+                   interpolations are linear scipy interp1d objects or both are created with
+                   logarithmic_interpolation.
+    :param tolerance: Absolute tolerance on x for method "brent".
+    :param scan_all_brackets: Whether every bracket is scanned, which also finds pairs of intersections within a
+                              bracket without sign change at its ends. For method "brent", each sign change of the
+                              scan is refined, otherwise no scan is done and only one intersection per bracket
+                              with sign change is found. The method "exact" always finds all intersections.
+    :return: Sorted list of the x values of the intersections.
+    """
+    inter_1, inter_2 = interpolations
+    points = np.asarray(points, dtype=float)
+
+    if method == "exact":
+        knots_1, knots_2 = _get_linear_knots(inter_1), _get_linear_knots(inter_2)
+        if knots_1 is None or knots_2 is None or knots_1[2] != knots_2[2]:
+            raise ValueError(
+                "Method 'exact' requires two linear interp1d objects or two logarithmic interpolations, "
+                "use method 'brent' instead!"
+            )
+        intersections = _find_exact_intersections(
+            lower=points[0], upper=points[-1], knots_1=knots_1, knots_2=knots_2
+        ).tolist()
+    elif method in ("scan", "brent"):
+        # Intersections at the points themselves are found here, those within the brackets below.
+        zeros, changes = _get_sign_changes(diff=inter_1(points) - inter_2(points))
+        intersections = [float(x) for x in points[zeros]]
+
+        if method == "brent" and not scan_all_brackets:
+            brackets = zip(points[changes].tolist(), points[changes + 1].tolist())
         else:
+            scanned = np.arange(len(points) - 1) if scan_all_brackets else changes
+            scan_points = _get_scan_points(
+                lower=points[scanned], upper=points[scanned + 1], accuracy=accuracy, use_log=use_log
+            )
+            diff = (inter_1(scan_points.ravel()) - inter_2(scan_points.ravel())).reshape(scan_points.shape)
             signs = np.sign(diff)
-            sign_0 = signs[0]
-
-            index = np.argmax(signs != sign_0)
-            # Check that there are no further intersections in that range
-            assert all(s == signs[index] for s in signs[index + 1 : -1])
-            intersection_x = check_points[index]
-            if debug:
-                print(f"Intersection found at x = {intersection_x}!")
-            intersections.append(intersection_x)
+            bracket_ids, zero_ids = np.nonzero(signs[:, 1:-1] == 0)
+            intersections += scan_points[bracket_ids, zero_ids + 1].tolist()
+            bracket_ids, change_ids = np.nonzero(signs[:, :-1] * signs[:, 1:] < 0)
+            brackets = zip(
+                scan_points[bracket_ids, change_ids].tolist(), scan_points[bracket_ids, change_ids + 1].tolist()
+            )
+
+        if method == "scan":
+            intersections += [upper for _, upper in brackets]
+        else:
+            intersections += [
+                optimize.brentq(lambda x: inter_1(x) - inter_2(x), lower, upper, xtol=tolerance)
+                for lower, upper in brackets
+            ]
+        intersections = sorted(float(x) for x in intersections)
+    else:
+        raise ValueError(f"Unknown method {method}, use 'scan', 'brent' or 'exact'!")
+
+    if debug:
+        for intersection_x in intersections:
+            print(f"Intersection found at x = {intersection_x}!")
+    return intersections
+
+
+def find_intersections_between_curves(
+    x: np.ndarray,
+    curves: np.ndarray,
+    reference_curves: np.ndarray,
+    use_log: bool = False,
+) -> np.ndarray:
+    """
+    Finds all crossings of every tabulated curve with every reference curve in one vectorized pass,
+    e.g. of the median and the +-1 sigma and +-2 sigma bands of an expected limit with a set of theory curves.
+
+    Between the points of the shared grid the curves are interpolated linearly, or linearly in log-log space
+    if use_log is True, as with logarithmic_interpolation, such that the crossings are exact. Points at which
+    a curve equals a reference curve count as being above it, so a curve touching a reference curve from
+    below yields two crossings at the same x.
+
+    :param x: Increasing grid of shape (n_points,).
+    :param curves: Array of shape (n_curves, n_points).
+    :param reference_curves: Array of shape (n_references, n_points).
+    :param use_log: Whether to interpolate in log-log space, all values must be positive in this case.
+    :return: Structured array with INTERSECTION_DTYPE, sorted by curve_id, ref_id and x.
+    """
+    x = np.asarray(x, dtype=float)
+    curves = np.atleast_2d(np.asarray(curves, dtype=float))
+    reference_curves = np.atleast_2d(np.asarray(reference_curves, dtype=float))
+    if curves.shape[1] != len(x) or reference_curves.shape[1] != len(x):
+        raise ValueError(
+            f"The curves of shape {curves.shape} and {reference_curves.shape} do not match the grid of length {len(x)}!"
+        )
+
+    u = np.log10(x) if use_log else x
+    if use_log:
+        curves, reference_curves = np.log10(curves), np.log10(reference_curves)
+
+    diff = curves[:, np.newaxis, :] - reference_curves[np.newaxis, :, :]
+    above = diff >= 0
+    curve_ids, ref_ids, segments = np.nonzero(above[..., :-1] != above[..., 1:])
+
+    diff_low, diff_high = diff[curve_ids, ref_ids, segments], diff[curve_ids, ref_ids, segments + 1]
+    crossings = u[segments] - diff_low * (u[segments + 1] - u[segments]) / (diff_high - diff_low)
+
+    intersections = np.empty(len(crossings), dtype=INTERSECTION_DTYPE)
+    intersections["curve_id"] = curve_ids
+    intersections["ref_id"] = ref_ids
+    intersections["x"] = np.power(10.0, crossings) if use_log else crossings
+    intersections["direction"] = np.where(above[curve_ids, ref_ids, segments + 1], 1, -1)
     return intersections
@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+import os
+import tempfile
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from typing import TYPE_CHECKING, Any, Dict, List, Mapping, NamedTuple, Optional, Set, Tuple, Union
+
+import numpy as np
+
+from analysis_tools.plotting.plot_variables import HistVariable
+from analysis_tools.plotting.histogram_plots import HistogramPlot
+from analysis_tools.plotting.plotting_utils import export
+from analysis_tools.utilities.base_utils import PathType
+from analysis_tools.utilities.lazy_import import LazyModule
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+__all__ = [
+    "ComponentSpecification",
+    "PlotSpecification",
+    "RenderResult",
+    "render_histogram_plots",
+]
+
+matplotlib = LazyModule("matplotlib")
+plt = LazyModule("matplotlib.pyplot")
+
+
+class ComponentSpecification(NamedTuple):
+    label: str
+    component_type: str = "component"  # One of "component", "signal" or "data"
+    column: Optional[str] = None  # Defaults to the df_label of the HistVariable
+    weights: Optional[str] = None
+    selection: Optional[str] = None  # Name of a boolean column selecting the entries of this component
+    color: Optional[str] = None
+    line_style: str = "-"
+
+
+class PlotSpecification(NamedTuple):
+    hist_var: HistVariable
+    components: Tuple[ComponentSpecification, ...]
+    filename: str
+    hist_plot_kwargs: Optional[Dict[str, Any]] = None
+    plot_kwargs: Optional[Dict[str, Any]] = None
+
+
+class RenderResult(NamedTuple):
+    filename: str
+    duration: float
+    error: Optional[str] = None
+
+    @property
+    def succeeded(self) -> bool:
+        return self.error is None
+
+
+# Memory-mapped input columns of the current worker process, set up once by _init_worker.
+_shared_columns = {}  # type: Dict[str, np.ndarray]
+
+
+def _init_worker(column_files: Dict[str, str]) -> None:
+    matplotlib.use("Agg")
+    _shared_columns.clear()
+    for column, file_name in column_files.items():
+        _shared_columns[column] = np.load(file_name, mmap_mode="r")
+
+
+def _get_component_arrays(
+    specification: ComponentSpecification,
+    hist_var: HistVariable,
+) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    data = _shared_columns[specification.column or hist_var.df_label]
+    weights = _shared_columns[specification.weights] if specification.weights else None
+    if specification.selection:
+        mask = _shared_columns[specification.selection]
+        data = data[mask]
+        weights = weights[mask] if weights is not None else None
+    return data, weights
+
+
+def _render_plot(
+    specification: PlotSpecification,
+    target_dir: PathType,
+    file_formats: Tuple[str, ...],
+) -> RenderResult:
+    start = time.perf_counter()
+    try:
+        plot = HistogramPlot(hist_var=specification.hist_var, **(specification.hist_plot_kwargs or {}))
+        for component in specification.components:
+            data, weights = _get_component_arrays(specification=component, hist_var=specification.hist_var)
+            if component.component_type == "component":
+                plot.add_component(data=data, label=component.label, weights=weights, color=component.color)
+            elif component.component_type == "signal":
+                plot.add_signal_component(
+                    data=data,
+                    label=component.label,
+                    weights=weights,
+                    color=component.color,
+                    line_style=component.line_style,
+                )
+            elif component.component_type == "data":
+                plot.add_data(data=data, label=component.label, color=component.color)
+            else:
+                raise ValueError(f"Unknown component type {component.component_type}!")
+        fig, _ = plot.plot_on(**(specification.plot_kwargs or {}))
+        export(fig=fig, filename=specification.filename, target_dir=target_dir, file_formats=file_formats)
+    except Exception:
+        return RenderResult(
+            filename=specification.filename,
+            duration=time.perf_counter() - start,
+            error=traceback.format_exc(),
+        )
+    finally:
+        plt.close("all")
+    return RenderResult(filename=specification.filename, duration=time.perf_counter() - start)
+
+
+def _get_required_columns(specifications: List[PlotSpecification]) -> Set[str]:
+    columns = set()  # type: Set[str]
+    for specification in specifications:
+        for component in specification.components:
+            columns.add(component.column or specification.hist_var.df_label)
+            if component.weights:
+                columns.add(component.weights)
+            if component.selection:
+                columns.add(component.selection)
+    return columns
+
+
+def render_histogram_plots(
+    data: Union[pd.DataFrame, Mapping[str, np.ndarray]],
+    specifications: List[PlotSpecification],
+    target_dir: PathType = "plots/",
+    file_formats: Tuple[str, ...] = (".pdf", ".png"),
+    n_workers: Optional[int] = None,
+    shared_dir: Optional[PathType] = None,
+) -> List[RenderResult]:
+    """
+    Renders and exports many HistogramPlots in a process pool.
+
+    The input columns are written once to memory-mapped .npy files which every worker
+    maps read-only, so only the plot specifications are sent to the worker processes.
+    A failing plot does not stop the batch, its traceback is reported in the result instead.
+
+    :param data: DataFrame or mapping of column names to arrays holding all input columns.
+    :param specifications: One PlotSpecification per plot.
+    :param target_dir: Directory where the plots will be saved in.
+    :param file_formats: Tuple of file formats the plots will be saved as.
+    :param n_workers: Number of worker processes, defaults to the number of CPUs.
+    :param shared_dir: Directory for the memory-mapped column files, e.g. /dev/shm.
+                       Defaults to the system temporary directory.
+    :return: One RenderResult with duration and possible error per specification, in the same order.
+    """
+    with tempfile.TemporaryDirectory(dir=shared_dir) as tmp_dir:
+        column_files = {}  # type: Dict[str, str]
+        for i, column in enumerate(sorted(_get_required_columns(specifications=specifications))):
+            if column not in data:
+                continue
+            file_name = os.path.join(tmp_dir, f"column_{i}.npy")
+            values = data[column]
+            np.save(file_name, np.asarray(values))
+            column_files[column] = file_name
+
+        results = []  # type: List[RenderResult]
+        with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker, initargs=(column_files,)) as pool:
+            futures = [
+                pool.submit(_render_plot, specification, target_dir, file_formats) for specification in specifications
+            ]
+            for specification, future in zip(specifications, futures):
+                try:
+                    results.append(future.result())
+                except Exception:
+                    results.append(
+                        RenderResult(filename=specification.filename, duration=0.0, error=traceback.format_exc())
+                    )
+    return results
@@ -0,0 +1,219 @@
+from typing import Iterable, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from analysis_tools.plotting.plot_variables import BinningVariable
+
+__all__ = [
+    "CHUNK_SIZE",
+    "BinContents",
+    "get_bin_edges_array",
+    "is_uniform_binning",
+    "get_bin_indices",
+    "fill_1d",
+    "fill_1d_from_chunks",
+    "fill_2d",
+]
+
+# Number of entries processed at once, chosen such that the temporary index and weight arrays stay cache friendly.
+CHUNK_SIZE = 1 << 18
+
+# Relative deviation of the bin widths up to which a binning is treated as uniform. The arithmetic bin index is
+# corrected by at most one bin, which is sufficient as long as the edges deviate by much less than one bin width.
+_UNIFORM_WIDTH_TOLERANCE = 1e-9
+
+
+class BinContents(NamedTuple):
+    counts: np.ndarray
+    sum_of_weights: np.ndarray
+    sum_of_weights_squared: np.ndarray
+
+
+def get_bin_edges_array(binning_variable: BinningVariable) -> np.ndarray:
+    return binning_variable.get_bin_edges_array()
+
+
+def is_uniform_binning(edges: np.ndarray) -> bool:
+    """
+    Checks whether all bins have the same width up to rounding, as for edges created with np.linspace.
+    """
+    widths = np.diff(edges)
+    return bool(np.all(np.abs(widths - (edges[-1] - edges[0]) / len(widths)) <= _UNIFORM_WIDTH_TOLERANCE * widths))
+
+
+def _get_uniform_bin_indices(values: np.ndarray, edges: np.ndarray) -> np.ndarray:
+    # Bin index computed arithmetically as in np.histogram for equal bins, followed by a correction by one bin
+    # where rounding puts a value on the wrong side of one of the actual edges.
+    n_bins = len(edges) - 1
+    with np.errstate(invalid="ignore"):  # NaN values are cast to an arbitrary index and masked below
+        indices = ((values - edges[0]) * (n_bins / (edges[-1] - edges[0]))).astype(np.intp)
+    np.clip(indices, 0, n_bins - 1, out=indices)
+    indices -= values < edges[indices]  # Values below the first edge end up at -1
+    indices += (values >= edges[indices + 1]) & (indices < n_bins - 1)
+    indices[~(values <= edges[-1])] = -1
+    return indices
+
+
+def get_bin_indices(values: np.ndarray, edges: np.ndarray, uniform: Optional[bool] = None) -> np.ndarray:
+    """
+    Assigns every value to its bin with the same convention as np.histogram:
+    bins are half open, except for the last one which includes its upper edge.
+
+    :param values: Values to be binned.
+    :param edges: Monotonically increasing bin edges.
+    :param uniform: Whether the bins have equal widths, which allows to compute the indices arithmetically
+                    instead of with a binary search. Determined from the edges if None.
+    :return: Bin index for every value, -1 for values outside of the binning or NaN.
+    """
+    if uniform is None:
+        uniform = is_uniform_binning(edges=edges)
+    if uniform:
+        return _get_uniform_bin_indices(values=values, edges=edges)
+
+    n_bins = len(edges) - 1
+    indices = np.searchsorted(edges, values, side="right") - 1
+    indices[values == edges[-1]] = n_bins - 1
+    indices[(indices < 0) | (indices >= n_bins)] = -1
+    return indices
+
+
+def fill_1d(
+    data: np.ndarray,
+    edges: np.ndarray,
+    weights: Optional[np.ndarray] = None,
+    uniform: Optional[bool] = None,
+    out: Optional[BinContents] = None,
+) -> BinContents:
+    """
+    Computes counts, sum of weights and sum of squared weights per bin in a single pass over the data.
+    The data is processed in chunks, so no squared copy of the full weight array is allocated.
+
+    :param data: Values to be binned.
+    :param edges: Monotonically increasing bin edges, uniform or variable.
+    :param weights: Optional weight for every entry.
+    :param uniform: Whether the bins have equal widths, see get_bin_indices.
+    :param out: Bin contents to which the contents of the data are added in place. Its three arrays must
+                not share memory.
+    :return: Counts, sum of weights and sum of squared weights per bin, or out if given.
+    """
+    assert weights is None or len(weights) == len(data), (len(weights), len(data))
+    if uniform is None:
+        uniform = is_uniform_binning(edges=edges)
+
+    n_bins = len(edges) - 1
+    counts = np.zeros(n_bins, dtype=float)
+    sum_of_weights = np.zeros(n_bins, dtype=float)
+    sum_of_weights_squared = np.zeros(n_bins, dtype=float)
+
+    for start in range(0, len(data), CHUNK_SIZE):
+        stop = start + CHUNK_SIZE
+        indices = get_bin_indices(values=np.asarray(data[start:stop]), edges=edges, uniform=uniform)
+        in_range = indices >= 0
+        indices = indices[in_range]
+
+        counts += np.bincount(indices, minlength=n_bins)
+        if weights is not None:
+            chunk_weights = np.asarray(weights[start:stop], dtype=float)[in_range]
+            sum_of_weights += np.bincount(indices, weights=chunk_weights, minlength=n_bins)
+            np.multiply(chunk_weights, chunk_weights, out=chunk_weights)
+            sum_of_weights_squared += np.bincount(indices, weights=chunk_weights, minlength=n_bins)
+
+    if weights is None:
+        sum_of_weights = counts
+        sum_of_weights_squared = counts
+
+    if out is not None:
+        out.counts[...] += counts
+        out.sum_of_weights[...] += sum_of_weights
+        out.sum_of_weights_squared[...] += sum_of_weights_squared
+        return out
+
+    return BinContents(
+        counts=counts,
+        sum_of_weights=sum_of_weights,
+        sum_of_weights_squared=sum_of_weights_squared,
+    )
+
+
+def fill_1d_from_chunks(
+    chunks: Iterable[Tuple[np.ndarray, Optional[np.ndarray]]],
+    edges: np.ndarray,
+    uniform: Optional[bool] = None,
+) -> BinContents:
+    """
+    Accumulates the bin contents of a stream of (data, weights) chunks with a fixed binning.
+    Only the accumulators are kept, every chunk can be released as soon as it has been filled.
+
+    :param chunks: Iterable of data chunks and their optional weights.
+    :param edges: Monotonically increasing bin edges.
+    :param uniform: Whether the bins have equal widths, see get_bin_indices.
+    :return: Counts, sum of weights and sum of squared weights per bin summed over all chunks.
+    """
+    if uniform is None:
+        uniform = is_uniform_binning(edges=edges)
+    n_bins = len(edges) - 1
+    bin_contents = BinContents(
+        counts=np.zeros(n_bins, dtype=float),
+        sum_of_weights=np.zeros(n_bins, dtype=float),
+        sum_of_weights_squared=np.zeros(n_bins, dtype=float),
+    )
+
+    for data, weights in chunks:
+        fill_1d(data=data, edges=edges, weights=weights, uniform=uniform, out=bin_contents)
+
+    return bin_contents
+
+
+def fill_2d(
+    x: np.ndarray,
+    y: np.ndarray,
+    edges_x: np.ndarray,
+    edges_y: np.ndarray,
+    weights: Optional[np.ndarray] = None,
+) -> BinContents:
+    """
+    Fills a two dimensional histogram in a single pass over the data.
+
+    :param x: Values binned along the first axis.
+    :param y: Values binned along the second axis.
+    :param edges_x: Bin edges of the first axis.
+    :param edges_y: Bin edges of the second axis.
+    :param weights: Optional weight for every entry.
+    :return: Counts, sum of weights and sum of squared weights with shape (bins_x, bins_y).
+    """
+    assert len(x) == len(y), (len(x), len(y))
+    assert weights is None or len(weights) == len(x), (len(weights), len(x))
+
+    n_bins_x = len(edges_x) - 1
+    n_bins_y = len(edges_y) - 1
+    n_cells = n_bins_x * n_bins_y
+    uniform_x, uniform_y = is_uniform_binning(edges=edges_x), is_uniform_binning(edges=edges_y)
+
+    counts = np.zeros(n_cells, dtype=float)
+    sum_of_weights = np.zeros(n_cells, dtype=float)
+    sum_of_weights_squared = np.zeros(n_cells, dtype=float)
+
+    for start in range(0, len(x), CHUNK_SIZE):
+        stop = start + CHUNK_SIZE
+        indices_x = get_bin_indices(values=np.asarray(x[start:stop]), edges=edges_x, uniform=uniform_x)
+        indices_y = get_bin_indices(values=np.asarray(y[start:stop]), edges=edges_y, uniform=uniform_y)
+        in_range = (indices_x >= 0) & (indices_y >= 0)
+        cells = indices_x[in_range] * n_bins_y + indices_y[in_range]
+
+        counts += np.bincount(cells, minlength=n_cells)
+        if weights is not None:
+            chunk_weights = np.asarray(weights[start:stop], dtype=float)[in_range]
+            sum_of_weights += np.bincount(cells, weights=chunk_weights, minlength=n_cells)
+            np.multiply(chunk_weights, chunk_weights, out=chunk_weights)
+            sum_of_weights_squared += np.bincount(cells, weights=chunk_weights, minlength=n_cells)
+
+    if weights is None:
+        sum_of_weights = counts
+        sum_of_weights_squared = counts
+
+    shape = (n_bins_x, n_bins_y)
+    return BinContents(
+        counts=counts.reshape(shape),
+        sum_of_weights=sum_of_weights.reshape(shape),
+        sum_of_weights_squared=sum_of_weights_squared.reshape(shape),
+    )
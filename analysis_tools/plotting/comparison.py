@@ -0,0 +1,83 @@
+from enum import Enum
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+__all__ = [
+    "ComparisonMode",
+    "DataMCComparison",
+    "get_pulls",
+    "get_ratios",
+    "compare_data_to_mc",
+]
+
+
+class ComparisonMode(Enum):
+    pull = "Pull"
+    ratio = "Ratio"
+
+
+class DataMCComparison(NamedTuple):
+    mode: ComparisonMode
+    values: np.ndarray
+    errors: Optional[np.ndarray]
+    mc_uncertainty: Optional[np.ndarray]
+
+
+def _divide(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    # Element-wise division, NaN where the denominator is not positive
+    return np.divide(
+        numerator, denominator, out=np.full(np.shape(denominator), np.nan), where=np.asarray(denominator) > 0
+    )
+
+
+def get_pulls(data: np.ndarray, mc: np.ndarray, mc_sum_of_weights_squared: np.ndarray) -> np.ndarray:
+    """
+    Computes (data - MC) / sqrt(data + sum of squared MC weights) per bin, i.e. the difference divided by the
+    statistical uncertainties of data and MC added in quadrature. Bins without any entries are NaN.
+
+    :param data: Number of data entries per bin.
+    :param mc: Total sum of MC weights per bin.
+    :param mc_sum_of_weights_squared: Total sum of squared MC weights per bin.
+    :return: Pull per bin.
+    """
+    data = np.asarray(data, dtype=float)
+    return _divide(data - mc, np.sqrt(data + mc_sum_of_weights_squared))
+
+
+def get_ratios(data: np.ndarray, mc: np.ndarray, mc_sum_of_weights_squared: np.ndarray) -> DataMCComparison:
+    """
+    Computes the ratio data / MC per bin together with its uncertainty from the data statistics
+    and the relative statistical uncertainty of the MC. Bins without MC are NaN.
+
+    :param data: Number of data entries per bin.
+    :param mc: Total sum of MC weights per bin.
+    :param mc_sum_of_weights_squared: Total sum of squared MC weights per bin.
+    :return: Ratios, their data uncertainties and the relative MC uncertainties.
+    """
+    data = np.asarray(data, dtype=float)
+    return DataMCComparison(
+        mode=ComparisonMode.ratio,
+        values=_divide(data, mc),
+        errors=_divide(np.sqrt(data), mc),
+        mc_uncertainty=_divide(np.sqrt(mc_sum_of_weights_squared), mc),
+    )
+
+
+def compare_data_to_mc(
+    data: np.ndarray,
+    mc: np.ndarray,
+    mc_sum_of_weights_squared: np.ndarray,
+    mode: ComparisonMode = ComparisonMode.pull,
+) -> DataMCComparison:
+    """
+    Computes pulls or ratios of data and MC for all bins at once, see get_pulls and get_ratios.
+    """
+    if mode is ComparisonMode.ratio:
+        return get_ratios(data=data, mc=mc, mc_sum_of_weights_squared=mc_sum_of_weights_squared)
+    return DataMCComparison(
+        mode=ComparisonMode.pull,
+        values=get_pulls(data=data, mc=mc, mc_sum_of_weights_squared=mc_sum_of_weights_squared),
+        errors=None,
+        mc_uncertainty=None,
+    )
@@ -1,9 +1,9 @@
-from typing import Tuple, Optional, Union
-import matplotlib.pyplot as plt
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Tuple, Optional, Union
 import numpy as np
-from mpl_toolkits.axes_grid1 import make_axes_locatable
-import matplotlib.colors
 
+from analysis_tools.utilities.lazy_import import LazyModule
 from analysis_tools.plotting.plot_variables import BinningVariable
 from analysis_tools.plotting.plotting_utils import (
     AxesType,
@@ -12,10 +12,15 @@ from analysis_tools.plotting.plotting_utils import (
     set_matplotlibrc_params,
 )
 
+if TYPE_CHECKING:
+    import matplotlib.colors
+
 __all__ = [
     "Heatmap",
 ]
 
+plt = LazyModule("matplotlib.pyplot")
+
 
 class Heatmap:
     def __init__(
@@ -58,6 +63,8 @@ class Heatmap:
         )
 
         if plot_colorbar:
+            from mpl_toolkits.axes_grid1 import make_axes_locatable
+
             divider = make_axes_locatable(ax)
             cax = divider.append_axes("right", size="5%", pad=0.05)
             plt.colorbar(im, cax=cax)
@@ -77,9 +84,9 @@ class Heatmap:
             y_labels = y_variable.get_bin_mids()
         else:
             x_ticks = [x + 0.5 for x in range(-1, x_variable.bins)][::labels_to_show]
-            x_labels = tuple([x_variable.get_bin_edges()[0][0]] + list(x_variable.get_upper_limits()))
+            x_labels = x_variable.get_bin_edges_array()
             y_ticks = [y + 0.5 for y in range(-1, y_variable.bins)][::labels_to_show]
-            y_labels = tuple([y_variable.get_bin_edges()[0][0]] + list(y_variable.get_upper_limits()))
+            y_labels = y_variable.get_bin_edges_array()
         ax.set_xticks(x_ticks)
         x_axis_labels = [round(x, round_labels) if round_labels else int(round(x, round_labels)) for x in x_labels][
             ::labels_to_show
@@ -1,16 +1,30 @@
-from typing import List, Optional, Tuple
+from typing import Dict, List, NamedTuple, Optional, Tuple
 
 import numpy as np
 import copy
 
-from analysis_tools.plotting.plot_variables import HistVariable
+from analysis_tools.plotting.plot_variables import HistVariable, create_bin_edges, create_bin_mids
 from analysis_tools.plotting.histogram_component import HistogramComponent
+from analysis_tools.plotting.binning import BinContents, fill_1d, is_uniform_binning
+from analysis_tools.plotting.comparison import ComparisonMode, DataMCComparison, compare_data_to_mc
+from analysis_tools.statistics import poisson_errors
 
 __all__ = [
+    "DataPoints",
     "Histogram",
 ]
 
 
+class DataPoints(NamedTuple):
+    """
+    Bin counts of a data component, masked for empty bins, with the lower and upper Garwood errors
+    stacked as array of shape (2, n_bins), as expected by the yerr argument of Axes.errorbar.
+    """
+
+    values: np.ma.MaskedArray
+    errors: np.ma.MaskedArray
+
+
 class Histogram:
     def __init__(self, variable: HistVariable) -> None:
         self._variable = variable
@@ -20,63 +34,204 @@ class Histogram:
 
         self._data_components = None  # type: Optional[List[HistogramComponent]]
 
+        self._binning = None  # type: Optional[np.ndarray]
+        self._uniform_binning = None  # type: Optional[bool]
+        self._bin_mids = None  # type: Optional[np.ndarray]
+        self._bin_widths = None  # type: Optional[np.ndarray]
+        self._bin_contents_cache = {}  # type: Dict[HistogramComponent, BinContents]
+        self._data_points_cache = {}  # type: Dict[HistogramComponent, DataPoints]
+        self._signal_scaling_cache = {}  # type: Dict[HistogramComponent, float]
+        self._histogram_passes = 0
+        self._revision = 0
+
     def add_component(self, hist_component: HistogramComponent) -> None:
         if self.components is None:
             self._components = []
         assert self._components is not None
         self._components.append(hist_component)
+        self.clear_cache()
 
     def add_signal_component(self, hist_component: HistogramComponent) -> None:
         if self.signal_components is None:
             self._signal_components = []
         assert self._signal_components is not None
         self._signal_components.append(hist_component)
+        self.clear_cache()
 
     def add_data(self, hist_component: HistogramComponent) -> None:
         if self.data_components is None:
             self._data_components = []
         assert self._data_components is not None
         self._data_components.append(hist_component)
+        self.clear_cache()
+
+    def set_variable(self, variable: HistVariable) -> None:
+        self._variable = variable
+        self.clear_cache()
+
+    def clear_cache(self) -> None:
+        """
+        Drops the cached binning and bin contents. Has to be called whenever
+        the binning or the data of a component changes.
+        """
+        self._binning = None
+        self._uniform_binning = None
+        self._bin_mids = None
+        self._bin_widths = None
+        self._bin_contents_cache.clear()
+        self._data_points_cache.clear()
+        self._signal_scaling_cache.clear()
+        self._revision += 1
 
     def get_binning(self) -> np.ndarray:
-        if self.variable.scope:
-            start, stop = self.variable.scope
-        else:
-            all_data = [comp.data for comp in self.all_components]
-            start = np.min([np.min(x) for x in all_data])
-            stop = np.max([np.max(x) for x in all_data])
-        return np.linspace(start, stop, self.variable.bins + 1)
+        if self._binning is None:
+            binned_components = [comp for comp in self.all_components if comp.is_binned]
+            variable_binning = self.variable.get_bin_edges()
+            if variable_binning is not None:
+                binning = variable_binning
+            elif binned_components:
+                binning = np.array(binned_components[0].bin_edges, dtype=float)
+            else:
+                all_data = [comp.data for comp in self.all_components]
+                start = np.min([np.min(x) for x in all_data])
+                stop = np.max([np.max(x) for x in all_data])
+                binning = create_bin_edges(
+                    bins=self.variable.bins, scope=(start, stop), log_binning=self.variable.log_binning
+                )
+            binning.flags.writeable = False
+            self._binning = binning
+            self._uniform_binning = is_uniform_binning(edges=binning)
+        return self._binning
+
+    @property
+    def is_uniform_binning(self) -> bool:
+        """
+        Whether all bins have the same width, in which case the bin of every entry is computed arithmetically
+        instead of with a binary search over the bin edges.
+        """
+        self.get_binning()
+        assert self._uniform_binning is not None
+        return self._uniform_binning
+
+    def compact(self) -> None:
+        """
+        Bins all raw components with the current binning and releases their data arrays.
+        """
+        binning = self.get_binning()
+        for component in self.all_components:
+            component.compact(
+                bin_edges=binning,
+                bin_contents=self.get_bin_contents_for_component(hist_component=component),
+            )
+        uniform_binning = self.is_uniform_binning
+        bin_mids = self.get_bin_mids()
+        bin_widths = self.get_bin_widths()
+        self.clear_cache()
+        self._binning = binning
+        self._uniform_binning = uniform_binning
+        self._bin_mids = bin_mids
+        self._bin_widths = bin_widths
+
+    def fill(self, component_label: str, data: np.ndarray, weights: Optional[np.ndarray] = None) -> None:
+        """
+        Adds a batch of entries to the component with the given label, e.g. for online monitoring.
+        Only the sum of weights and sum of squared weights of the component are updated in place,
+        so the cost is proportional to the size of the batch. A raw component is compacted on its first fill.
+        Empty components to be filled can be created with HistogramComponent.from_bin_contents.
+
+        :param component_label: Label of the background, signal or data component to be filled.
+        :param data: Values to be added.
+        :param weights: Optional weight for every entry.
+        """
+        if self.variable.get_bin_edges() is None and not any(comp.is_binned for comp in self.all_components):
+            raise ValueError("Filling a histogram incrementally requires a HistVariable with a fixed scope!")
+        matching_components = [comp for comp in self.all_components if comp.label == component_label]
+        if len(matching_components) != 1:
+            raise ValueError(
+                f"Expected exactly one component with label {component_label}, found {len(matching_components)}!"
+            )
+        component = matching_components[0]
+
+        if not component.is_binned:
+            component.compact(
+                bin_edges=self.get_binning(),
+                bin_contents=self.get_bin_contents_for_component(hist_component=component),
+            )
+            del self._bin_contents_cache[component]
+        component.fill(data=data, weights=weights, uniform=self.is_uniform_binning)
+        self._data_points_cache.pop(component, None)
+        # Any filled component may change the stack maximum or a reference signal, so all scale factors are dropped
+        self._signal_scaling_cache.clear()
+        self._revision += 1
 
     def get_bin_width(self) -> float:
         binning = self.get_binning()
         assert len(binning) >= 2
+        if not self.is_uniform_binning:
+            raise ValueError("The bins of the histogram have different widths, use get_bin_widths instead!")
         return binning[1] - binning[0]
 
+    def get_bin_widths(self) -> np.ndarray:
+        if self._bin_widths is None:
+            binning = self.get_binning()
+            if binning is self.variable.get_bin_edges():
+                self._bin_widths = self.variable.get_bin_widths()
+            else:
+                bin_widths = np.diff(binning)
+                bin_widths.flags.writeable = False
+                self._bin_widths = bin_widths
+        return self._bin_widths
+
+    def get_bin_mids(self) -> np.ndarray:
+        """
+        Read-only bin mids, computed once per binning.
+        """
+        if self._bin_mids is None:
+            binning = self.get_binning()
+            if binning is self.variable.get_bin_edges():
+                self._bin_mids = self.variable.get_bin_mids()
+            else:
+                bin_mids = create_bin_mids(edges=binning, log_binning=self.variable.log_binning)
+                bin_mids.flags.writeable = False
+                self._bin_mids = bin_mids
+        return self._bin_mids
+
     def get_bins_for_hist(self) -> List[np.ndarray]:
-        binning = self.get_binning()
-        bin_mids = [(binning[i] + binning[i + 1]) / 2 for i in range(0, len(binning) - 1)]
         assert self.components is not None
-        return [np.array(bin_mids) for _ in self.components]
+        return [self.get_bin_mids()] * len(self.components)
 
     def get_signal_bins_for_hist(self) -> List[np.ndarray]:
-        binning = self.get_binning()
-        bin_mids = [(binning[i] + binning[i + 1]) / 2 for i in range(0, len(binning) - 1)]
         assert self.signal_components is not None
-        return [np.array(bin_mids) for _ in self.signal_components]
+        return [self.get_bin_mids()] * len(self.signal_components)
 
     def get_data_bins_for_hist(self) -> List[np.ndarray]:
-        binning = self.get_binning()
-        bin_mids = [(binning[i] + binning[i + 1]) / 2 for i in range(0, len(binning) - 1)]
         assert self.data_components is not None
-        return [np.array(bin_mids) for _ in self.data_components]
+        return [self.get_bin_mids()] * len(self.data_components)
+
+    def get_bin_contents_for_component(self, hist_component: HistogramComponent) -> BinContents:
+        if hist_component.is_binned:
+            assert hist_component.bin_contents is not None
+            if not np.array_equal(hist_component.bin_edges, self.get_binning()):
+                raise ValueError(
+                    f"The bin edges of the binned component {hist_component.label} do not match the histogram binning!"
+                )
+            return hist_component.bin_contents
+
+        if hist_component not in self._bin_contents_cache:
+            bin_contents = fill_1d(
+                data=hist_component.data,
+                edges=self.get_binning(),
+                weights=hist_component.weights,
+                uniform=self.is_uniform_binning,
+            )
+            self._histogram_passes += 1
+            for contents in bin_contents:
+                contents.flags.writeable = False
+            self._bin_contents_cache[hist_component] = bin_contents
+        return self._bin_contents_cache[hist_component]
 
     def get_bin_count_for_component(self, hist_component: HistogramComponent) -> np.ndarray:
-        bin_count, _ = np.histogram(
-            hist_component.data,
-            bins=self.get_binning(),
-            weights=hist_component.weights,
-        )
-        return bin_count
+        return self.get_bin_contents_for_component(hist_component=hist_component).sum_of_weights
 
     def get_bin_counts(self) -> List[np.ndarray]:
         bin_counts = []  # type: List[np.ndarray]
@@ -90,39 +245,84 @@ class Histogram:
         return np.sum(self.get_bin_counts(), axis=0)
 
     def get_bin_error_for_component(self, hist_component: HistogramComponent) -> np.ndarray:
-        bin_errors_squared, _ = np.histogram(
-            hist_component.data,
-            bins=self.get_binning(),
-            weights=hist_component.weights**2 if isinstance(hist_component.weights, np.ndarray) else None,
+        return np.sqrt(self.get_bin_contents_for_component(hist_component=hist_component).sum_of_weights_squared)
+
+    def get_total_sum_of_weights_squared(self) -> np.ndarray:
+        assert self.components is not None
+        return np.sum(
+            [
+                self.get_bin_contents_for_component(hist_component=component).sum_of_weights_squared
+                for component in self.components
+            ],
+            axis=0,
         )
-        return np.sqrt(bin_errors_squared)
 
     def get_bin_errors(self) -> np.ndarray:
-        assert self.components is not None
-        return np.sqrt(
-            np.sum(
-                [self.get_bin_error_for_component(hist_component=component) ** 2 for component in self.components],
-                axis=0,
+        return np.sqrt(self.get_total_sum_of_weights_squared())
+
+    def get_data_points_for_component(self, hist_component: HistogramComponent) -> DataPoints:
+        """
+        Bin counts and asymmetric Poisson errors of a data component with empty bins masked, see DataPoints.
+        The result is cached until the component is filled or the cache is cleared.
+        """
+        if hist_component not in self._data_points_cache:
+            bin_count = self.get_bin_count_for_component(hist_component=hist_component)
+            empty = bin_count <= 0
+            lower_errors, upper_errors = poisson_errors(n=bin_count)
+            self._data_points_cache[hist_component] = DataPoints(
+                values=np.ma.MaskedArray(bin_count, mask=empty),
+                errors=np.ma.MaskedArray(np.stack([lower_errors, upper_errors]), mask=np.stack([empty, empty])),
             )
+        return self._data_points_cache[hist_component]
+
+    def get_data_mc_comparison(self, mode: ComparisonMode = ComparisonMode.pull) -> DataMCComparison:
+        """
+        Pulls or ratios of the first data component and the total MC for all bins, including the statistical
+        uncertainty of the MC.
+        """
+        assert self.data_components is not None
+        return compare_data_to_mc(
+            data=self.get_bin_count_for_component(hist_component=self.data_components[0]),
+            mc=self.get_total_bin_count(),
+            mc_sum_of_weights_squared=self.get_total_sum_of_weights_squared(),
+            mode=mode,
         )
 
-    def get_signal_bin_count_for_component(self, hist_component: HistogramComponent) -> Tuple[np.ndarray, float]:
-        bin_count = self.get_bin_count_for_component(hist_component=hist_component).astype(float)
-        if not hist_component.related_component:
-            if self.components is not None:
-                max_bin_count = np.max(bin_count)
-                if max_bin_count == 0:
-                    return bin_count, 1.0
-                max_bin_counts = np.max(np.sum(self.get_bin_counts(), axis=0))
-                scaling = max_bin_counts / max_bin_count
-            else:
-                scaling = 1
-            bin_count *= scaling
-        else:
-            _, scaling = self.get_signal_bin_count_for_component(hist_component=hist_component.related_component)
-            bin_count *= scaling
+    def get_signal_scaling(self, hist_component: HistogramComponent) -> float:
+        """
+        Factor by which a signal component is scaled in the plot. A component without related component is scaled
+        such that its maximum matches the maximum of the stacked components, otherwise it inherits the factor of the
+        related component. The chain of related components is resolved once, starting from the reference, and the
+        factors of all components in it are cached until the histogram changes.
+        """
+        chain = []  # type: List[HistogramComponent]
+        component = hist_component  # type: Optional[HistogramComponent]
+        while component is not None and component not in self._signal_scaling_cache:
+            if component in chain:
+                raise ValueError(f"The related components of the signal component {hist_component.label} form a cycle!")
+            chain.append(component)
+            component = component.related_component
+
+        if component is None:
+            reference = chain.pop()
+            self._signal_scaling_cache[reference] = self._get_reference_scaling(reference=reference)
+            component = reference
+        scaling = self._signal_scaling_cache[component]
+        for component in chain:
+            self._signal_scaling_cache[component] = scaling
+        return scaling
+
+    def _get_reference_scaling(self, reference: HistogramComponent) -> float:
+        if self.components is None:
+            return 1.0
+        max_bin_count = np.max(self.get_bin_count_for_component(hist_component=reference))
+        if max_bin_count == 0:
+            return 1.0
+        return float(np.max(self.get_total_bin_count()) / max_bin_count)
 
-        return bin_count, scaling
+    def get_signal_bin_count_for_component(self, hist_component: HistogramComponent) -> Tuple[np.ndarray, float]:
+        scaling = self.get_signal_scaling(hist_component=hist_component)
+        return scaling * self.get_bin_count_for_component(hist_component=hist_component), scaling
 
     def get_signal_bin_counts(self) -> List[np.ndarray]:
         signal_bin_counts = []  # type: List[np.ndarray]
@@ -133,7 +333,7 @@ class Histogram:
         return signal_bin_counts
 
     def get_signal_bin_error_for_component(self, hist_component: HistogramComponent) -> np.ndarray:
-        _, scaling = self.get_signal_bin_count_for_component(hist_component=hist_component)
+        scaling = self.get_signal_scaling(hist_component=hist_component)
         return scaling * self.get_bin_error_for_component(hist_component=hist_component)
 
     def get_colors(self) -> Optional[List[Optional[str]]]:
@@ -166,6 +366,21 @@ class Histogram:
     def variable(self) -> HistVariable:
         return self._variable
 
+    @property
+    def histogram_passes(self) -> int:
+        """
+        Number of histogramming passes over component data done so far.
+        """
+        return self._histogram_passes
+
+    @property
+    def revision(self) -> int:
+        """
+        Counter which is increased whenever the bin contents can have changed, i.e. on every fill
+        and whenever a component or the variable is changed.
+        """
+        return self._revision
+
     @property
     def components(self) -> Optional[List[HistogramComponent]]:
         return self._components
@@ -179,8 +394,8 @@ class Histogram:
         return self._data_components
 
     @property
-    def all_components(self):
-        all_components = copy.copy(self.components)
+    def all_components(self) -> List[HistogramComponent]:
+        all_components = copy.copy(self.components) if self.components is not None else []
         if self.signal_components is not None:
             all_components.extend(self.signal_components)
         if self.data_components is not None:
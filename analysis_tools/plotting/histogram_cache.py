@@ -0,0 +1,165 @@
+import hashlib
+import os
+from pathlib import Path
+from typing import Any, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from analysis_tools.plotting.binning import BinContents
+from analysis_tools.plotting.plot_variables import HistVariable
+from analysis_tools.utilities.array_utils import as_read_only_array, has_columns
+from analysis_tools.utilities.base_utils import PathType
+from analysis_tools.utilities.cache_utils import get_default_cache_dir, load_npz, save_npz_atomically
+
+__all__ = [
+    "HistogramCache",
+    "get_fingerprint",
+]
+
+# Part of every cache key, to be increased whenever the binning or the file format changes.
+_HISTOGRAM_CACHE_VERSION = 1
+
+
+class _CacheEntry(NamedTuple):
+    path: str
+    size: int
+    last_used: int
+
+
+def get_fingerprint(values: Any, column: Optional[str] = None) -> str:
+    """
+    Fingerprint of histogram input data. Files are identified by their resolved path, size and modification time,
+    such that they do not have to be read. DataFrames, Series, arrays and pyarrow objects are hashed together with
+    their dtype and shape.
+
+    :param values: Path, DataFrame, Series, array or pyarrow object, as accepted by as_read_only_array.
+    :param column: Column to be selected if the input is a DataFrame or a pyarrow Table.
+    """
+    if isinstance(values, (str, Path, os.PathLike)):
+        path = Path(values).resolve()
+        stat = path.stat()
+        return f"file:{path}:{stat.st_size}:{stat.st_mtime_ns}:{column}"
+    array = np.ascontiguousarray(as_read_only_array(values=values, column=column))
+    key = hashlib.sha1(f"array:{array.dtype.str}:{array.shape}".encode())
+    key.update(array.view(np.uint8).reshape(-1))
+    return key.hexdigest()
+
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:  # Already removed by a parallel job
+        pass
+
+
+class HistogramCache:
+    """
+    Persistent cache of filled bin contents, such that re-running a plot with different styling skips reading and
+    histogramming its inputs. Entries are keyed by the fingerprints of the data and weights and the binning of the
+    HistVariable. Whenever the cache grows beyond max_size bytes, the least recently used entries are removed.
+    """
+
+    def __init__(self, cache_dir: Optional[PathType] = None, max_size: int = 1 << 30) -> None:
+        """
+        :param cache_dir: Directory of the cache, defaults to $XDG_CACHE_HOME/analysis_tools/histograms.
+        :param max_size: Maximal total size of all cache files in bytes.
+        """
+        self._cache_dir = Path(get_default_cache_dir(name="histograms") if cache_dir is None else cache_dir)
+        self._max_size = max_size
+
+    def get_key(
+        self,
+        hist_var: HistVariable,
+        data: Any,
+        weights: Optional[Any] = None,
+    ) -> str:
+        """
+        :param hist_var: HistVariable with fixed bin edges.
+        :param data: Path, DataFrame, Series, array or pyarrow object with the values to be histogrammed.
+        :param weights: Weights or name of the weight column.
+        """
+        bin_edges = hist_var.get_bin_edges()
+        if bin_edges is None:
+            raise ValueError(f"Cached histograms require fixed bin edges, but {hist_var.df_label} has no scope!")
+        column = hist_var.df_label if has_columns(data) else None
+        if isinstance(weights, str) and not weights.endswith(".npy"):
+            weights_fingerprint = get_fingerprint(values=data, column=weights)
+        else:
+            weights_fingerprint = "None" if weights is None else get_fingerprint(values=weights)
+
+        key = hashlib.sha1(np.ascontiguousarray(bin_edges, dtype=float).tobytes())
+        for part in (
+            str(_HISTOGRAM_CACHE_VERSION),
+            get_fingerprint(values=data, column=column),
+            weights_fingerprint,
+        ):
+            key.update(part.encode())
+        return key.hexdigest()
+
+    def _get_cache_file(self, key: str) -> Path:
+        return self._cache_dir / f"histogram_{key}.npz"
+
+    def load(self, key: str) -> Optional[Tuple[np.ndarray, BinContents]]:
+        """
+        :return: Bin edges and bin contents stored for the key, None if there is no such entry. Entries which
+                 cannot be read, e.g. files truncated by a crashed job, are removed and treated as missing.
+        """
+        cache_file = self._get_cache_file(key=key)
+        try:
+            # The modification time marks the last use of an entry for the eviction. Entries of a shared cache
+            # might not be writable, they are still used but only evicted by their age.
+            os.utime(cache_file)
+        except OSError:
+            pass
+        arrays = load_npz(path=cache_file, keys=("bin_edges", "counts", "sum_of_weights", "sum_of_weights_squared"))
+        if arrays is None:
+            return None
+        bin_contents = BinContents(
+            counts=arrays["counts"],
+            sum_of_weights=arrays["sum_of_weights"],
+            sum_of_weights_squared=arrays["sum_of_weights_squared"],
+        )
+        return arrays["bin_edges"], bin_contents
+
+    def store(self, key: str, bin_edges: np.ndarray, bin_contents: BinContents) -> None:
+        save_npz_atomically(path=self._get_cache_file(key=key), bin_edges=bin_edges, **bin_contents._asdict())
+        self._evict()
+
+    def _get_entries(self) -> List[_CacheEntry]:
+        entries = []  # type: List[_CacheEntry]
+        if not self._cache_dir.is_dir():
+            return entries
+        for entry in os.scandir(self._cache_dir):
+            if entry.name.startswith("histogram_") and entry.name.endswith(".npz"):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:  # Removed by a parallel job in the meantime
+                    continue
+                entries.append(_CacheEntry(path=entry.path, size=stat.st_size, last_used=stat.st_mtime_ns))
+        return entries
+
+    def _evict(self) -> None:
+        total_size = 0
+        for entry in sorted(self._get_entries(), key=lambda e: e.last_used, reverse=True):
+            total_size += entry.size
+            if total_size > self._max_size:
+                _remove(path=entry.path)
+
+    def clear(self) -> None:
+        for entry in self._get_entries():
+            _remove(path=entry.path)
+
+    @property
+    def size(self) -> int:
+        """
+        Total size of all cache files in bytes.
+        """
+        return sum(entry.size for entry in self._get_entries())
+
+    @property
+    def cache_dir(self) -> Path:
+        return self._cache_dir
+
+    @property
+    def max_size(self) -> int:
+        return self._max_size
@@ -1,6 +1,8 @@
 from typing import Optional
 import numpy as np
 
+from analysis_tools.plotting.binning import BinContents, fill_1d
+
 __all__ = [
     "HistogramComponent",
 ]
@@ -9,25 +11,117 @@ __all__ = [
 class HistogramComponent:
     def __init__(
         self,
-        data: np.ndarray,
+        data: Optional[np.ndarray],
         label: str,
         weights: Optional[np.ndarray] = None,
         color: Optional[str] = None,
         related_component: Optional["HistogramComponent"] = None,
         line_style: str = "-",
+        bin_edges: Optional[np.ndarray] = None,
+        bin_contents: Optional[BinContents] = None,
     ) -> None:
+        if (data is None) == (bin_contents is None):
+            raise ValueError("A HistogramComponent needs either raw data or bin contents, but not both!")
+        if bin_contents is not None and bin_edges is None:
+            raise ValueError("Bin contents can only be given together with their bin edges!")
+
         self._data = data
         self._label = label
         self._weights = weights
         self._color = color
         self._related_component = related_component
         self._line_style = line_style
+        self._bin_edges = bin_edges
+        self._bin_contents = bin_contents
+        self._owns_bin_contents = False
+
+    @staticmethod
+    def from_bin_contents(
+        label: str,
+        bin_edges: np.ndarray,
+        sum_of_weights: np.ndarray,
+        sum_of_weights_squared: Optional[np.ndarray] = None,
+        counts: Optional[np.ndarray] = None,
+        color: Optional[str] = None,
+        related_component: Optional["HistogramComponent"] = None,
+        line_style: str = "-",
+    ) -> "HistogramComponent":
+        """
+        Creates a pre-binned component. If no sum of squared weights is given, the
+        component is assumed to be unweighted, i.e. its bin errors are sqrt(sum_of_weights).
+        """
+        sum_of_weights = np.asarray(sum_of_weights, dtype=float)
+        if len(bin_edges) != len(sum_of_weights) + 1:
+            raise ValueError(f"Got {len(bin_edges)} bin edges for {len(sum_of_weights)} bins!")
+        return HistogramComponent(
+            data=None,
+            label=label,
+            color=color,
+            related_component=related_component,
+            line_style=line_style,
+            bin_edges=np.asarray(bin_edges, dtype=float),
+            bin_contents=BinContents(
+                counts=sum_of_weights if counts is None else np.asarray(counts, dtype=float),
+                sum_of_weights=sum_of_weights,
+                sum_of_weights_squared=(
+                    sum_of_weights if sum_of_weights_squared is None else np.asarray(sum_of_weights_squared, dtype=float)
+                ),
+            ),
+        )
+
+    def compact(self, bin_edges: np.ndarray, bin_contents: Optional[BinContents] = None) -> None:
+        """
+        Fills the raw data into the given binning and releases the data and weight arrays.
+        Afterwards only the bin edges, counts, sum of weights and sum of squared weights are kept.
+
+        :param bin_edges: Bin edges used to bin the raw data.
+        :param bin_contents: Already computed bin contents of this component for the given bin edges.
+        """
+        if self.is_binned:
+            if not np.array_equal(self.bin_edges, bin_edges):
+                raise ValueError(f"The component {self.label} is already binned with different bin edges!")
+            return
+        assert self._data is not None
+        if bin_contents is None:
+            bin_contents = fill_1d(data=self._data, edges=bin_edges, weights=self._weights)
+        self._bin_contents = bin_contents
+        self._owns_bin_contents = False
+        self._bin_edges = np.asarray(bin_edges, dtype=float)
+        self._data = None
+        self._weights = None
 
-    def get_bin_count(self) -> np.ndarray:
-        pass
+    def fill(self, data: np.ndarray, weights: Optional[np.ndarray] = None, uniform: Optional[bool] = None) -> None:
+        """
+        Adds a batch of entries to the bin contents of a binned component in place.
+        The cost is proportional to the size of the batch, independent of the number of entries filled before.
+
+        :param data: Values to be added.
+        :param weights: Optional weight for every entry.
+        :param uniform: Whether the bins have equal widths, see get_bin_indices.
+        """
+        if not self.is_binned:
+            raise ValueError(f"The raw component {self.label} has to be compacted before it can be filled!")
+        assert self._bin_contents is not None
+        if not self._owns_bin_contents:
+            # The bin contents might be read-only or share memory, e.g. sum_of_weights and counts of unweighted
+            # components, so private accumulators are created once before the first fill.
+            self._bin_contents = BinContents(*(np.array(contents, dtype=float) for contents in self._bin_contents))
+            self._owns_bin_contents = True
+        fill_1d(data=data, edges=self.bin_edges, weights=weights, uniform=uniform, out=self._bin_contents)
+
+    def get_bin_count(self, bin_edges: Optional[np.ndarray] = None) -> np.ndarray:
+        if self.is_binned:
+            assert self._bin_contents is not None
+            if bin_edges is not None and not np.array_equal(self.bin_edges, bin_edges):
+                raise ValueError(f"The component {self.label} is binned with different bin edges!")
+            return self._bin_contents.sum_of_weights
+        if bin_edges is None:
+            raise ValueError(f"The raw component {self.label} needs bin edges to be binned!")
+        assert self._data is not None
+        return fill_1d(data=self._data, edges=bin_edges, weights=self._weights).sum_of_weights
 
     @property
-    def data(self) -> np.ndarray:
+    def data(self) -> Optional[np.ndarray]:
         return self._data
 
     @property
@@ -49,3 +143,15 @@ class HistogramComponent:
     @property
     def line_style(self) -> str:
         return self._line_style
+
+    @property
+    def is_binned(self) -> bool:
+        return self._bin_contents is not None
+
+    @property
+    def bin_edges(self) -> Optional[np.ndarray]:
+        return self._bin_edges
+
+    @property
+    def bin_contents(self) -> Optional[BinContents]:
+        return self._bin_contents
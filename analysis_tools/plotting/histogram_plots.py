@@ -1,12 +1,18 @@
-import matplotlib.pyplot as plt
+from __future__ import annotations
+
 import numpy as np
-from typing import Optional, Union, Tuple
-import pandas as pd
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Union, Tuple
 from enum import Enum
 
 from analysis_tools.plotting.plot_variables import HistVariable
 from analysis_tools.plotting.histogram_component import HistogramComponent
 from analysis_tools.plotting.histogram import Histogram
+from analysis_tools.plotting.binning import BinContents, fill_1d, fill_1d_from_chunks
+from analysis_tools.plotting.comparison import ComparisonMode
+from analysis_tools.plotting.histogram_cache import HistogramCache
+from analysis_tools.utilities.array_utils import as_read_only_array, has_columns
+from analysis_tools.utilities.base_utils import PathType
+from analysis_tools.utilities.lazy_import import LazyModule
 from analysis_tools.plotting.plotting_utils import (
     AxesType,
     FigureType,
@@ -14,16 +20,111 @@ from analysis_tools.plotting.plotting_utils import (
     set_matplotlibrc_params,
 )
 
+if TYPE_CHECKING:
+    import pandas as pd
+
 __all__ = [
     "HistogramPlot",
 ]
 
+plt = LazyModule("matplotlib.pyplot")
+mpatches = LazyModule("matplotlib.patches")
+mmarkers = LazyModule("matplotlib.markers")
+legend_handler = LazyModule("matplotlib.legend_handler")
+
 
 class HistogramPlotType(Enum):
     candidates = "Candidates"
     events = "Events"
 
 
+class _HistogramPlotArtists(NamedTuple):
+    ax: AxesType
+    ax2: Optional[AxesType]
+    component_patches: List[Any]
+    uncertainty_bars: Optional[Any]
+    signal_patches: List[Any]
+    signal_uncertainty_bars: List[Optional[Any]]
+    data_errorbars: List[Any]
+    pull_errorbar: Optional[Any]
+    pull_band: Optional[Any]
+    pull_markers: Optional[Any]
+    pull_value_labels: Optional[List[Any]]
+    pull_mode: ComparisonMode
+    y_factor: Optional[float]
+    layout: Tuple[Any, ...]
+
+
+# Plotted range and ticks of the pull or ratio panel
+_COMPARISON_Y_RANGES = {
+    ComparisonMode.pull: (-5.0, 5.0),
+    ComparisonMode.ratio: (0.5, 1.5),
+}  # type: Dict[ComparisonMode, Tuple[float, float]]
+_COMPARISON_Y_TICKS = {
+    ComparisonMode.pull: [-3, 0, 3],
+    ComparisonMode.ratio: [0.7, 1.0, 1.3],
+}  # type: Dict[ComparisonMode, List[float]]
+
+
+def _get_marker_path(marker: str) -> Any:
+    marker_style = mmarkers.MarkerStyle(marker)
+    return marker_style.get_path().transformed(marker_style.get_transform())
+
+
+def _get_step_polygon(edges: np.ndarray, top: np.ndarray, below: np.ndarray, filled: bool) -> np.ndarray:
+    # Same vertices as created by Axes.hist for the histtypes "step" and "stepfilled"
+    n_edges = len(edges)
+    x = np.empty(4 * n_edges - 3)
+    y = np.empty(4 * n_edges - 3)
+    x[0 : 2 * n_edges - 1 : 2], x[1 : 2 * n_edges - 1 : 2] = edges, edges[:-1]
+    x[2 * n_edges - 1 :] = x[1 : 2 * n_edges - 1][::-1]
+    y[1 : 2 * n_edges - 1] = np.repeat(top, 2)
+    y[2 * n_edges - 1 :] = np.repeat(below, 2)[::-1]
+    y[0] = y[-1]
+    split = -1 if filled else 2 * n_edges
+    return np.column_stack([x[:split], y[:split]])
+
+
+def _update_hist_patches(patches: List[Any], tops: np.ndarray, edges: np.ndarray, hist_type: str, stacked: bool) -> None:
+    below = np.zeros(len(edges) - 1)
+    for component_patches, top in zip(patches, tops):
+        if hist_type.startswith("bar"):
+            _update_bars(bars=component_patches, bottom=below, height=top - below)
+        else:
+            for polygon in component_patches:
+                polygon.set_xy(_get_step_polygon(edges=edges, top=top, below=below, filled=hist_type == "stepfilled"))
+        if stacked:
+            below = top
+
+
+def _update_bars(bars: Any, bottom: np.ndarray, height: np.ndarray) -> None:
+    for rectangle, y, h in zip(bars, bottom, height):
+        rectangle.set_y(y)
+        rectangle.set_height(h)
+
+
+def _update_errorbar(container: Any, y: np.ndarray, y_errors: Optional[np.ndarray] = None) -> None:
+    # y_errors are either symmetric or of shape (2, n) with the lower and upper errors, like yerr of Axes.errorbar
+    data_line, cap_lines, bar_line_collections = container.lines
+    data_line.set_ydata(y)
+    if y_errors is not None:
+        x = data_line.get_xdata()
+        y = np.ma.filled(y, np.nan)
+        lower_errors, upper_errors = np.broadcast_to(np.ma.filled(y_errors, np.nan), (2, len(y)))
+        for cap_line, y_cap in zip(cap_lines, (y - lower_errors, y + upper_errors)):
+            cap_line.set_ydata(y_cap)
+        bar_line_collections[0].set_segments(
+            np.stack([np.column_stack([x, y - lower_errors]), np.column_stack([x, y + upper_errors])], axis=1)
+        )
+
+
+def _get_out_of_range_bins(values: np.ndarray, y_range: Tuple[float, float]) -> Tuple[np.ndarray, np.ndarray]:
+    # Indices of the bins with values outside of the range and whether they are above it
+    lower, upper = y_range
+    outside = np.flatnonzero((values > upper) | (values < lower))
+    return outside, values[outside] > upper
+
+
 class HistogramPlot:
     def __init__(
         self,
@@ -38,7 +139,27 @@ class HistogramPlot:
         additional_lumi_text: str = None,
         fig_size: Tuple[float, float] = (8.0, 6.0),
         histogram_plot_type: HistogramPlotType = HistogramPlotType.candidates,
+        histogram: Optional[Histogram] = None,
+        strict_zero_copy: bool = False,
+        renderer: str = "hist",
+        histogram_cache: Optional[HistogramCache] = None,
     ) -> None:
+        """
+        :param renderer: "hist" draws the components with Axes.hist and the uncertainties with one bar per bin.
+                         "stairs" draws every stack layer and uncertainty band as a single StepPatch, which looks
+                         the same but needs far fewer artists and is faster to export, e.g. for many bins.
+                         Only supported for the hist types "step" and "stepfilled".
+        :param histogram_cache: Optional persistent cache of the bin contents of all added components, such that
+                                their inputs are neither read nor filled again when the plot is re-run.
+                                Requires a HistVariable with a fixed scope.
+        """
+        if renderer not in ("hist", "stairs"):
+            raise ValueError(f"The renderer has to be either 'hist' or 'stairs', got {renderer}!")
+        if renderer == "stairs" and hist_type not in ("step", "stepfilled"):
+            raise ValueError(f"The stairs renderer only supports the hist types step and stepfilled, got {hist_type}!")
+        if histogram_cache is not None and hist_var.get_bin_edges() is None:
+            raise ValueError("A histogram cache requires a HistVariable with a fixed scope!")
+
         self._hist_var = hist_var
         self._title = title
         self._stacked = stacked
@@ -50,68 +171,147 @@ class HistogramPlot:
         self._additional_lumi_text = additional_lumi_text
         self._fig_size = fig_size
         self._histogram_plot_type = histogram_plot_type
+        self._strict_zero_copy = strict_zero_copy
+        self._renderer = renderer
+        self._histogram_cache = histogram_cache
 
-        self._histogram = Histogram(variable=self.hist_var)
+        if histogram is None:
+            histogram = Histogram(variable=self.hist_var)
+        elif histogram.variable is not self.hist_var:
+            raise ValueError("The given histogram has to be filled for the HistVariable of the plot!")
+        self._histogram = histogram
+        self._artists = None  # type: Optional[_HistogramPlotArtists]
 
     def prepare_data_and_weights(
         self,
-        data: Union[pd.DataFrame, pd.Series, np.ndarray],
-        weights: Optional[Union[str, pd.Series, np.ndarray]] = None,
+        data: Union[pd.DataFrame, pd.Series, np.ndarray, PathType],
+        weights: Optional[Union[pd.Series, np.ndarray, PathType]] = None,
     ) -> Tuple[np.ndarray, Optional[np.ndarray]]:
-        if isinstance(data, pd.DataFrame):
-            hist_data = np.array(data[self.hist_var.df_label])
-        elif isinstance(data, pd.Series):
-            hist_data = np.array(data)
-        elif isinstance(data, np.ndarray):
-            hist_data = data
-        else:
-            raise ValueError
+        """
+        Returns read-only views of the histogram data and weights, avoiding copies wherever possible.
+        Besides DataFrames, Series and arrays, pyarrow arrays and tables as well as paths to .npy files,
+        which are memory-mapped, are accepted. If strict_zero_copy is set, a ValueError is raised
+        whenever a copy cannot be avoided.
+
+        :param data: Values to be histogrammed.
+        :param weights: Weights of the values, as any of the types accepted for the data, or name of the weight
+                        column if the data is a DataFrame or a pyarrow Table. Strings ending in .npy are paths.
+        """
+        hist_data = as_read_only_array(
+            values=data,
+            column=self.hist_var.df_label if has_columns(data) else None,
+            strict=self.strict_zero_copy,
+        )
 
         if weights is not None:
-            if isinstance(weights, str):
-                assert isinstance(data, pd.DataFrame)
-                hist_weights = np.array(data[weights])  # type: Optional[np.ndarray]
-            elif isinstance(weights, pd.Series):
-                hist_weights = np.array(weights)
-            elif isinstance(weights, np.ndarray):
-                hist_weights = weights
+            if isinstance(weights, str) and not weights.endswith(".npy"):
+                if not has_columns(data):
+                    raise ValueError(
+                        f"The weights {weights} can only be a column name if the data is a DataFrame or a pyarrow "
+                        f"Table, got {type(data)}! Paths of weight files must end in .npy."
+                    )
+                hist_weights = as_read_only_array(
+                    values=data,
+                    column=weights,
+                    strict=self.strict_zero_copy,
+                )  # type: Optional[np.ndarray]
             else:
-                raise ValueError
+                hist_weights = as_read_only_array(values=weights, strict=self.strict_zero_copy)
         else:
             hist_weights = None
 
         return hist_data, hist_weights
 
+    def _create_hist_component(
+        self,
+        data: Union[pd.DataFrame, pd.Series, np.ndarray, PathType],
+        weights: Optional[Union[pd.Series, np.ndarray, PathType]],
+        **kwargs: Any,
+    ) -> HistogramComponent:
+        if self._histogram_cache is None:
+            hist_data, hist_weights = self.prepare_data_and_weights(data=data, weights=weights)
+            return HistogramComponent(data=hist_data, weights=hist_weights, **kwargs)
+
+        key = self._histogram_cache.get_key(hist_var=self.hist_var, data=data, weights=weights)
+        cached = self._histogram_cache.load(key=key)
+        if cached is not None:
+            bin_edges, bin_contents = cached
+        else:
+            hist_data, hist_weights = self.prepare_data_and_weights(data=data, weights=weights)
+            bin_edges = self.histogram.get_binning()
+            bin_contents = fill_1d(
+                data=hist_data, edges=bin_edges, weights=hist_weights, uniform=self.histogram.is_uniform_binning
+            )
+            self._histogram_cache.store(key=key, bin_edges=bin_edges, bin_contents=bin_contents)
+        return HistogramComponent(data=None, bin_edges=bin_edges, bin_contents=bin_contents, **kwargs)
+
     def add_component(
         self,
-        data: Union[pd.DataFrame, pd.Series, np.ndarray],
+        data: Union[pd.DataFrame, pd.Series, np.ndarray, PathType],
         label: str,
-        weights: Optional[Union[str, pd.Series, np.ndarray]] = None,
+        weights: Optional[Union[pd.Series, np.ndarray, PathType]] = None,
         color: Optional[str] = None,
     ) -> None:
-        hist_data, hist_weights = self.prepare_data_and_weights(data=data, weights=weights)
+        hist_component = self._create_hist_component(data=data, weights=weights, label=label, color=color)
+        self._histogram.add_component(hist_component=hist_component)
+
+    def _fill_from_chunks(
+        self,
+        chunks: Iterable[Union[pd.DataFrame, pd.Series, np.ndarray]],
+        weights: Optional[str] = None,
+    ) -> Tuple[np.ndarray, BinContents]:
+        if not self.hist_var.scope:
+            raise ValueError("Filling a component from chunks requires a HistVariable with a fixed scope!")
+        bin_edges = self.histogram.get_binning()
+
+        def data_and_weights() -> Iterator[Tuple[np.ndarray, Optional[np.ndarray]]]:
+            for chunk in chunks:
+                yield self.prepare_data_and_weights(data=chunk, weights=weights)
+
+        return bin_edges, fill_1d_from_chunks(
+            chunks=data_and_weights(), edges=bin_edges, uniform=self.histogram.is_uniform_binning
+        )
+
+    def add_component_from_chunks(
+        self,
+        chunks: Iterable[Union[pd.DataFrame, pd.Series, np.ndarray]],
+        label: str,
+        weights: Optional[str] = None,
+        color: Optional[str] = None,
+    ) -> None:
+        """
+        Adds a component which is filled chunk by chunk, e.g. from pandas.read_csv(..., chunksize=...)
+        or a parquet batch reader. Only the bin contents are kept, the raw data of each chunk is released
+        after it has been filled. Requires a fixed scope of the HistVariable.
+
+        :param chunks: Iterable of DataFrames, Series or arrays.
+        :param label: Label of the component.
+        :param weights: Name of the weight column, only possible for DataFrame chunks.
+        :param color: Color of the component.
+        """
+        bin_edges, bin_contents = self._fill_from_chunks(chunks=chunks, weights=weights)
         hist_component = HistogramComponent(
-            data=hist_data,
+            data=None,
             label=label,
-            weights=hist_weights,
             color=color,
+            bin_edges=bin_edges,
+            bin_contents=bin_contents,
         )
         self._histogram.add_component(hist_component=hist_component)
 
     def add_signal_component(
         self,
-        data: Union[pd.DataFrame, pd.Series, np.ndarray],
+        data: Union[pd.DataFrame, pd.Series, np.ndarray, PathType],
         label: str,
-        weights: Optional[Union[str, pd.Series, np.ndarray]] = None,
+        weights: Optional[Union[pd.Series, np.ndarray, PathType]] = None,
         color: Optional[str] = None,
         related_hist_component: Optional[HistogramComponent] = None,
         line_style: str = "-",
     ) -> HistogramComponent:
-        hist_data, hist_weights = self.prepare_data_and_weights(data=data, weights=weights)
-        hist_component = HistogramComponent(
-            data=hist_data,
+        hist_component = self._create_hist_component(
+            data=data,
+            weights=weights,
             label=label,
-            weights=hist_weights,
             color=color,
             related_component=related_hist_component,
             line_style=line_style,
@@ -121,19 +321,62 @@ class HistogramPlot:
 
     def add_data(
         self,
-        data: Union[pd.DataFrame, pd.Series, np.ndarray],
+        data: Union[pd.DataFrame, pd.Series, np.ndarray, PathType],
         label: str,
         color: Optional[str] = None,
     ) -> None:
-        hist_data, hist_weights = self.prepare_data_and_weights(data=data)
+        hist_component = self._create_hist_component(data=data, weights=None, label=label, color=color)
+        self._histogram.add_data(hist_component=hist_component)
+
+    def add_data_from_chunks(
+        self,
+        chunks: Iterable[Union[pd.DataFrame, pd.Series, np.ndarray]],
+        label: str,
+        color: Optional[str] = None,
+    ) -> None:
+        bin_edges, bin_contents = self._fill_from_chunks(chunks=chunks)
         hist_component = HistogramComponent(
-            data=hist_data,
+            data=None,
             label=label,
-            weights=hist_weights,
             color=color,
+            bin_edges=bin_edges,
+            bin_contents=bin_contents,
         )
         self._histogram.add_data(hist_component=hist_component)
 
+    def fill(
+        self,
+        component_label: str,
+        data: Union[pd.DataFrame, pd.Series, np.ndarray, PathType],
+        weights: Optional[Union[pd.Series, np.ndarray, PathType]] = None,
+    ) -> None:
+        """
+        Adds a batch of entries to an existing component, see Histogram.fill.
+        Afterwards, refresh updates an already drawn plot.
+
+        :param component_label: Label of the component to be filled.
+        :param data: DataFrame, Series or array with the new entries.
+        :param weights: Weights of the new entries or name of the weight column.
+        """
+        hist_data, hist_weights = self.prepare_data_and_weights(data=data, weights=weights)
+        self._histogram.fill(component_label=component_label, data=hist_data, weights=hist_weights)
+
+    def set_histogram(self, histogram: Histogram) -> None:
+        """
+        Replaces the histogram, e.g. by a systematic variation with the same components.
+        Use plot_on(reuse_artists=True) to render it into the already existing figure.
+        """
+        if histogram.variable is not self.hist_var:
+            raise ValueError("The given histogram has to be filled for the HistVariable of the plot!")
+        self._histogram = histogram
+
+    def compact(self) -> None:
+        """
+        Replaces the raw data of all components by their bin contents to free memory.
+        Should be called after all components have been added.
+        """
+        self._histogram.compact()
+
     def get_binning(self) -> Union[int, np.ndarray]:
         return self.hist_var.bins
 
@@ -149,7 +392,28 @@ class HistogramPlot:
         custom_xticks=None,
         lumi_pos=None,
         legend_fontsize=16,
+        reuse_artists: bool = False,
+        pull_mode: ComparisonMode = ComparisonMode.pull,
+        label_out_of_range: bool = True,
     ) -> Tuple[FigureType, AxesType]:
+        """
+        Draws the histogram components, signal components and data.
+
+        :param reuse_artists: If True and the plot has already been drawn with the same components, binning and
+                              pull setting, the existing figure is updated with the current bin contents via refresh
+                              instead of drawing a new one, e.g. to render systematic variations or toys. The
+                              remaining layout arguments are ignored in this case.
+        :param pull_mode: Whether the lower panel added with add_pull shows the pulls of data and MC, including
+                          the MC statistical uncertainty, or their ratio together with the relative MC uncertainty.
+        :param label_out_of_range: Whether the values of bins outside of the range of the lower panel are written
+                                   next to their markers. Without labels, only the single marker collection is drawn.
+        """
+        layout = self._get_layout(add_pull=add_pull, pull_mode=pull_mode, label_out_of_range=label_out_of_range)
+        if reuse_artists and self._can_reuse_artists(fig_ax=fig_ax, layout=layout):
+            assert self._artists is not None
+            self.refresh()
+            return self._artists.ax.figure, self._artists.ax
+
         set_matplotlibrc_params()
 
         if add_pull:
@@ -170,33 +434,45 @@ class HistogramPlot:
             ax2 = None
 
         if self.hist_type == "stepfilled":
-            kwargs = {"lw": 0.3, "edgecolor": "black"}
+            kwargs = {"linewidth": 0.3, "edgecolor": "black"}
         else:
-            kwargs = {"lw": 1.5}
+            kwargs = {"linewidth": 1.5}
+
+        component_patches = []  # type: List[Any]
+        uncertainty_bars = None
+        signal_patches = []  # type: List[Any]
+        signal_uncertainty_bars = []  # type: List[Optional[Any]]
+        data_errorbars = []  # type: List[Any]
+        pull_errorbar = None
+        pull_band = None
+        pull_markers = None
+        pull_value_labels = None  # type: Optional[List[Any]]
 
         if self.histogram.components is not None:
-            ax.hist(
-                self.histogram.get_bins_for_hist(),
-                bins=self._histogram.get_binning(),
-                weights=self.histogram.get_bin_counts(),
-                label=self.histogram.get_labels(),
-                color=self.histogram.get_colors(),
-                histtype=self.hist_type,
-                stacked=self.stacked,
-                density=self.normed,
-                **kwargs,
-            )
+            if self.renderer == "stairs":
+                component_patches = self._draw_component_stairs(ax=ax, **kwargs)
+            else:
+                _, _, patches = ax.hist(
+                    self.histogram.get_bins_for_hist(),
+                    bins=self._histogram.get_binning(),
+                    weights=self.histogram.get_bin_counts(),
+                    label=self.histogram.get_labels(),
+                    color=self.histogram.get_colors(),
+                    histtype=self.hist_type,
+                    stacked=self.stacked,
+                    density=self.normed,
+                    **kwargs,
+                )
+                component_patches = list(patches) if len(self.histogram.components) > 1 else [patches]
 
             if self.uncertainty:
-                ax.bar(
-                    self.histogram.get_bins_for_hist()[0],
-                    height=2 * self.histogram.get_bin_errors(),
-                    width=self.histogram.get_bin_width(),
-                    bottom=self.histogram.get_total_bin_count() - self.histogram.get_bin_errors(),
+                bin_errors = self.histogram.get_bin_errors()
+                total_bin_count = self.histogram.get_total_bin_count()
+                uncertainty_bars = self._draw_uncertainty_band(
+                    ax=ax,
+                    lower=total_bin_count - bin_errors,
+                    upper=total_bin_count + bin_errors,
                     color="black",
-                    hatch="///////",
-                    fill=False,
-                    lw=0,
                     label="MC stat. unc.",
                 )
 
@@ -205,37 +481,50 @@ class HistogramPlot:
         if self.histogram.signal_components is not None:
             for signal_component in self.histogram.signal_components:
                 signal_bin_count, _ = self.histogram.get_signal_bin_count_for_component(hist_component=signal_component)
-                ax.hist(
-                    self.histogram.get_signal_bins_for_hist()[0],
-                    bins=self.histogram.get_binning(),
-                    weights=signal_bin_count,
-                    label=f"{signal_component.label}",
-                    color=signal_component.color,
-                    histtype="step",
-                    lw=3,
-                    ls=signal_component.line_style,
-                )
+                if self.renderer == "stairs":
+                    # Same outline and z-order as an unfilled Axes.hist, the color is only passed if it is set,
+                    # such that Axes.stairs takes the next color of the property cycle like Axes.hist.
+                    patches = ax.stairs(
+                        signal_bin_count,
+                        self.histogram.get_binning(),
+                        baseline=0,
+                        fill=False,
+                        label=f"{signal_component.label}",
+                        lw=3,
+                        ls=signal_component.line_style,
+                        zorder=2,
+                        **({"color": signal_component.color} if signal_component.color is not None else {}),
+                    )
+                else:
+                    _, _, patches = ax.hist(
+                        self.histogram.get_signal_bins_for_hist()[0],
+                        bins=self.histogram.get_binning(),
+                        weights=signal_bin_count,
+                        label=f"{signal_component.label}",
+                        color=signal_component.color,
+                        histtype="step",
+                        lw=3,
+                        ls=signal_component.line_style,
+                    )
+                signal_patches.append(patches)
+                signal_bars = None
                 if self.uncertainty:
                     bin_errors = self.histogram.get_signal_bin_error_for_component(hist_component=signal_component)
-                    ax.bar(
-                        self.histogram.get_signal_bins_for_hist()[0],
-                        height=2 * bin_errors,
-                        width=self.histogram.get_bin_width(),
-                        bottom=signal_bin_count - bin_errors,
+                    signal_bars = self._draw_uncertainty_band(
+                        ax=ax,
+                        lower=signal_bin_count - bin_errors,
+                        upper=signal_bin_count + bin_errors,
                         edgecolor=signal_component.color,
-                        hatch="///////",
-                        fill=False,
-                        lw=0,
                     )
+                signal_uncertainty_bars.append(signal_bars)
 
         if self.histogram.data_components is not None:
             for data_component in self.histogram.data_components:
-                bin_count = self.histogram.get_bin_count_for_component(hist_component=data_component)
-                bin_count = [b if b > 0 else np.nan for b in bin_count]
-                ax.errorbar(
-                    self.histogram.get_data_bins_for_hist()[0],
-                    bin_count,
-                    yerr=np.sqrt(bin_count),
+                data_points = self.histogram.get_data_points_for_component(hist_component=data_component)
+                data_container = ax.errorbar(
+                    self.histogram.get_bin_mids(),
+                    data_points.values,
+                    yerr=data_points.errors,
                     label=data_component.label,
                     color=data_component.color,
                     marker="o",
@@ -244,87 +533,64 @@ class HistogramPlot:
                     lw=3,
                     ls="None",
                 )
+                data_errorbars.append(data_container)
 
         if add_pull:
             assert ax2 is not None
             assert self.histogram.data_components is not None
-            ax2.fill_between(
-                self.hist_var.scope, y1=(-1, -1), y2=(1, 1), color=KITColors.grey, alpha=0.5, edgecolor="None"
-            )
-            ax2.fill_between(
-                self.hist_var.scope, y1=(-1, -1), y2=(-2, -2), color=KITColors.grey, alpha=0.25, edgecolor="None"
-            )
-            ax2.fill_between(
-                self.hist_var.scope, y1=(1, 1), y2=(2, 2), color=KITColors.grey, alpha=0.25, edgecolor="None"
-            )
-
-            data_component = self.histogram.data_components[0]
-            pull = (
-                self.histogram.get_bin_count_for_component(hist_component=data_component)
-                - self.histogram.get_total_bin_count()
-            ) / (
-                np.sqrt(
-                    self.histogram.get_total_bin_count()
-                    + self.histogram.get_bin_count_for_component(hist_component=data_component)
+            comparison = self.histogram.get_data_mc_comparison(mode=pull_mode)
+            y_range = _COMPARISON_Y_RANGES[pull_mode]
+            x_range = (self.histogram.get_binning()[0], self.histogram.get_binning()[-1])
+            if pull_mode is ComparisonMode.ratio:
+                assert comparison.mc_uncertainty is not None
+                pull_band = ax2.stairs(
+                    1 + comparison.mc_uncertainty,
+                    self.histogram.get_binning(),
+                    baseline=1 - comparison.mc_uncertainty,
+                    fill=True,
+                    color=KITColors.grey,
+                    alpha=0.5,
                 )
-            )
-            ax2.errorbar(
-                self.histogram.get_data_bins_for_hist()[0],
-                pull,
+            else:
+                ax2.fill_between(x_range, y1=(-1, -1), y2=(1, 1), color=KITColors.grey, alpha=0.5, edgecolor="None")
+                ax2.fill_between(x_range, y1=(-1, -1), y2=(-2, -2), color=KITColors.grey, alpha=0.25, edgecolor="None")
+                ax2.fill_between(x_range, y1=(1, 1), y2=(2, 2), color=KITColors.grey, alpha=0.25, edgecolor="None")
+
+            pull_errorbar = ax2.errorbar(
+                self.histogram.get_bin_mids(),
+                comparison.values,
+                yerr=comparison.errors,
                 marker="o",
                 ls="None",
                 color=KITColors.kit_black,
                 markersize=8,
             )
-            ax2.set_ylim(-5, 5)
-            ax2.axhline(0, color=KITColors.dark_grey)
-
-            width = self.histogram.get_bin_width() / 15
-            for i, value in enumerate(pull):
-                if value > 5.1:
-                    x = self.histogram.get_data_bins_for_hist()[0][i]
-                    ax2.arrow(
-                        x=x,
-                        y=2,
-                        dx=0,
-                        dy=3,
-                        length_includes_head=True,
-                        width=width,
-                        head_width=3 * width,
-                        head_length=1.0,
-                        color="black",
-                    )
-                    ax2.text(x, 1, round(value, 1), fontsize=8, color="black", ha="center", va="center")
-                if value < -5.1:
-                    x = self.histogram.get_data_bins_for_hist()[0][i]
-                    ax2.arrow(
-                        x=x,
-                        y=-2,
-                        dx=0,
-                        dy=-3,
-                        length_includes_head=True,
-                        width=width,
-                        head_width=3 * width,
-                        head_length=1.0,
-                        color="black",
-                    )
-                    ax2.text(x, -1, round(value, 1), fontsize=8, color="black", ha="center", va="center")
-
-            ax2.set_ylabel(r"Pull")
-            ax2.set_yticks([-3, 0, 3])
+            ax2.set_ylim(*y_range)
+            ax2.axhline(1 if pull_mode is ComparisonMode.ratio else 0, color=KITColors.dark_grey)
+            pull_markers = self._draw_out_of_range_markers(ax2=ax2, values=comparison.values, y_range=y_range)
+            if label_out_of_range:
+                pull_value_labels = self._draw_out_of_range_labels(ax2=ax2, values=comparison.values, y_range=y_range)
+
+            ax2.set_ylabel(pull_mode.value)
+            ax2.set_yticks(_COMPARISON_Y_TICKS[pull_mode])
             if custom_xticks:
                 ax2.set_xticks(custom_xticks)
 
         if self.hist_var.scope:
             ax.set_xlim(self.hist_var.scope)
 
+        if self.hist_var.x_scale_log:
+            ax.set_xscale("log")
+
         if self.y_log:
             ax.set_yscale("log")
 
+        y_factor = None
         if self.luminosity_label:
             ymin, ymax = ax.get_ylim()
             if factor is None:
                 factor = 1.1 if not self._additional_lumi_text else 1.2
+            y_factor = factor
             ax.set_ylim(ymin, factor * ymax)
             if not lumi_pos:
                 ax.text(0.02, 0.96, self.luminosity_label, va="top", transform=ax.transAxes, fontsize=15)
@@ -350,13 +616,19 @@ class HistogramPlot:
         if legend_pos:
             l_pos = legend_pos
         if show_legend:
+            legend_entries = {}  # type: Dict[str, Any]
+            if self.renderer == "stairs":
+                legend_entries = self._get_stairs_legend_entries(ax=ax, uncertainty_band=uncertainty_bars)
             ax.legend(
+                **legend_entries,
                 loc=l_pos,
                 fontsize=legend_fontsize,
                 title=legend_title,
                 title_fontsize=legend_fontsize,
                 ncol=ncol,
                 mode="expand" if ncol > 1 else None,
+                # Patch shaped legend entries for unfilled StepPatches, as for the polygons drawn by Axes.hist
+                handler_map={mpatches.StepPatch: legend_handler.HandlerPatch()} if self.renderer == "stairs" else None,
             )
 
         if self.title:
@@ -369,8 +641,265 @@ class HistogramPlot:
         if add_pull:
             plt.subplots_adjust(hspace=0.05, wspace=0.02)
 
+        self._artists = _HistogramPlotArtists(
+            ax=ax,
+            ax2=ax2,
+            component_patches=component_patches,
+            uncertainty_bars=uncertainty_bars,
+            signal_patches=signal_patches,
+            signal_uncertainty_bars=signal_uncertainty_bars,
+            data_errorbars=data_errorbars,
+            pull_errorbar=pull_errorbar,
+            pull_band=pull_band,
+            pull_markers=pull_markers,
+            pull_value_labels=pull_value_labels,
+            pull_mode=pull_mode,
+            y_factor=y_factor,
+            layout=layout,
+        )
+
         return fig, ax
 
+    def refresh(self) -> None:
+        """
+        Updates the artists drawn by the last call of plot_on with the current bin contents of the histogram,
+        e.g. after new entries have been added with fill. Instead of creating a new figure, only the heights
+        of the histograms, the uncertainty bands, error bars and pulls are changed and the y range is adapted.
+        """
+        if self._artists is None:
+            raise ValueError("plot_on has to be called before the plot can be refreshed!")
+        artists = self._artists
+        ax = artists.ax
+        edges = self.histogram.get_binning()
+        # All drawn y values, from which the data limits are updated instead of the much slower Axes.relim
+        y_values = [np.zeros(1)]  # type: List[np.ndarray]
+
+        if self.histogram.components is not None:
+            tops = self._get_component_tops()
+            if self.renderer == "stairs":
+                for patch, top, below in zip(artists.component_patches, tops, self._get_stairs_baselines(tops=tops)):
+                    patch.set_data(values=top, baseline=below)
+            else:
+                _update_hist_patches(
+                    patches=artists.component_patches,
+                    tops=tops,
+                    edges=edges,
+                    hist_type=self.hist_type,
+                    stacked=self.stacked,
+                )
+            y_values.append(tops.ravel())
+            if artists.uncertainty_bars is not None:
+                bin_errors = self.histogram.get_bin_errors()
+                total_bin_count = self.histogram.get_total_bin_count()
+                self._update_uncertainty_band(
+                    band=artists.uncertainty_bars, lower=total_bin_count - bin_errors, upper=total_bin_count + bin_errors
+                )
+                y_values.extend([total_bin_count - bin_errors, total_bin_count + bin_errors])
+
+        if self.histogram.signal_components is not None:
+            for signal_component, patches, signal_bars in zip(
+                self.histogram.signal_components, artists.signal_patches, artists.signal_uncertainty_bars
+            ):
+                signal_bin_count, _ = self.histogram.get_signal_bin_count_for_component(hist_component=signal_component)
+                if self.renderer == "stairs":
+                    patches.set_data(values=signal_bin_count)
+                else:
+                    _update_hist_patches(
+                        patches=[patches],
+                        tops=signal_bin_count[np.newaxis],
+                        edges=edges,
+                        hist_type="step",
+                        stacked=False,
+                    )
+                y_values.append(signal_bin_count)
+                if signal_bars is not None:
+                    bin_errors = self.histogram.get_signal_bin_error_for_component(hist_component=signal_component)
+                    self._update_uncertainty_band(
+                        band=signal_bars, lower=signal_bin_count - bin_errors, upper=signal_bin_count + bin_errors
+                    )
+                    y_values.extend([signal_bin_count - bin_errors, signal_bin_count + bin_errors])
+
+        if self.histogram.data_components is not None:
+            for data_component, data_container in zip(self.histogram.data_components, artists.data_errorbars):
+                data_points = self.histogram.get_data_points_for_component(hist_component=data_component)
+                _update_errorbar(container=data_container, y=data_points.values, y_errors=data_points.errors)
+                y_values.extend(
+                    np.ma.filled(
+                        [data_points.values - data_points.errors[0], data_points.values + data_points.errors[1]], np.nan
+                    )
+                )
+
+        if artists.pull_errorbar is not None:
+            comparison = self.histogram.get_data_mc_comparison(mode=artists.pull_mode)
+            _update_errorbar(container=artists.pull_errorbar, y=comparison.values, y_errors=comparison.errors)
+            if artists.pull_band is not None:
+                assert comparison.mc_uncertainty is not None
+                artists.pull_band.set_data(values=1 + comparison.mc_uncertainty, baseline=1 - comparison.mc_uncertainty)
+            y_range = _COMPARISON_Y_RANGES[artists.pull_mode]
+            self._update_out_of_range_markers(markers=artists.pull_markers, values=comparison.values, y_range=y_range)
+            if artists.pull_value_labels is not None:
+                # The number of labels changes with the number of bins outside of the range, so they are redrawn
+                assert artists.ax2 is not None
+                for label in artists.pull_value_labels:
+                    label.remove()
+                artists.pull_value_labels[:] = self._draw_out_of_range_labels(
+                    ax2=artists.ax2, values=comparison.values, y_range=y_range
+                )
+
+        ax.dataLim.update_from_data_y(np.concatenate(y_values), ignore=True)
+        ax.set_autoscaley_on(True)
+        ax.autoscale_view(scalex=False)
+        if artists.y_factor is not None:
+            ymin, ymax = ax.get_ylim()
+            ax.set_ylim(ymin, artists.y_factor * ymax)
+
+    def _get_layout(self, add_pull: bool, pull_mode: ComparisonMode, label_out_of_range: bool) -> Tuple[Any, ...]:
+        # Everything which determines the number and kind of artists drawn by plot_on
+        return (
+            add_pull,
+            pull_mode,
+            label_out_of_range,
+            self.hist_type,
+            self.stacked,
+            self.normed,
+            self.uncertainty,
+            tuple(self.histogram.get_labels()) if self.histogram.components is not None else None,
+            tuple(c.label for c in self.histogram.signal_components) if self.histogram.signal_components else None,
+            tuple(c.label for c in self.histogram.data_components) if self.histogram.data_components else None,
+            self.histogram.get_binning().tobytes(),
+        )
+
+    def _can_reuse_artists(self, fig_ax: Optional[Tuple[FigureType, AxesType]], layout: Tuple[Any, ...]) -> bool:
+        if self._artists is None:
+            return False
+        ax = self._artists.ax
+        if fig_ax is not None and fig_ax[1] is not ax:
+            return False
+        # The axes might have been removed from its figure in the meantime
+        if ax.figure is None or ax not in ax.figure.axes:
+            return False
+        return self._artists.layout == layout
+
+    def _draw_component_stairs(self, ax: AxesType, **kwargs: Any) -> List[Any]:
+        # One StepPatch per stack layer instead of Axes.hist. The layers are drawn in the order of the components,
+        # such that missing colors are taken from the property cycle as in Axes.hist, and then added to the axes
+        # again in reversed order, such that upper layers are drawn first and listed first in the legend.
+        filled = self.hist_type == "stepfilled"
+        tops = self._get_component_tops()
+        colors = self.histogram.get_colors()
+        patches = []  # type: List[Any]
+        for i, (top, below) in enumerate(zip(tops, self._get_stairs_baselines(tops=tops))):
+            patches.append(
+                ax.stairs(
+                    top,
+                    self.histogram.get_binning(),
+                    baseline=below,
+                    fill=filled,
+                    label=self.histogram.get_labels()[i],
+                    zorder=None if filled else 2,
+                    **({"color": colors[i]} if colors is not None else {}),
+                    **kwargs,
+                )
+            )
+        for patch in reversed(patches):
+            patch.remove()
+            ax.add_patch(patch)
+        return patches
+
+    @staticmethod
+    def _get_stairs_legend_entries(ax: AxesType, uncertainty_band: Optional[Any]) -> Dict[str, Any]:
+        # The band of the hist renderer is a BarContainer, which the legend lists after all patches. The StepPatch
+        # of the stairs renderer is moved there as well, instead of being listed before the signal components.
+        handles, labels = ax.get_legend_handles_labels()
+        if uncertainty_band is not None and uncertainty_band in handles:
+            index = handles.index(uncertainty_band)
+            handle, label = handles.pop(index), labels.pop(index)
+            position = max((i + 1 for i, h in enumerate(handles) if isinstance(h, mpatches.Patch)), default=0)
+            handles.insert(position, handle)
+            labels.insert(position, label)
+        return {"handles": handles, "labels": labels}
+
+    def _get_stairs_baselines(self, tops: np.ndarray) -> List[Union[float, np.ndarray]]:
+        # Filled layers are closed towards the layer below, unfilled ones end at zero like the outline of Axes.hist
+        if self.hist_type != "stepfilled":
+            return [0.0] * len(tops)
+        if not self.stacked:
+            return [np.zeros(tops.shape[1])] * len(tops)
+        return [np.zeros(tops.shape[1])] + list(tops[:-1])
+
+    def _draw_uncertainty_band(self, ax: AxesType, lower: np.ndarray, upper: np.ndarray, **kwargs: Any) -> Any:
+        # Hatched band either as a single StepPatch or as one bar per bin
+        if self.renderer == "stairs":
+            # Without a color, Axes.stairs would take the next color of the property cycle, which Axes.bar does not
+            kwargs.setdefault("color", None)
+            return ax.stairs(
+                upper, self.histogram.get_binning(), baseline=lower, fill=False, hatch="///////", lw=0, **kwargs
+            )
+        return ax.bar(
+            self.histogram.get_binning()[:-1],
+            height=upper - lower,
+            width=self.histogram.get_bin_widths(),
+            align="edge",
+            bottom=lower,
+            hatch="///////",
+            fill=False,
+            lw=0,
+            **kwargs,
+        )
+
+    def _update_uncertainty_band(self, band: Any, lower: np.ndarray, upper: np.ndarray) -> None:
+        if self.renderer == "stairs":
+            band.set_data(values=upper, baseline=lower)
+        else:
+            _update_bars(bars=band, bottom=lower, height=upper - lower)
+
+    def _get_component_tops(self) -> np.ndarray:
+        # Heights of the component histograms as computed by Axes.hist
+        tops = np.array(self.histogram.get_bin_counts(), dtype=float)
+        if self.stacked:
+            tops = tops.cumsum(axis=0)
+        if self.normed:
+            bin_widths = self.histogram.get_bin_widths()
+            if self.stacked:
+                tops = tops / bin_widths / tops[-1].sum()
+            else:
+                tops = tops / bin_widths / tops.sum(axis=1, keepdims=True)
+        return tops
+
+    def _draw_out_of_range_markers(self, ax2: AxesType, values: np.ndarray, y_range: Tuple[float, float]) -> Any:
+        # All markers for values outside of the plotted range are drawn as a single collection
+        markers = ax2.scatter(np.empty(0), np.empty(0), marker="^", s=60, color="black", zorder=3)
+        self._update_out_of_range_markers(markers=markers, values=values, y_range=y_range)
+        return markers
+
+    def _update_out_of_range_markers(self, markers: Any, values: np.ndarray, y_range: Tuple[float, float]) -> None:
+        outside, above = _get_out_of_range_bins(values=values, y_range=y_range)
+        lower, upper = y_range
+        margin = 0.15 * (upper - lower)
+        markers.set_offsets(
+            np.column_stack(
+                [
+                    self.histogram.get_bin_mids()[outside],
+                    np.where(above, upper - margin, lower + margin),
+                ]
+            )
+        )
+        markers.set_paths([_get_marker_path("^" if is_above else "v") for is_above in above])
+
+    def _draw_out_of_range_labels(self, ax2: AxesType, values: np.ndarray, y_range: Tuple[float, float]) -> List[Any]:
+        # The values of the bins outside of the plotted range, written between the markers and the center line
+        outside, above = _get_out_of_range_bins(values=values, y_range=y_range)
+        lower, upper = y_range
+        margin = 0.3 * (upper - lower)
+        return [
+            ax2.text(
+                x, upper - margin if is_above else lower + margin, round(value, 1), fontsize=8, ha="center", va="center"
+            )
+            for x, value, is_above in zip(
+                self.histogram.get_bin_mids()[outside].tolist(), values[outside].tolist(), above.tolist()
+            )
+        ]
+
     @property
     def hist_var(self) -> HistVariable:
         return self._hist_var
@@ -383,6 +912,18 @@ class HistogramPlot:
     def stacked(self) -> bool:
         return self._stacked
 
+    @property
+    def strict_zero_copy(self) -> bool:
+        return self._strict_zero_copy
+
+    @property
+    def renderer(self) -> str:
+        return self._renderer
+
+    @property
+    def histogram_cache(self) -> Optional[HistogramCache]:
+        return self._histogram_cache
+
     @property
     def hist_type(self) -> str:
         return self._hist_type
@@ -431,6 +972,8 @@ class HistogramPlot:
     def y_label(self) -> str:
         if self.normed:
             y_label = f"{self.histogram_plot_type.value} in arb. units"
+        elif not self.histogram.is_uniform_binning:
+            y_label = f"{self.histogram_plot_type.value} / bin"
         else:
             y_label = "{e} / {bo}{b:.4g}{v}{bc}".format(
                 e=self.histogram_plot_type.value,
@@ -0,0 +1,218 @@
+from __future__ import annotations
+
+from typing import Any, List, Mapping, NamedTuple, Optional, Union
+
+import numpy as np
+
+from analysis_tools.plotting.plot_variables import HistVariable, create_bin_edges
+from analysis_tools.plotting.binning import CHUNK_SIZE, get_bin_indices, is_uniform_binning
+from analysis_tools.plotting.histogram import Histogram
+from analysis_tools.plotting.histogram_component import HistogramComponent
+from analysis_tools.plotting.histogram_plots import HistogramPlot
+from analysis_tools.utilities.lazy_import import LazyModule
+
+__all__ = [
+    "PlotBook",
+]
+
+pd = LazyModule("pandas")
+
+MaskType = Union["pd.Series", np.ndarray]
+
+
+class _Selection(NamedTuple):
+    component_type: str
+    labels: List[str]
+    codes: np.ndarray  # Index into labels for every row, -1 for rows not belonging to any of the labels
+    weighted: bool
+
+
+class PlotBook:
+    """
+    Fills the histograms of many HistVariables for all components from one DataFrame.
+
+    All variables and components are filled in a single chunked scan over the DataFrame:
+    every column is read once, its bin indices are computed once per chunk and shared
+    by all components, and the weight column and its square are computed once per chunk
+    and shared by all variables. The pre-filled histograms can then be drawn with
+    HistogramPlots via get_histogram_plot.
+    """
+
+    def __init__(
+        self,
+        df: pd.DataFrame,
+        variables: List[HistVariable],
+        components: Union[str, Mapping[str, MaskType]],
+        weights: Optional[str] = None,
+        signal_components: Optional[Mapping[str, MaskType]] = None,
+        data_components: Optional[Mapping[str, MaskType]] = None,
+        colors: Optional[Mapping[str, str]] = None,
+        chunk_size: int = CHUNK_SIZE,
+    ) -> None:
+        """
+        :param df: DataFrame holding all variables, the weight column and the label column.
+        :param variables: HistVariables to be filled.
+        :param components: Either the name of a label column, where each distinct value becomes
+                           one component, or a mapping of component labels to boolean masks.
+        :param weights: Name of the weight column used for components and signal components.
+        :param signal_components: Mapping of signal component labels to boolean masks.
+        :param data_components: Mapping of data component labels to boolean masks, these are unweighted.
+        :param colors: Optional mapping of component labels to colors.
+        :param chunk_size: Number of rows processed at once in the scan over the DataFrame.
+        """
+        self._df = df
+        self._variables = variables
+        self._weights = weights
+        self._colors = colors or {}
+        self._chunk_size = chunk_size
+
+        self._selections = self._get_selections(components, "component", weighted=True)  # type: List[_Selection]
+        if signal_components:
+            self._selections.extend(self._get_selections(signal_components, "signal", weighted=True))
+        if data_components:
+            self._selections.extend(self._get_selections(data_components, "data", weighted=False))
+
+        self._histograms = None  # type: Optional[List[Histogram]]
+
+    def _get_selections(
+        self,
+        components: Union[str, Mapping[str, MaskType]],
+        component_type: str,
+        weighted: bool,
+    ) -> List[_Selection]:
+        if isinstance(components, str):
+            codes, uniques = pd.factorize(self._df[components], sort=False)
+            return [
+                _Selection(
+                    component_type=component_type,
+                    labels=[str(label) for label in uniques],
+                    codes=np.asarray(codes),
+                    weighted=weighted,
+                )
+            ]
+
+        labels = list(components.keys())
+        masks = [np.asarray(mask, dtype=bool) for mask in components.values()]
+        if len(masks) > 1 and np.any(np.sum(masks, axis=0) > 1):
+            # Overlapping masks cannot be encoded in one code per row, so each of them is filled on its own.
+            return [
+                _Selection(
+                    component_type=component_type,
+                    labels=[label],
+                    codes=np.where(mask, 0, -1),
+                    weighted=weighted,
+                )
+                for label, mask in zip(labels, masks)
+            ]
+
+        codes = np.full(len(self._df), -1, dtype=np.intp)
+        for i, mask in enumerate(masks):
+            codes[mask] = i
+        return [_Selection(component_type=component_type, labels=labels, codes=codes, weighted=weighted)]
+
+    def _get_bin_edges(self, variable: HistVariable, in_any_selection: np.ndarray) -> np.ndarray:
+        variable_binning = variable.get_bin_edges()
+        if variable_binning is not None:
+            return variable_binning
+        selected = self._df[variable.df_label].to_numpy()[in_any_selection]
+        return create_bin_edges(
+            bins=variable.bins, scope=(np.min(selected), np.max(selected)), log_binning=variable.log_binning
+        )
+
+    def fill(self) -> None:
+        in_any_selection = np.any([selection.codes >= 0 for selection in self._selections], axis=0)
+        bin_edges = [self._get_bin_edges(variable, in_any_selection) for variable in self._variables]
+        uniform_binnings = [is_uniform_binning(edges=edges) for edges in bin_edges]
+        columns = [self._df[variable.df_label].to_numpy() for variable in self._variables]
+        weight_column = self._df[self._weights].to_numpy(dtype=float) if self._weights else None
+
+        # Accumulators per variable and selection with shape (3, number of labels, number of bins)
+        # holding the counts, sum of weights and sum of squared weights.
+        accumulators = [
+            [np.zeros((3, len(selection.labels), len(edges) - 1)) for selection in self._selections]
+            for edges in bin_edges
+        ]
+
+        for start in range(0, len(self._df), self._chunk_size):
+            stop = start + self._chunk_size
+            chunk_weights = weight_column[start:stop] if weight_column is not None else None
+            chunk_weights_squared = chunk_weights * chunk_weights if chunk_weights is not None else None
+
+            for column, edges, uniform, variable_accumulators in zip(columns, bin_edges, uniform_binnings, accumulators):
+                n_bins = len(edges) - 1
+                indices = get_bin_indices(values=column[start:stop], edges=edges, uniform=uniform)
+                for selection, accumulator in zip(self._selections, variable_accumulators):
+                    codes = selection.codes[start:stop]
+                    selected = (indices >= 0) & (codes >= 0)
+                    cells = codes[selected] * n_bins + indices[selected]
+                    n_cells = len(selection.labels) * n_bins
+
+                    accumulator[0] += np.bincount(cells, minlength=n_cells).reshape(-1, n_bins)
+                    if selection.weighted and chunk_weights is not None:
+                        assert chunk_weights_squared is not None
+                        accumulator[1] += np.bincount(cells, weights=chunk_weights[selected], minlength=n_cells).reshape(
+                            -1, n_bins
+                        )
+                        accumulator[2] += np.bincount(
+                            cells, weights=chunk_weights_squared[selected], minlength=n_cells
+                        ).reshape(-1, n_bins)
+
+        self._histograms = []
+        for variable, edges, variable_accumulators in zip(self._variables, bin_edges, accumulators):
+            histogram = Histogram(variable=variable)
+            for selection, accumulator in zip(self._selections, variable_accumulators):
+                for i, label in enumerate(selection.labels):
+                    weighted = selection.weighted and weight_column is not None
+                    hist_component = HistogramComponent.from_bin_contents(
+                        label=label,
+                        bin_edges=edges,
+                        counts=accumulator[0, i],
+                        sum_of_weights=accumulator[1, i] if weighted else accumulator[0, i],
+                        sum_of_weights_squared=accumulator[2, i] if weighted else accumulator[0, i],
+                        color=self._colors.get(label),
+                    )
+                    if selection.component_type == "component":
+                        histogram.add_component(hist_component=hist_component)
+                    elif selection.component_type == "signal":
+                        histogram.add_signal_component(hist_component=hist_component)
+                    else:
+                        histogram.add_data(hist_component=hist_component)
+            self._histograms.append(histogram)
+
+    def _get_variable_index(self, variable: Union[HistVariable, str]) -> int:
+        if isinstance(variable, HistVariable):
+            for i, book_variable in enumerate(self._variables):
+                if book_variable is variable:
+                    return i
+            raise ValueError(f"The HistVariable {variable.df_label} is not part of the PlotBook!")
+        indices = [i for i, book_variable in enumerate(self._variables) if book_variable.df_label == variable]
+        if len(indices) != 1:
+            raise ValueError(
+                f"Expected exactly one HistVariable for the column {variable}, found {len(indices)}! "
+                "Pass the HistVariable instead if there are several binnings of one column."
+            )
+        return indices[0]
+
+    def get_histogram(self, variable: Union[HistVariable, str]) -> Histogram:
+        """
+        :param variable: One of the HistVariables of the PlotBook, or its column name if that is unambiguous.
+        """
+        return self.histograms[self._get_variable_index(variable=variable)]
+
+    def get_histogram_plot(self, variable: Union[HistVariable, str], **kwargs: Any) -> HistogramPlot:
+        histogram = self.get_histogram(variable=variable)
+        return HistogramPlot(hist_var=histogram.variable, histogram=histogram, **kwargs)
+
+    @property
+    def variables(self) -> List[HistVariable]:
+        return self._variables
+
+    @property
+    def histograms(self) -> List[Histogram]:
+        """
+        Filled histograms in the order of the variables.
+        """
+        if self._histograms is None:
+            self.fill()
+        assert self._histograms is not None
+        return self._histograms
@@ -1,11 +1,16 @@
-import matplotlib.pyplot as plt
-import pandas as pd
+from __future__ import annotations
+
 import numpy as np
-from typing import Tuple, Optional
+from typing import TYPE_CHECKING, Tuple, Optional
 
 from analysis_tools.plotting.plot_variables import BinningVariable, HistVariable
 from analysis_tools.plotting.plotting_utils import AxesType, FigureType, set_matplotlibrc_params
 from analysis_tools.plotting.heatmap import Heatmap
+from analysis_tools.plotting.binning import BinContents, fill_2d, get_bin_edges_array
+from analysis_tools.utilities.lazy_import import LazyModule
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 __all__ = [
     "plot_2d_fractions",
@@ -13,6 +18,23 @@ __all__ = [
     "plot_scatter",
 ]
 
+plt = LazyModule("matplotlib.pyplot")
+
+
+def _fill_2d_from_data_frame(
+    df: pd.DataFrame,
+    binning_variables: Tuple[BinningVariable, BinningVariable],
+    weight_column: Optional[str] = None,
+) -> BinContents:
+    binning_var_1, binning_var_2 = binning_variables
+    return fill_2d(
+        x=df[binning_var_1.df_label].to_numpy(),
+        y=df[binning_var_2.df_label].to_numpy(),
+        edges_x=get_bin_edges_array(binning_variable=binning_var_1),
+        edges_y=get_bin_edges_array(binning_variable=binning_var_2),
+        weights=df[weight_column].to_numpy() if weight_column else None,
+    )
+
 
 def plot_2d_fractions(
     df: pd.DataFrame,
@@ -24,33 +46,18 @@ def plot_2d_fractions(
     round_numbers: int = 2,
 ) -> Tuple[FigureType, AxesType]:
     binning_var_1, binning_var_2 = binning_variables
-    fractions = np.full(
-        (binning_var_1.bins, binning_var_2.bins),
-        fill_value=np.nan,
+    bin_contents = _fill_2d_from_data_frame(
+        df=df,
+        binning_variables=binning_variables,
+        weight_column=weight_column,
     )
-
-    for i, first_limits in enumerate(binning_var_1.get_bin_edges()):
-        first_lower, first_upper = first_limits
-        for j, second_limits in enumerate(binning_var_2.get_bin_edges()):
-            sec_lower, sec_upper = second_limits
-            first_lower_cond = df[binning_var_1.df_label] >= first_lower
-            first_upper_cond = df[binning_var_1.df_label] < first_upper
-            if i == len(binning_var_1.get_bin_edges()) - 1:
-                first_upper_cond = df[binning_var_1.df_label] <= first_upper
-            sec_lower_cond = df[binning_var_2.df_label] >= sec_lower
-            sec_upper_cond = df[binning_var_2.df_label] < sec_upper
-            if j == len(binning_var_2.get_bin_edges()) - 1:
-                sec_upper_cond = df[binning_var_2.df_label] <= sec_upper
-
-            df_bin = df.loc[first_lower_cond & first_upper_cond & sec_lower_cond & sec_upper_cond]
-            if len(df) > 0:
-                if not weight_column:
-                    fraction = len(df_bin) / len(df)
-                else:
-                    fraction = np.sum(df_bin[weight_column]) / np.sum(df[weight_column])
-            else:
-                fraction = 0
-            fractions[i][j] = fraction
+    if len(df) > 0:
+        if not weight_column:
+            fractions = bin_contents.counts / len(df)
+        else:
+            fractions = bin_contents.sum_of_weights / np.sum(df[weight_column])
+    else:
+        fractions = np.zeros_like(bin_contents.counts)
 
     hp = Heatmap(
         variables=(binning_var_1, binning_var_2),
@@ -76,33 +83,15 @@ def plot_2d_numbers(
     weight_column: Optional[str] = None,
 ) -> Tuple[FigureType, AxesType]:
     binning_var_1, binning_var_2 = binning_variables
-    numbers = np.full(
-        (binning_var_1.bins, binning_var_2.bins),
-        fill_value=np.nan,
+    bin_contents = _fill_2d_from_data_frame(
+        df=df,
+        binning_variables=binning_variables,
+        weight_column=weight_column,
     )
-
-    for i, first_limits in enumerate(binning_var_1.get_bin_edges()):
-        first_lower, first_upper = first_limits
-        for j, second_limits in enumerate(binning_var_2.get_bin_edges()):
-            sec_lower, sec_upper = second_limits
-            first_lower_cond = df[binning_var_1.df_label] >= first_lower
-            first_upper_cond = df[binning_var_1.df_label] < first_upper
-            if i == len(binning_var_1.get_bin_edges()) - 1:
-                first_upper_cond = df[binning_var_1.df_label] <= first_upper
-            sec_lower_cond = df[binning_var_2.df_label] >= sec_lower
-            sec_upper_cond = df[binning_var_2.df_label] < sec_upper
-            if j == len(binning_var_2.get_bin_edges()) - 1:
-                sec_upper_cond = df[binning_var_2.df_label] <= sec_upper
-
-            df_bin = df.loc[first_lower_cond & first_upper_cond & sec_lower_cond & sec_upper_cond]
-            if len(df) > 0:
-                if not weight_column:
-                    number = len(df_bin)
-                else:
-                    number = np.sum(df_bin[weight_column])
-            else:
-                number = 0
-            numbers[i][j] = number
+    if not weight_column:
+        numbers = bin_contents.counts
+    else:
+        numbers = bin_contents.sum_of_weights
 
     hp = Heatmap(
         variables=(binning_var_1, binning_var_2),
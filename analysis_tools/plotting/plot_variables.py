@@ -1,13 +1,50 @@
-from typing import NamedTuple, Tuple, Optional, List, Union
+from typing import NamedTuple, Tuple, Optional, Sequence, Union
 
+import numpy as np
 
 __all__ = [
     "PlotVariable",
     "HistVariable",
     "BinningVariable",
+    "create_bin_edges",
+    "create_bin_mids",
+    "check_bin_edges",
 ]
 
 
+def create_bin_edges(bins: int, scope: Tuple[float, float], log_binning: bool = False) -> np.ndarray:
+    """
+    Creates equally wide bins within the scope, or bins which are equally wide in log10(x) for log_binning.
+    """
+    lower, upper = scope
+    if log_binning:
+        if lower <= 0:
+            raise ValueError(f"A log binning requires a positive lower bound, got the scope {scope}!")
+        return np.geomspace(lower, upper, bins + 1)
+    return np.linspace(lower, upper, bins + 1)
+
+
+def create_bin_mids(edges: np.ndarray, log_binning: bool = False) -> np.ndarray:
+    """
+    Arithmetic bin mids, or geometric bin mids for log_binning, which appear centered on a logarithmic axis.
+    """
+    if log_binning:
+        return np.sqrt(edges[:-1] * edges[1:])
+    return (edges[:-1] + edges[1:]) / 2
+
+
+def _read_only(array: np.ndarray) -> np.ndarray:
+    array.flags.writeable = False
+    return array
+
+
+def check_bin_edges(bin_edges: Sequence[float]) -> np.ndarray:
+    edges = np.array(bin_edges, dtype=float)
+    if edges.ndim != 1 or len(edges) < 2 or np.any(np.diff(edges) <= 0):
+        raise ValueError(f"Bin edges must be a strictly increasing sequence of at least two values, got {bin_edges}!")
+    return edges
+
+
 class PlotVariable(NamedTuple):
     df_label: str
     label: str
@@ -23,16 +60,35 @@ class HistVariable:
         df_label: str,
         label: str,
         unit: Optional[str] = None,
-        bins: int = 10,
+        bins: Union[int, Sequence[float]] = 10,
         scope: Optional[Tuple[float, float]] = None,
         x_scale_log: bool = False,
+        log_binning: bool = False,
     ) -> None:
+        """
+        :param bins: Number of bins or a sequence of explicit bin edges, which also define the scope if none is given.
+        :param scope: Range of the histogram. Without scope and explicit edges, the binning is taken from the data.
+        :param x_scale_log: Whether the x axis is drawn with a logarithmic scale.
+        :param log_binning: Whether the bins are equally wide in log10(x) instead of x.
+        """
         self._df_label = df_label
         self._label = label
         self._unit = unit
-        self._bins = bins
+        self._explicit_bin_edges = None  # type: Optional[np.ndarray]
+        if isinstance(bins, (int, np.integer)):
+            self._bins = int(bins)
+        else:
+            self._explicit_bin_edges = check_bin_edges(bin_edges=bins)
+            self._explicit_bin_edges.flags.writeable = False
+            self._bins = len(self._explicit_bin_edges) - 1
+            if scope is None:
+                scope = (float(self._explicit_bin_edges[0]), float(self._explicit_bin_edges[-1]))
         self._scope = scope
         self._x_scale_log = x_scale_log
+        self._log_binning = log_binning
+        self._bin_edges = self._explicit_bin_edges  # type: Optional[np.ndarray]
+        self._bin_mids = None  # type: Optional[np.ndarray]
+        self._bin_widths = None  # type: Optional[np.ndarray]
 
     @property
     def x_label(self):
@@ -62,6 +118,39 @@ class HistVariable:
     def x_scale_log(self) -> bool:
         return self._x_scale_log
 
+    @property
+    def log_binning(self) -> bool:
+        return self._log_binning
+
+    @property
+    def has_explicit_bin_edges(self) -> bool:
+        return self._explicit_bin_edges is not None
+
+    def get_bin_edges(self) -> Optional[np.ndarray]:
+        """
+        Read-only bin edges defined by the variable, None if the binning has to be derived from the data.
+        The bin geometry is computed once and shared by all callers.
+        """
+        if self._bin_edges is None and self.scope is not None:
+            self._bin_edges = _read_only(create_bin_edges(bins=self.bins, scope=self.scope, log_binning=self.log_binning))
+        return self._bin_edges
+
+    def get_bin_mids(self) -> Optional[np.ndarray]:
+        if self._bin_mids is None:
+            bin_edges = self.get_bin_edges()
+            if bin_edges is None:
+                return None
+            self._bin_mids = _read_only(create_bin_mids(edges=bin_edges, log_binning=self.log_binning))
+        return self._bin_mids
+
+    def get_bin_widths(self) -> Optional[np.ndarray]:
+        if self._bin_widths is None:
+            bin_edges = self.get_bin_edges()
+            if bin_edges is None:
+                return None
+            self._bin_widths = _read_only(np.diff(bin_edges))
+        return self._bin_widths
+
 
 class BinningVariable:
     def __init__(
@@ -72,6 +161,7 @@ class BinningVariable:
         scope: Tuple[float, float] = None,
         unit: Optional[str] = None,
         bin_mids: bool = False,
+        log_binning: bool = False,
     ) -> None:
         self._df_label = df_label
         self._label = label
@@ -79,47 +169,54 @@ class BinningVariable:
         self._binning = binning
         self._unit = unit
         self._bin_mids = bin_mids
+        self._log_binning = log_binning
+        self._edges = None  # type: Optional[np.ndarray]
+        self._edge_pairs = None  # type: Optional[np.ndarray]
+        self._mids = None  # type: Optional[np.ndarray]
+        self._widths = None  # type: Optional[np.ndarray]
 
-    def get_bin_edges(self) -> Tuple[Tuple[float, float], ...]:
-        bin_edges = []  # type: List[Tuple[float, float]]
-        if isinstance(self.binning, tuple):
-            if self.bin_mids is False:
-                for i in range(len(self.binning) - 1):
-                    assert self.binning[i] < self.binning[i + 1], (self.binning[i], self.binning[i + 1])
-                    bin_edges.append((self.binning[i], self.binning[i + 1]))
-                assert len(bin_edges) == len(self.binning) - 1
+    def get_bin_edges_array(self) -> np.ndarray:
+        """
+        Read-only array of the bins + 1 bin edges. Like all bin geometry, it is computed once
+        and only recomputed if the scope is changed.
+        """
+        if self._edges is None:
+            if isinstance(self.binning, tuple):
+                if self.bin_mids is not False:
+                    raise ValueError(f"The binning of {self.label} is given by bin mids and has no bin edges!")
+                edges = check_bin_edges(bin_edges=self.binning)
             else:
-                raise ValueError
-        else:
-            assert self.scope is not None
-            assert isinstance(self.binning, int)
-            lower_bound, upper_bound = self.scope
-            step = (upper_bound - lower_bound) / self.bins
-            for i in range(self.bins):
-                low = i * step + lower_bound
-                up = (i + 1) * step + lower_bound
-                bin_edges.append((low, up))
-
-            assert len(bin_edges) == self.bins, (len(bin_edges), self.bins)
-        return tuple(bin_edges)
-
-    def get_upper_limits(self) -> Tuple[float, ...]:
-        return tuple([x for _, x in self.get_bin_edges()])
-
-    def get_bin_mids(self) -> Tuple[float, ...]:
-        if isinstance(self.binning, int):
-            assert self.scope is not None
-            low, up = self.scope
-            step = (up - low) / self.bins
-            bin_mids = [low + (i + 1 / 2) * step for i in range(self.bins)]
-            return tuple(bin_mids)
-        else:
-            if self.bin_mids is False:
-                bin_mids = [(up - lw) / 2 + lw for lw, up in self.get_bin_edges()]
-                return tuple(bin_mids)
+                assert self.scope is not None
+                edges = create_bin_edges(bins=self.bins, scope=self.scope, log_binning=self.log_binning)
+            self._edges = _read_only(edges)
+        return self._edges
+
+    def get_bin_edges(self) -> np.ndarray:
+        """
+        Read-only view of shape (bins, 2) with the lower and upper edge of every bin.
+        """
+        if self._edge_pairs is None:
+            self._edge_pairs = np.lib.stride_tricks.sliding_window_view(self.get_bin_edges_array(), 2)
+        return self._edge_pairs
+
+    def get_bin_widths(self) -> np.ndarray:
+        if self._widths is None:
+            self._widths = _read_only(np.diff(self.get_bin_edges_array()))
+        return self._widths
+
+    def get_upper_limits(self) -> np.ndarray:
+        return self.get_bin_edges_array()[1:]
+
+    def get_bin_mids(self) -> np.ndarray:
+        if self._mids is None:
+            if isinstance(self.binning, tuple) and self.bin_mids is not False:
+                mids = np.array(self.binning, dtype=float)
             else:
-                assert isinstance(self.binning, tuple)
-                return self.binning
+                mids = create_bin_mids(
+                    edges=self.get_bin_edges_array(), log_binning=self.log_binning and isinstance(self.binning, int)
+                )
+            self._mids = _read_only(mids)
+        return self._mids
 
     def get_label_for_bin(self, bin_edges: Tuple[float, float]) -> str:
         lower_limit, upper_limit = bin_edges
@@ -130,12 +227,14 @@ class BinningVariable:
 
     @staticmethod
     def from_hist_variable(hist_variable: HistVariable) -> "BinningVariable":
+        explicit_bin_edges = hist_variable.get_bin_edges() if hist_variable.has_explicit_bin_edges else None
         return BinningVariable(
             df_label=hist_variable.df_label,
             label=hist_variable.label,
-            binning=hist_variable.bins,
+            binning=hist_variable.bins if explicit_bin_edges is None else tuple(explicit_bin_edges.tolist()),
             scope=hist_variable.scope,
             unit=hist_variable.unit,
+            log_binning=hist_variable.log_binning,
         )
 
     @property
@@ -169,6 +268,10 @@ class BinningVariable:
 
     def set_scope(self, scope: Tuple[float, float]) -> None:
         self._scope = scope
+        self._edges = None
+        self._edge_pairs = None
+        self._mids = None
+        self._widths = None
 
     @property
     def binning(self) -> Union[int, Tuple[float, ...]]:
@@ -181,3 +284,7 @@ class BinningVariable:
     @property
     def bin_mids(self) -> bool:
         return self._bin_mids
+
+    @property
+    def log_binning(self) -> bool:
+        return self._log_binning
@@ -1,11 +1,15 @@
+from __future__ import annotations
+
 import os
-from typing import List, Tuple, Union, Type
+from typing import TYPE_CHECKING, List, Tuple, Union, Type
 from cycler import cycler
-import matplotlib.pyplot as plt
-import matplotlib.axes._axes as axes
-from matplotlib import figure
 
 from analysis_tools.utilities.base_utils import PathType
+from analysis_tools.utilities.lazy_import import LazyModule
+
+if TYPE_CHECKING:
+    from matplotlib.axes import Axes
+    from matplotlib.figure import Figure
 
 __all__ = [
     "Unit",
@@ -16,6 +20,9 @@ __all__ = [
     "export",
 ]
 
+# matplotlib.pyplot is only imported once a plot is actually created.
+plt = LazyModule("matplotlib.pyplot")
+
 
 class Unit:
     energy = r"$\mathrm{GeV}$"  # type: str
@@ -112,12 +119,12 @@ def set_matplotlibrc_params() -> None:
     )
 
 
-AxesType = Union[axes.Axes, Type[axes.Axes]]
-FigureType = Union[figure.Figure, Type[figure.Figure]]
+AxesType = Union["Axes", Type["Axes"]]
+FigureType = Union["Figure", Type["Figure"]]
 
 
 def export(
-    fig: plt.Figure,
+    fig: Figure,
     filename: PathType,
     target_dir: PathType = "plots/",
     file_formats: Tuple[str, ...] = (".pdf", ".png"),
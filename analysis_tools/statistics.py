@@ -1,31 +1,138 @@
-from typing import Union, Tuple, Optional
+import hashlib
+from pathlib import Path
+from typing import Dict, NamedTuple, Union, Tuple, Optional
 
-# import gammapy.stats as gstats
-# import numpy as np
-# import scipy.stats
-# import scipy.special
-import ROOT as root
+import numpy as np
+
+from analysis_tools.utilities.base_utils import PathType
+from analysis_tools.utilities.cache_utils import get_default_cache_dir, load_npz, save_npz_atomically
+from analysis_tools.utilities.lazy_import import LazyModule
+
+# Heavy backends are only imported on first use, PyROOT in particular adds seconds to the start-up time.
+special = LazyModule("scipy.special")
+root = LazyModule("ROOT", error_message="The 'root' engine requires PyROOT, use engine='numpy' instead!")
 
 __all__ = [
+    "bayes_efficiency",
     "bayes_divide",
-    # "get_fc_upper_limit",
+    "poisson_errors",
+    "FeldmanCousinsBelt",
+    "get_mu_grid",
+    "construct_fc_belt",
+    "get_fc_belt",
+    "get_fc_upper_limits",
+    "get_fc_upper_limit",
 ]
 
+# Number of golden section steps used to find the shortest interval, shrinking the search interval by 0.618**60.
+_GOLDEN_SECTION_STEPS = 60
+
+# Part of the cache key of the Feldman-Cousins belts, to be increased whenever the belt construction changes.
+_FC_BELT_VERSION = 1
+
+_fc_belt_cache = {}  # type: Dict[str, FeldmanCousinsBelt]
+
+
+def _beta_shortest_interval(a: np.ndarray, b: np.ndarray, cl: float) -> Tuple[np.ndarray, np.ndarray]:
+    # The shortest interval [q(p), q(p + cl)] of a unimodal Beta(a, b) distribution is found by minimizing
+    # its length as function of the lower tail probability p in [0, 1 - cl] with a vectorized golden section search.
+    inverse_golden_ratio = (np.sqrt(5.0) - 1.0) / 2.0
+
+    def length(p: np.ndarray) -> np.ndarray:
+        return special.betaincinv(a, b, np.minimum(p + cl, 1.0)) - special.betaincinv(a, b, p)
+
+    low = np.zeros_like(a)
+    high = np.full_like(a, 1.0 - cl)
+    x_1 = high - inverse_golden_ratio * (high - low)
+    x_2 = low + inverse_golden_ratio * (high - low)
+    length_1 = length(x_1)
+    length_2 = length(x_2)
+    for _ in range(_GOLDEN_SECTION_STEPS):
+        first_is_shorter = length_1 < length_2
+        high = np.where(first_is_shorter, x_2, high)
+        low = np.where(first_is_shorter, low, x_1)
+        new_x_1 = np.where(first_is_shorter, high - inverse_golden_ratio * (high - low), x_2)
+        new_x_2 = np.where(first_is_shorter, x_1, low + inverse_golden_ratio * (high - low))
+        new_length = length(np.where(first_is_shorter, new_x_1, new_x_2))
+        length_1, length_2 = np.where(first_is_shorter, new_length, length_2), np.where(
+            first_is_shorter, length_1, new_length
+        )
+        x_1, x_2 = new_x_1, new_x_2
+
+    p = (low + high) / 2.0
+    return special.betaincinv(a, b, p), special.betaincinv(a, b, np.minimum(p + cl, 1.0))
+
+
+def bayes_efficiency(
+    total: Union[np.ndarray, float],
+    selected: Union[np.ndarray, float],
+    cl: float = 0.683,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Bayesian efficiency with a flat Beta(1, 1) prior, the mode of the posterior as estimate and the
+    shortest interval with the given credibility level, identical to ROOT's
+    TGraphAsymmErrors::Divide with the option "cl=<cl> b(1,1) mode", but vectorized and without ROOT.
+
+    :param total: Array of total numbers of events.
+    :param selected: Array of numbers of selected events.
+    :param cl: Credibility level of the interval.
+    :return: Arrays of efficiencies, lower errors and upper errors. For total == 0 the efficiency is 0
+             and the errors are NaN, for selected > total all entries are NaN.
+    """
+    total, selected = np.broadcast_arrays(np.asarray(total, dtype=float), np.asarray(selected, dtype=float))
+    valid = (total > 0) & (selected >= 0) & (selected <= total)
+
+    efficiency = np.full(total.shape, np.nan)
+    lower = np.full(total.shape, np.nan)
+    upper = np.full(total.shape, np.nan)
+    efficiency[total == 0] = 0.0
+    efficiency[valid] = selected[valid] / total[valid]
+
+    a = selected + 1.0
+    b = total - selected + 1.0
+
+    # Posterior mode at 0 or 1: the shortest interval is one-sided
+    none_selected = valid & (selected == 0)
+    lower[none_selected] = 0.0
+    upper[none_selected] = special.betaincinv(a[none_selected], b[none_selected], cl)
+    all_selected = valid & (selected == total)
+    lower[all_selected] = special.betaincinv(a[all_selected], b[all_selected], 1.0 - cl)
+    upper[all_selected] = 1.0
+
+    two_sided = valid & ~none_selected & ~all_selected
+    lower[two_sided], upper[two_sided] = _beta_shortest_interval(a=a[two_sided], b=b[two_sided], cl=cl)
+
+    return efficiency, efficiency - lower, upper - efficiency
+
 
 def bayes_divide(
     a: Union[float, int],
     b: Union[float, int],
     cl: float = 0.683,
+    engine: str = "numpy",
 ) -> Tuple[Optional[float], Optional[float], Optional[float]]:
-    hall = root.TH1D("hall", "hall", 1, 0, 1)
-    hsel = root.TH1D("hsel", "hsel", 1, 0, 1)
+    """
+    Efficiency b / a with Bayesian errors, see bayes_efficiency.
 
+    :param engine: "numpy" (default) computes the interval without ROOT, "root" uses TGraphAsymmErrors::Divide
+                   and imports PyROOT on the first call, raising an ImportError if it is not installed.
+    """
     if b > a:
         return None, None, None
 
     if a == 0:
         return 0, None, None
 
+    if engine == "numpy":
+        _, error_low, error_high = bayes_efficiency(total=a, selected=b, cl=cl)
+        return b / a, float(error_low), float(error_high)
+
+    if engine != "root":
+        raise ValueError(f"Unknown engine {engine}, use 'numpy' or 'root'!")
+
+    hall = root.TH1D("hall", "hall", 1, 0, 1)
+    hsel = root.TH1D("hsel", "hsel", 1, 0, 1)
+
     hall.SetBinContent(1, a)
     hsel.SetBinContent(1, b)
 
@@ -35,17 +142,202 @@ def bayes_divide(
     return b / a, g.GetErrorYlow(0), g.GetErrorYhigh(0)
 
 
-# def get_fc_upper_limit(
-#    n_background: float,
-#    n_observed: float,
-#    cl: float = 0.9,
-# ) -> float:
-#    x_bins = np.arange(0, 50)
-#    mu_bins = np.linspace(0, 15, int(15 / 0.005) + 1, endpoint=True)
-#    matrix = [scipy.stats.poisson(mu + n_background).pmf(x_bins) for mu in mu_bins]
-#
-#    acceptance_intervals = gstats.fc_construct_acceptance_intervals_pdfs(matrix, cl)
-#    lower_limit_num, upper_limit_num, _ = gstats.fc_get_limits(mu_bins, x_bins, acceptance_intervals)
-#
-#    upper_limit = gstats.fc_find_limit(n_observed, upper_limit_num, mu_bins)
-#    return upper_limit
+def poisson_errors(n: Union[np.ndarray, float], cl: float = 0.683) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Asymmetric errors of observed numbers of events from the central Garwood confidence interval of a Poisson mean,
+    [chi2(alpha / 2; 2n) / 2, chi2(1 - alpha / 2; 2n + 2) / 2] with alpha = 1 - cl, computed for all n at once
+    with the inverse regularized incomplete gamma function.
+
+    :param n: Array of observed numbers of events.
+    :param cl: Confidence level of the interval.
+    :return: Arrays of lower and upper errors. For n == 0 the lower error is 0, for n < 0 both errors are NaN.
+    """
+    n = np.asarray(n, dtype=float)
+    alpha = 1.0 - cl
+    valid = n >= 0
+    lower = np.where(n > 0, special.gammaincinv(np.where(n > 0, n, 1.0), alpha / 2.0), 0.0)
+    upper = special.gammaincinv(np.where(valid, n, 0.0) + 1.0, 1.0 - alpha / 2.0)
+    return np.where(valid, n - lower, np.nan), np.where(valid, upper - n, np.nan)
+
+
+class FeldmanCousinsBelt(NamedTuple):
+    """
+    Feldman-Cousins confidence belt for a Poisson process with known background: for every signal mean
+    mu_grid[i] the observed numbers of events n_low[i] <= n <= n_high[i] are in the acceptance interval.
+    """
+
+    background: float
+    cl: float
+    mu_grid: np.ndarray
+    n_low: np.ndarray
+    n_high: np.ndarray
+
+    def get_upper_limits(self, n_observed: Union[np.ndarray, int]) -> np.ndarray:
+        """
+        Upper limits for the observed numbers of events, NaN if the limit is not covered by the mu grid.
+        """
+        n_observed = _check_n_observed(n_observed=n_observed)
+        # The upper limit is the largest mu whose acceptance interval contains n. The suffix minimum of n_low is
+        # non-decreasing, such that this mu can be found with a binary search even if n_low is not monotonic.
+        suffix_minimum = np.minimum.accumulate(self.n_low[::-1])[::-1]
+        index = np.searchsorted(suffix_minimum, n_observed, side="right") - 1
+        upper_limits = self.mu_grid[np.maximum(index, 0)]
+        return np.where((index < 0) | (index == len(self.mu_grid) - 1), np.nan, upper_limits)
+
+
+def _check_n_observed(n_observed: Union[np.ndarray, int]) -> np.ndarray:
+    n_observed = np.asarray(n_observed, dtype=float)
+    if np.any(n_observed < 0) or np.any(n_observed != np.round(n_observed)):
+        raise ValueError("The observed numbers of events must be non-negative integers!")
+    return n_observed
+
+
+def get_mu_grid(mu_max: float = 15.0, mu_step: float = 0.005) -> np.ndarray:
+    return np.linspace(0.0, mu_max, int(round(mu_max / mu_step)) + 1, endpoint=True)
+
+
+def construct_fc_belt(
+    n_background: float,
+    cl: float = 0.9,
+    mu_grid: Optional[np.ndarray] = None,
+) -> FeldmanCousinsBelt:
+    """
+    Constructs the Feldman-Cousins confidence belt with the likelihood ratio ordering for all signal means
+    of the mu grid at once. Like gammapy.stats, no ad-hoc adjustments are made to the plain construction.
+
+    :param n_background: Expected number of background events.
+    :param cl: Confidence level of the belt.
+    :param mu_grid: Increasing grid of signal means, defaults to get_mu_grid().
+    :return: FeldmanCousinsBelt
+    """
+    mu_grid = get_mu_grid() if mu_grid is None else np.asarray(mu_grid, dtype=float)
+    if n_background < 0 or not 0 < cl < 1:
+        raise ValueError(f"Invalid background {n_background} or confidence level {cl}!")
+
+    # The n range covers the Poisson distribution of the largest mean far beyond the confidence level.
+    largest_mean = mu_grid[-1] + n_background
+    n = np.arange(int(np.ceil(largest_mean + 10.0 * np.sqrt(largest_mean) + 10.0)) + 1, dtype=float)
+
+    means = mu_grid[:, np.newaxis] + n_background
+    log_pmf = special.xlogy(n, means) - means - special.gammaln(n + 1.0)
+    best_means = np.maximum(n, n_background)
+    log_best_pmf = special.xlogy(n, best_means) - best_means - special.gammaln(n + 1.0)
+
+    # Accept n in the order of decreasing likelihood ratio P(n | mu + b) / P(n | mu_best + b) until cl is reached.
+    order = np.argsort(log_best_pmf - log_pmf, axis=1, kind="stable")
+    sorted_pmf = np.take_along_axis(np.exp(log_pmf), order, axis=1)
+    sorted_accepted = np.cumsum(sorted_pmf, axis=1) - sorted_pmf < cl
+    accepted = np.zeros_like(sorted_accepted)
+    np.put_along_axis(accepted, order, sorted_accepted, axis=1)
+
+    n_low = np.argmax(accepted, axis=1)
+    n_high = len(n) - 1 - np.argmax(accepted[:, ::-1], axis=1)
+    return FeldmanCousinsBelt(
+        background=float(n_background),
+        cl=cl,
+        mu_grid=mu_grid,
+        n_low=n_low,
+        n_high=n_high,
+    )
+
+
+def _get_cache_file(cache_dir: PathType, n_background: float, cl: float, mu_grid: np.ndarray) -> Path:
+    key = hashlib.sha1(np.array([_FC_BELT_VERSION, n_background, cl], dtype=float).tobytes())
+    key.update(np.ascontiguousarray(mu_grid, dtype=float).tobytes())
+    return Path(cache_dir) / f"fc_belt_{key.hexdigest()}.npz"
+
+
+def get_fc_belt(
+    n_background: float,
+    cl: float = 0.9,
+    mu_grid: Optional[np.ndarray] = None,
+    cache_dir: Optional[PathType] = None,
+    use_disk_cache: bool = True,
+) -> FeldmanCousinsBelt:
+    """
+    Returns the Feldman-Cousins belt for the given background, confidence level and mu grid. Belts are
+    cached in memory and on disk, such that a belt is only constructed once.
+
+    :param cache_dir: Directory of the disk cache, defaults to $XDG_CACHE_HOME/analysis_tools/fc_belts.
+    :param use_disk_cache: Whether belts are read from and written to the disk cache.
+    """
+    mu_grid = get_mu_grid() if mu_grid is None else np.asarray(mu_grid, dtype=float)
+    cache_file = _get_cache_file(
+        cache_dir=get_default_cache_dir(name="fc_belts") if cache_dir is None else cache_dir,
+        n_background=float(n_background),
+        cl=cl,
+        mu_grid=mu_grid,
+    )
+
+    if cache_file.name in _fc_belt_cache:
+        return _fc_belt_cache[cache_file.name]
+
+    # Unreadable belt files are removed by load_npz, the belt is then constructed and written again.
+    belt_arrays = load_npz(path=cache_file, keys=("n_low", "n_high")) if use_disk_cache else None
+    if belt_arrays is not None:
+        belt = FeldmanCousinsBelt(
+            background=float(n_background),
+            cl=cl,
+            mu_grid=mu_grid,
+            n_low=belt_arrays["n_low"],
+            n_high=belt_arrays["n_high"],
+        )
+    else:
+        belt = construct_fc_belt(n_background=n_background, cl=cl, mu_grid=mu_grid)
+        if use_disk_cache:
+            save_npz_atomically(path=cache_file, n_low=belt.n_low, n_high=belt.n_high)
+
+    _fc_belt_cache[cache_file.name] = belt
+    return belt
+
+
+def get_fc_upper_limits(
+    n_background: Union[np.ndarray, float],
+    n_observed: Union[np.ndarray, int],
+    cl: float = 0.9,
+    mu_grid: Optional[np.ndarray] = None,
+    cache_dir: Optional[PathType] = None,
+    use_disk_cache: bool = True,
+) -> np.ndarray:
+    """
+    Feldman-Cousins upper limits on the signal mean for arrays of expected backgrounds and observed numbers
+    of events. One belt is needed per distinct background, see get_fc_belt.
+
+    :return: Array of upper limits, NaN where the limit exceeds the mu grid.
+    """
+    n_background, n_observed = np.broadcast_arrays(
+        np.asarray(n_background, dtype=float), _check_n_observed(n_observed=n_observed)
+    )
+    upper_limits = np.full(n_background.shape, np.nan)
+    backgrounds, inverse = np.unique(n_background, return_inverse=True)
+    inverse = inverse.reshape(n_background.shape)
+    for i, background in enumerate(backgrounds):
+        belt = get_fc_belt(
+            n_background=background,
+            cl=cl,
+            mu_grid=mu_grid,
+            cache_dir=cache_dir,
+            use_disk_cache=use_disk_cache,
+        )
+        mask = inverse == i
+        upper_limits[mask] = belt.get_upper_limits(n_observed=n_observed[mask])
+    return upper_limits
+
+
+def get_fc_upper_limit(
+    n_background: float,
+    n_observed: int,
+    cl: float = 0.9,
+    mu_grid: Optional[np.ndarray] = None,
+    cache_dir: Optional[PathType] = None,
+    use_disk_cache: bool = True,
+) -> float:
+    upper_limits = get_fc_upper_limits(
+        n_background=n_background,
+        n_observed=n_observed,
+        cl=cl,
+        mu_grid=mu_grid,
+        cache_dir=cache_dir,
+        use_disk_cache=use_disk_cache,
+    )
+    return float(upper_limits)
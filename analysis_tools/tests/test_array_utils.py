@@ -0,0 +1,59 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from analysis_tools.utilities.array_utils import as_read_only_array
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+
+class ArrayUtilsTests(unittest.TestCase):
+    def test_data_frame_column_is_a_read_only_view(self):
+        df = pd.DataFrame({"x": np.arange(10, dtype=float), "y": np.ones(10)})
+        array = as_read_only_array(values=df, column="x", strict=True)
+        self.assertFalse(array.flags.writeable)
+        self.assertTrue(np.shares_memory(array, df["x"].to_numpy(copy=False)))
+        self.assertTrue(np.array_equal(array, np.arange(10)))
+
+    def test_numpy_array_is_not_copied(self):
+        values = np.arange(5.0)
+        array = as_read_only_array(values=values, strict=True)
+        self.assertTrue(np.shares_memory(array, values))
+        self.assertFalse(array.flags.writeable)
+        self.assertTrue(values.flags.writeable)
+
+    def test_npy_file_is_memory_mapped(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            file_name = os.path.join(tmp_dir, "x.npy")
+            np.save(file_name, np.arange(7.0))
+            array = as_read_only_array(values=file_name, strict=True)
+            self.assertIsInstance(array, np.memmap)
+            self.assertTrue(np.array_equal(array, np.arange(7.0)))
+            del array
+
+    def test_strict_mode_raises_if_copy_is_required(self):
+        with self.assertRaises(ValueError):
+            as_read_only_array(values=[1.0, 2.0], strict=True)
+        with self.assertRaises(ValueError):
+            as_read_only_array(values=pd.Series([1, None], dtype="Int64"), strict=True)
+        self.assertTrue(np.array_equal(as_read_only_array(values=[1.0, 2.0]), [1.0, 2.0]))
+
+    @unittest.skipIf(pa is None, "pyarrow is not installed")
+    def test_pyarrow_buffers(self):
+        table = pa.table({"x": pa.array(np.arange(4.0))})
+        array = as_read_only_array(values=table, column="x", strict=True)
+        self.assertTrue(np.array_equal(array, np.arange(4.0)))
+        with self.assertRaises(ValueError):
+            as_read_only_array(values=pa.chunked_array([[1.0], [2.0]]), strict=True)
+        with self.assertRaises(ValueError):
+            as_read_only_array(values=pa.array([1.0, None]), strict=True)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from analysis_tools.plotting.batch_rendering import (
+    ComponentSpecification,
+    PlotSpecification,
+    render_histogram_plots,
+)
+from analysis_tools.plotting.plot_variables import HistVariable
+
+
+class BatchRenderingTests(unittest.TestCase):
+    def test_failures_are_reported_without_stopping_the_batch(self):
+        rng = np.random.default_rng(11)
+        df = pd.DataFrame(
+            {
+                "x": rng.normal(size=2000),
+                "y": rng.exponential(size=2000),
+                "w": rng.uniform(size=2000),
+                "is_signal": rng.uniform(size=2000) > 0.8,
+            }
+        )
+        components = (
+            ComponentSpecification(label="bkg", weights="w"),
+            ComponentSpecification(label="sig", component_type="signal", selection="is_signal"),
+            ComponentSpecification(label="data", component_type="data"),
+        )
+        specifications = [
+            PlotSpecification(
+                hist_var=HistVariable(df_label="x", label="x", bins=20, scope=(-3.0, 3.0)),
+                components=components,
+                filename="x",
+            ),
+            PlotSpecification(
+                hist_var=HistVariable(df_label="missing", label="missing", bins=20, scope=(0.0, 1.0)),
+                components=components,
+                filename="missing",
+            ),
+            PlotSpecification(
+                hist_var=HistVariable(df_label="y", label="y", bins=20, scope=(0.0, 5.0)),
+                components=components,
+                filename="y",
+                plot_kwargs={"add_pull": True},
+            ),
+        ]
+
+        with tempfile.TemporaryDirectory() as target_dir:
+            results = render_histogram_plots(
+                data=df,
+                specifications=specifications,
+                target_dir=target_dir,
+                file_formats=(".png",),
+                n_workers=2,
+            )
+            self.assertEqual([result.filename for result in results], ["x", "missing", "y"])
+            self.assertEqual([result.succeeded for result in results], [True, False, True])
+            self.assertIn("KeyError", results[1].error)
+            self.assertTrue(os.path.isfile(os.path.join(target_dir, "x.png")))
+            self.assertTrue(os.path.isfile(os.path.join(target_dir, "y.png")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+import unittest
+
+import numpy as np
+
+from analysis_tools.plotting.binning import fill_1d, fill_2d, get_bin_edges_array, get_bin_indices, is_uniform_binning
+from analysis_tools.plotting.plot_variables import BinningVariable
+
+
+def _fill_2d_with_masks(x, y, edges_x, edges_y, weights):
+    numbers = np.zeros((len(edges_x) - 1, len(edges_y) - 1))
+    for i in range(len(edges_x) - 1):
+        for j in range(len(edges_y) - 1):
+            x_upper = x <= edges_x[i + 1] if i == len(edges_x) - 2 else x < edges_x[i + 1]
+            y_upper = y <= edges_y[j + 1] if j == len(edges_y) - 2 else y < edges_y[j + 1]
+            mask = (x >= edges_x[i]) & x_upper & (y >= edges_y[j]) & y_upper
+            numbers[i, j] = np.sum(weights[mask])
+    return numbers
+
+
+class BinningTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.rng = np.random.default_rng(42)
+
+    def test_bin_indices_match_np_histogram(self):
+        values = np.concatenate([self.rng.normal(size=1000), [-3.0, 3.0, np.nan, -np.inf, np.inf, 10.0]])
+        edges = np.linspace(-3.0, 3.0, 13)
+        indices = get_bin_indices(values=values, edges=edges)
+        expected, _ = np.histogram(values, bins=edges)
+        self.assertTrue(np.array_equal(np.bincount(indices[indices >= 0], minlength=12), expected))
+        self.assertEqual(indices[-6], 0)
+        self.assertEqual(indices[-5], 11)
+        self.assertTrue(np.all(indices[-4:] == -1))
+
+    def test_uniform_bin_indices_match_searchsorted(self):
+        for edges in (np.linspace(-3.0, 3.0, 13), np.linspace(0.1, 0.7, 7), np.linspace(-1e-3, 2e5, 1001)):
+            self.assertTrue(is_uniform_binning(edges=edges))
+            # Values exactly on, and one ulp next to every edge, where rounding of the arithmetic index matters
+            values = np.concatenate(
+                [
+                    self.rng.uniform(edges[0] - 1.0, edges[-1] + 1.0, size=10000),
+                    edges,
+                    np.nextafter(edges, -np.inf),
+                    np.nextafter(edges, np.inf),
+                    [np.nan, -np.inf, np.inf],
+                ]
+            )
+            uniform_indices = get_bin_indices(values=values, edges=edges, uniform=True)
+            self.assertTrue(np.array_equal(uniform_indices, get_bin_indices(values=values, edges=edges, uniform=False)))
+            expected, _ = np.histogram(values[np.isfinite(values)], bins=edges)
+            self.assertTrue(
+                np.array_equal(np.bincount(uniform_indices[uniform_indices >= 0], minlength=len(edges) - 1), expected)
+            )
+        self.assertFalse(is_uniform_binning(edges=np.array([0.0, 0.1, 0.5, 1.0, 5.0])))
+
+    def test_bin_edges_array_from_binning_variable(self):
+        variable = BinningVariable(df_label="x", label="x", binning=(0.0, 1.0, 5.0))
+        self.assertTrue(np.array_equal(get_bin_edges_array(binning_variable=variable), [0.0, 1.0, 5.0]))
+
+    def test_fill_1d_matches_np_histogram(self):
+        data = np.concatenate([self.rng.exponential(size=20000), [np.nan, 5.0]])
+        weights = self.rng.uniform(0.0, 2.0, size=len(data))
+        for edges in (np.linspace(0.0, 5.0, 26), np.array([0.0, 0.1, 0.5, 1.0, 5.0])):
+            bin_contents = fill_1d(data=data, edges=edges, weights=weights)
+            counts, _ = np.histogram(data, bins=edges)
+            sum_of_weights, _ = np.histogram(data, bins=edges, weights=weights)
+            sum_of_weights_squared, _ = np.histogram(data, bins=edges, weights=weights**2)
+            self.assertTrue(np.array_equal(bin_contents.counts, counts))
+            self.assertTrue(np.allclose(bin_contents.sum_of_weights, sum_of_weights))
+            self.assertTrue(np.allclose(bin_contents.sum_of_weights_squared, sum_of_weights_squared))
+
+    def test_fill_2d_matches_mask_based_filling(self):
+        x = np.concatenate([self.rng.uniform(-0.5, 10.5, size=5000), [10.0, 0.0, 10.0]])
+        y = np.concatenate([self.rng.uniform(-0.5, 4.5, size=5000), [4.0, 4.0, np.nan]])
+        weights = self.rng.uniform(0.5, 1.5, size=len(x))
+        edges_x = np.linspace(0.0, 10.0, 11)
+        edges_y = np.array([0.0, 0.5, 2.0, 4.0])
+
+        bin_contents = fill_2d(x=x, y=y, edges_x=edges_x, edges_y=edges_y, weights=weights)
+
+        self.assertTrue(np.array_equal(bin_contents.counts, _fill_2d_with_masks(x, y, edges_x, edges_y, np.ones_like(x))))
+        self.assertTrue(np.allclose(bin_contents.sum_of_weights, _fill_2d_with_masks(x, y, edges_x, edges_y, weights)))
+        self.assertTrue(
+            np.allclose(bin_contents.sum_of_weights_squared, _fill_2d_with_masks(x, y, edges_x, edges_y, weights**2))
+        )
+
+    def test_fill_2d_without_weights(self):
+        bin_contents = fill_2d(
+            x=np.array([0.5, 1.5, 1.5]),
+            y=np.array([0.5, 0.5, 0.5]),
+            edges_x=np.array([0.0, 1.0, 2.0]),
+            edges_y=np.array([0.0, 1.0]),
+        )
+        self.assertTrue(np.array_equal(bin_contents.counts, [[1.0], [2.0]]))
+        self.assertTrue(np.array_equal(bin_contents.sum_of_weights_squared, [[1.0], [2.0]]))
+
+
+if __name__ == "__main__":
+    unittest.main()
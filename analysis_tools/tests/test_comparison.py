@@ -0,0 +1,52 @@
+import unittest
+import warnings
+
+import numpy as np
+
+from analysis_tools.plotting.comparison import ComparisonMode, compare_data_to_mc, get_pulls, get_ratios
+
+
+class ComparisonTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.data = np.array([10.0, 0.0, 4.0, 0.0])
+        self.mc = np.array([8.0, 2.0, 0.0, 0.0])
+        self.mc_sum_of_weights_squared = np.array([2.0, 1.0, 0.0, 0.0])
+
+    def test_pulls_include_mc_uncertainty(self):
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            pulls = get_pulls(data=self.data, mc=self.mc, mc_sum_of_weights_squared=self.mc_sum_of_weights_squared)
+        self.assertTrue(np.allclose(pulls[:3], [2.0 / np.sqrt(12.0), -2.0, 2.0]))
+        self.assertTrue(np.isnan(pulls[3]))
+
+        # Without MC weights, the sum of squared weights equals the MC prediction
+        pulls = get_pulls(data=self.data[:2], mc=self.mc[:2], mc_sum_of_weights_squared=self.mc[:2])
+        self.assertTrue(np.allclose(pulls, (self.data[:2] - self.mc[:2]) / np.sqrt(self.data[:2] + self.mc[:2])))
+
+    def test_ratios(self):
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            comparison = get_ratios(data=self.data, mc=self.mc, mc_sum_of_weights_squared=self.mc_sum_of_weights_squared)
+        self.assertEqual(comparison.mode, ComparisonMode.ratio)
+        self.assertTrue(np.allclose(comparison.values[:2], [1.25, 0.0]))
+        self.assertTrue(np.allclose(comparison.errors[:2], [np.sqrt(10.0) / 8.0, 0.0]))
+        self.assertTrue(np.allclose(comparison.mc_uncertainty[:2], [np.sqrt(2.0) / 8.0, 0.5]))
+        self.assertTrue(np.all(np.isnan(comparison.values[2:])))
+
+    def test_compare_data_to_mc(self):
+        comparison = compare_data_to_mc(
+            data=self.data, mc=self.mc, mc_sum_of_weights_squared=self.mc_sum_of_weights_squared
+        )
+        self.assertEqual(comparison.mode, ComparisonMode.pull)
+        self.assertIsNone(comparison.errors)
+        self.assertTrue(
+            np.array_equal(
+                comparison.values,
+                get_pulls(data=self.data, mc=self.mc, mc_sum_of_weights_squared=self.mc_sum_of_weights_squared),
+                equal_nan=True,
+            )
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,267 @@
+import unittest
+
+import numpy as np
+
+from analysis_tools.plotting.binning import get_bin_edges_array
+from analysis_tools.plotting.histogram import Histogram
+from analysis_tools.plotting.histogram_component import HistogramComponent
+from analysis_tools.plotting.plot_variables import BinningVariable, HistVariable
+
+
+class HistogramTests(unittest.TestCase):
+    def setUp(self) -> None:
+        rng = np.random.default_rng(7)
+        self.variable = HistVariable(df_label="x", label="x", bins=20, scope=(-3.0, 3.0))
+        self.background_1 = HistogramComponent(
+            data=rng.normal(size=1000),
+            label="bkg 1",
+            weights=rng.uniform(0.5, 1.5, size=1000),
+        )
+        self.background_2 = HistogramComponent(data=rng.normal(size=500), label="bkg 2")
+        self.histogram = Histogram(variable=self.variable)
+        self.histogram.add_component(hist_component=self.background_1)
+        self.histogram.add_component(hist_component=self.background_2)
+
+    def test_bin_counts_match_np_histogram(self):
+        expected, _ = np.histogram(
+            self.background_1.data,
+            bins=np.linspace(-3.0, 3.0, 21),
+            weights=self.background_1.weights,
+        )
+        self.assertTrue(np.allclose(self.histogram.get_bin_counts()[0], expected))
+        expected_errors_squared, _ = np.histogram(
+            self.background_1.data,
+            bins=np.linspace(-3.0, 3.0, 21),
+            weights=self.background_1.weights**2,
+        )
+        self.assertTrue(
+            np.allclose(self.histogram.get_bin_error_for_component(self.background_1) ** 2, expected_errors_squared)
+        )
+
+    def test_repeated_queries_are_cached(self):
+        for _ in range(5):
+            self.histogram.get_bin_counts()
+            self.histogram.get_total_bin_count()
+            self.histogram.get_bin_errors()
+        self.assertEqual(self.histogram.histogram_passes, 2)
+
+    def test_bin_mids_and_data_points_are_cached(self):
+        bin_mids = self.histogram.get_bin_mids()
+        self.assertIs(self.histogram.get_bin_mids(), bin_mids)
+        self.assertFalse(bin_mids.flags.writeable)
+        self.assertTrue(np.allclose(bin_mids, np.linspace(-2.85, 2.85, 20)))
+
+        data = HistogramComponent(data=np.array([-2.9, -2.9, 0.1]), label="data")
+        self.histogram.add_data(hist_component=data)
+        data_points = self.histogram.get_data_points_for_component(hist_component=data)
+        self.assertIs(self.histogram.get_data_points_for_component(hist_component=data), data_points)
+        self.assertEqual(data_points.values.count(), 2)
+        self.assertEqual(data_points.values[0], 2.0)
+        self.assertTrue(np.all(data_points.errors.mask[:, 1]))
+        self.assertLess(data_points.errors[0, 0], data_points.errors[1, 0])
+
+        self.histogram.compact()
+        self.histogram.fill(component_label="data", data=np.array([-2.9]))
+        self.assertEqual(self.histogram.get_data_points_for_component(hist_component=data).values[0], 3.0)
+
+    def test_cache_is_cleared_when_component_is_added(self):
+        self.histogram.get_bin_counts()
+        passes = self.histogram.histogram_passes
+        self.histogram.add_component(hist_component=HistogramComponent(data=np.zeros(3), label="bkg 3"))
+        total_bin_count = self.histogram.get_total_bin_count()
+        self.assertEqual(self.histogram.histogram_passes, passes + 3)
+        self.assertAlmostEqual(
+            total_bin_count[10], self.histogram.get_bin_counts()[0][10] + 3 + self.histogram.get_bin_counts()[1][10]
+        )
+
+    def test_cache_is_cleared_when_variable_changes(self):
+        self.assertEqual(len(self.histogram.get_binning()), 21)
+        self.histogram.set_variable(HistVariable(df_label="x", label="x", bins=10, scope=(-3.0, 3.0)))
+        self.assertEqual(len(self.histogram.get_binning()), 11)
+        self.assertEqual(len(self.histogram.get_bin_counts()[0]), 10)
+
+    def test_compact_releases_raw_data(self):
+        bin_counts = [np.copy(bin_count) for bin_count in self.histogram.get_bin_counts()]
+        bin_errors = self.histogram.get_bin_errors()
+        self.histogram.compact()
+        self.assertTrue(all(component.is_binned and component.data is None for component in self.histogram.components))
+        self.assertIsNone(self.background_1.weights)
+        for bin_count, expected in zip(self.histogram.get_bin_counts(), bin_counts):
+            self.assertTrue(np.array_equal(bin_count, expected))
+        self.assertTrue(np.array_equal(self.histogram.get_bin_errors(), bin_errors))
+        self.assertTrue(np.array_equal(self.background_2.get_bin_count(), bin_counts[1]))
+
+    def test_pre_binned_component_defines_binning_without_scope(self):
+        histogram = Histogram(variable=HistVariable(df_label="x", label="x", bins=3))
+        histogram.add_component(
+            hist_component=HistogramComponent.from_bin_contents(
+                label="binned",
+                bin_edges=np.array([0.0, 1.0, 2.0, 3.0]),
+                sum_of_weights=np.array([1.0, 4.0, 2.0]),
+                sum_of_weights_squared=np.array([1.0, 8.0, 2.0]),
+            )
+        )
+        histogram.add_component(hist_component=HistogramComponent(data=np.array([0.5, 2.5, 3.0, 7.0]), label="raw"))
+        self.assertTrue(np.array_equal(histogram.get_total_bin_count(), [2.0, 4.0, 4.0]))
+        self.assertTrue(np.allclose(histogram.get_bin_errors() ** 2, [2.0, 8.0, 4.0]))
+        self.assertTrue(histogram.is_uniform_binning)
+
+    def test_explicit_and_log_binning(self):
+        explicit = HistVariable(df_label="x", label="x", bins=[1.0, 2.0, 4.0, 8.0])
+        self.assertEqual(explicit.bins, 3)
+        self.assertEqual(explicit.scope, (1.0, 8.0))
+        log_binning = HistVariable(df_label="x", label="x", bins=3, scope=(1.0, 8.0), log_binning=True)
+        self.assertTrue(np.allclose(log_binning.get_bin_edges(), [1.0, 2.0, 4.0, 8.0]))
+
+        binning_variable = BinningVariable.from_hist_variable(hist_variable=log_binning)
+        self.assertTrue(np.allclose(get_bin_edges_array(binning_variable=binning_variable), [1.0, 2.0, 4.0, 8.0]))
+        self.assertTrue(np.allclose(binning_variable.get_bin_widths(), [1.0, 2.0, 4.0]))
+        self.assertTrue(np.allclose(binning_variable.get_bin_mids(), np.sqrt([2.0, 8.0, 32.0])))
+
+        histogram = Histogram(variable=HistVariable(df_label="x", label="x", bins=3, log_binning=True))
+        histogram.add_component(hist_component=HistogramComponent(data=np.array([1.0, 1.5, 3.0, 8.0]), label="raw"))
+        self.assertTrue(np.allclose(histogram.get_binning(), [1.0, 2.0, 4.0, 8.0]))
+        self.assertTrue(np.array_equal(histogram.get_total_bin_count(), [2.0, 1.0, 1.0]))
+        with self.assertRaises(ValueError):
+            histogram.get_bin_width()
+        with self.assertRaises(ValueError):
+            HistVariable(df_label="x", label="x", bins=[1.0, 1.0, 2.0])
+
+    def test_variable_bin_geometry_is_cached(self):
+        hist_variable = HistVariable(df_label="x", label="x", bins=4, scope=(0.0, 2.0))
+        for get_geometry in (hist_variable.get_bin_edges, hist_variable.get_bin_mids, hist_variable.get_bin_widths):
+            self.assertIs(get_geometry(), get_geometry())
+            self.assertFalse(get_geometry().flags.writeable)
+        self.assertTrue(np.allclose(hist_variable.get_bin_mids(), [0.25, 0.75, 1.25, 1.75]))
+        self.assertIsNone(HistVariable(df_label="x", label="x", bins=4).get_bin_mids())
+
+        histogram = Histogram(variable=hist_variable)
+        histogram.add_component(hist_component=HistogramComponent(data=np.array([0.1, 1.9]), label="raw"))
+        self.assertIs(histogram.get_binning(), hist_variable.get_bin_edges())
+        self.assertIs(histogram.get_bin_mids(), hist_variable.get_bin_mids())
+
+        binning_variable = BinningVariable(df_label="x", label="x", binning=4, scope=(0.0, 2.0))
+        edges = binning_variable.get_bin_edges_array()
+        self.assertIs(binning_variable.get_bin_edges_array(), edges)
+        self.assertTrue(np.shares_memory(binning_variable.get_bin_edges(), edges))
+        self.assertEqual([tuple(bin_edges) for bin_edges in binning_variable.get_bin_edges()][1], (0.5, 1.0))
+        self.assertTrue(np.array_equal(binning_variable.get_upper_limits(), [0.5, 1.0, 1.5, 2.0]))
+        with self.assertRaises(ValueError):
+            binning_variable.get_bin_widths()[0] = 1.0
+
+        binning_variable.set_scope(scope=(0.0, 4.0))
+        self.assertTrue(np.allclose(binning_variable.get_bin_mids(), [0.5, 1.5, 2.5, 3.5]))
+        self.assertTrue(np.array_equal(binning_variable.get_bin_edges_array(), [0.0, 1.0, 2.0, 3.0, 4.0]))
+
+    def test_variable_width_binning_is_not_uniform(self):
+        self.assertTrue(self.histogram.is_uniform_binning)
+        histogram = Histogram(variable=HistVariable(df_label="x", label="x", bins=3))
+        histogram.add_component(
+            hist_component=HistogramComponent.from_bin_contents(
+                label="binned", bin_edges=np.array([0.0, 1.0, 4.0]), sum_of_weights=np.array([1.0, 4.0])
+            )
+        )
+        histogram.add_component(hist_component=HistogramComponent(data=np.array([0.5, 1.0, 3.0, 4.0]), label="raw"))
+        self.assertFalse(histogram.is_uniform_binning)
+        self.assertTrue(np.array_equal(histogram.get_total_bin_count(), [2.0, 7.0]))
+
+    def test_fill_accumulates_in_place(self):
+        rng = np.random.default_rng(8)
+        edges = np.linspace(-3.0, 3.0, 21)
+        self.histogram.add_data(
+            hist_component=HistogramComponent.from_bin_contents(
+                label="data", bin_edges=edges, sum_of_weights=np.zeros(20)
+            )
+        )
+        n_raw = len(self.background_1.data)
+        data, weights = [self.background_1.data], [self.background_1.weights]
+        revision = self.histogram.revision
+        for _ in range(3):
+            batch, batch_weights = rng.normal(size=200), rng.uniform(0.5, 1.5, size=200)
+            self.histogram.fill(component_label="bkg 1", data=batch, weights=batch_weights)
+            self.histogram.fill(component_label="data", data=batch)
+            data.append(batch)
+            weights.append(batch_weights)
+        self.assertEqual(self.histogram.revision, revision + 6)
+        self.assertEqual(self.histogram.histogram_passes, 1)
+        self.assertTrue(self.background_1.is_binned)
+
+        data, weights = np.concatenate(data), np.concatenate(weights)
+        self.assertTrue(
+            np.allclose(self.histogram.get_bin_counts()[0], np.histogram(data, bins=edges, weights=weights)[0])
+        )
+        self.assertTrue(
+            np.allclose(
+                self.histogram.get_bin_error_for_component(self.background_1) ** 2,
+                np.histogram(data, bins=edges, weights=weights**2)[0],
+            )
+        )
+        data_component = self.histogram.data_components[0]
+        self.assertTrue(
+            np.array_equal(
+                self.histogram.get_bin_count_for_component(data_component),
+                np.histogram(data[n_raw:], bins=edges)[0],
+            )
+        )
+        self.assertTrue(np.array_equal(data_component.bin_contents.counts, data_component.bin_contents.sum_of_weights))
+
+        with self.assertRaises(ValueError):
+            self.histogram.fill(component_label="bkg 3", data=np.zeros(3))
+        histogram = Histogram(variable=HistVariable(df_label="x", label="x", bins=20))
+        histogram.add_component(hist_component=HistogramComponent(data=np.zeros(3), label="bkg"))
+        with self.assertRaises(ValueError):
+            histogram.fill(component_label="bkg", data=np.zeros(3))
+
+    def test_signal_scaling_is_resolved_once_per_chain(self):
+        rng = np.random.default_rng(3)
+        reference = HistogramComponent(data=rng.normal(size=100), label="signal 0")
+        self.histogram.add_signal_component(hist_component=reference)
+        chain = [reference]
+        for i in range(1, 6):
+            chain.append(HistogramComponent(data=rng.normal(size=100), label=f"signal {i}", related_component=chain[-1]))
+            self.histogram.add_signal_component(hist_component=chain[-1])
+
+        scaling = np.max(self.histogram.get_total_bin_count()) / np.max(
+            self.histogram.get_bin_count_for_component(hist_component=reference)
+        )
+        for component in reversed(chain):
+            bin_count, component_scaling = self.histogram.get_signal_bin_count_for_component(hist_component=component)
+            self.assertAlmostEqual(component_scaling, scaling)
+            self.assertTrue(
+                np.allclose(bin_count, scaling * self.histogram.get_bin_count_for_component(hist_component=component))
+            )
+            self.assertTrue(
+                np.allclose(
+                    self.histogram.get_signal_bin_error_for_component(hist_component=component),
+                    scaling * self.histogram.get_bin_error_for_component(hist_component=component),
+                )
+            )
+        self.assertEqual(self.histogram.histogram_passes, 2 + len(chain))
+
+        self.histogram.compact()
+        self.histogram.fill(component_label="bkg 2", data=np.zeros(1000))
+        self.assertGreater(self.histogram.get_signal_scaling(hist_component=chain[-1]), scaling)
+
+    def test_cyclic_related_components_are_rejected(self):
+        signal_1 = HistogramComponent(data=np.zeros(10), label="signal 1")
+        signal_2 = HistogramComponent(data=np.zeros(10), label="signal 2", related_component=signal_1)
+        signal_1._related_component = signal_2
+        self.histogram.add_signal_component(hist_component=signal_1)
+        self.histogram.add_signal_component(hist_component=signal_2)
+        with self.assertRaises(ValueError):
+            self.histogram.get_signal_scaling(hist_component=signal_2)
+
+    def test_pre_binned_component_with_different_edges_is_rejected(self):
+        self.histogram.add_component(
+            hist_component=HistogramComponent.from_bin_contents(
+                label="binned",
+                bin_edges=np.array([0.0, 1.0]),
+                sum_of_weights=np.array([1.0]),
+            )
+        )
+        with self.assertRaises(ValueError):
+            self.histogram.get_bin_counts()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,135 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from analysis_tools.plotting.binning import fill_1d
+from analysis_tools.plotting.histogram_cache import HistogramCache
+from analysis_tools.plotting.histogram_plots import HistogramPlot
+from analysis_tools.plotting.plot_variables import HistVariable
+
+
+class HistogramCacheTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache = HistogramCache(cache_dir=os.path.join(self.tmp_dir.name, "cache"))
+        self.hist_var = HistVariable(df_label="x", label="x", bins=20, scope=(-3.0, 3.0))
+        rng = np.random.default_rng(4)
+        self.data = rng.normal(size=1000)
+        self.weights = rng.uniform(0.5, 1.5, size=1000)
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def test_key_depends_on_all_inputs(self):
+        key = self.cache.get_key(hist_var=self.hist_var, data=self.data, weights=self.weights)
+        self.assertEqual(key, self.cache.get_key(hist_var=self.hist_var, data=self.data.copy(), weights=self.weights))
+        other_keys = [
+            self.cache.get_key(hist_var=self.hist_var, data=self.data),
+            self.cache.get_key(hist_var=self.hist_var, data=self.data[:-1], weights=self.weights[:-1]),
+            self.cache.get_key(hist_var=self.hist_var, data=self.data.astype(np.float32), weights=self.weights),
+            self.cache.get_key(
+                hist_var=HistVariable(df_label="x", label="x", bins=10, scope=(-3.0, 3.0)),
+                data=self.data,
+                weights=self.weights,
+            ),
+        ]
+        self.assertEqual(len(set(other_keys + [key])), len(other_keys) + 1)
+
+        with self.assertRaises(ValueError):
+            self.cache.get_key(hist_var=HistVariable(df_label="x", label="x", bins=20), data=self.data)
+
+    def test_file_fingerprint_uses_modification_time(self):
+        path = os.path.join(self.tmp_dir.name, "x.npy")
+        np.save(path, self.data)
+        key = self.cache.get_key(hist_var=self.hist_var, data=path)
+        self.assertEqual(self.cache.get_key(hist_var=self.hist_var, data=path), key)
+        os.utime(path, ns=(0, 0))
+        self.assertNotEqual(self.cache.get_key(hist_var=self.hist_var, data=path), key)
+
+    def test_cosmetic_rerun_skips_filling(self):
+        path = os.path.join(self.tmp_dir.name, "x.npy")
+        np.save(path, self.data)
+
+        def create_plot() -> HistogramPlot:
+            plot = HistogramPlot(hist_var=self.hist_var, histogram_cache=self.cache)
+            plot.add_component(data=path, label="bkg", weights=self.weights)
+            plot.add_signal_component(data=self.data[:100], label="signal")
+            plot.add_data(data=path, label="data")
+            return plot
+
+        plot = create_plot()
+        expected = fill_1d(data=self.data, edges=self.hist_var.get_bin_edges(), weights=self.weights)
+        self.assertTrue(np.allclose(plot.histogram.get_total_bin_count(), expected.sum_of_weights))
+        self.assertTrue(np.allclose(plot.histogram.get_bin_errors() ** 2, expected.sum_of_weights_squared))
+
+        with mock.patch.object(HistogramPlot, "prepare_data_and_weights", side_effect=AssertionError):
+            rerun = create_plot()
+        self.assertEqual(rerun.histogram.histogram_passes, 0)
+        for component, cached_component in zip(plot.histogram.all_components, rerun.histogram.all_components):
+            self.assertTrue(
+                np.array_equal(
+                    plot.histogram.get_bin_count_for_component(hist_component=component),
+                    rerun.histogram.get_bin_count_for_component(hist_component=cached_component),
+                )
+            )
+
+        with self.assertRaises(ValueError):
+            HistogramPlot(hist_var=HistVariable(df_label="x", label="x"), histogram_cache=self.cache)
+
+    def test_least_recently_used_entries_are_evicted(self):
+        edges = self.hist_var.get_bin_edges()
+        keys = []
+        for i in range(3):
+            keys.append(self.cache.get_key(hist_var=self.hist_var, data=self.data[i:]))
+            self.cache.store(key=keys[-1], bin_edges=edges, bin_contents=fill_1d(data=self.data[i:], edges=edges))
+            os.utime(self.cache._get_cache_file(key=keys[-1]), ns=(i, i))
+        entry_size = self.cache.size // 3
+
+        self.assertIsNotNone(self.cache.load(key=keys[0]))  # Marks the first entry as recently used
+        limited_cache = HistogramCache(cache_dir=self.cache.cache_dir, max_size=3 * entry_size)
+        key = limited_cache.get_key(hist_var=self.hist_var, data=self.data[:10])
+        limited_cache.store(key=key, bin_edges=edges, bin_contents=fill_1d(data=self.data[:10], edges=edges))
+
+        self.assertLessEqual(limited_cache.size, limited_cache.max_size)
+        self.assertIsNone(limited_cache.load(key=keys[1]))
+        for cached_key in (keys[0], keys[2], key):
+            self.assertIsNotNone(limited_cache.load(key=cached_key))
+
+        limited_cache.clear()
+        self.assertEqual(limited_cache.size, 0)
+
+    def test_unreadable_entries_are_misses(self):
+        edges = self.hist_var.get_bin_edges()
+        key = self.cache.get_key(hist_var=self.hist_var, data=self.data)
+        cache_file = self.cache._get_cache_file(key=key)
+        self.cache.store(key=key, bin_edges=edges, bin_contents=fill_1d(data=self.data, edges=edges))
+        self.assertEqual(os.listdir(self.cache.cache_dir), [cache_file.name])
+
+        for content in (cache_file.read_bytes()[:100], b"", b"no npz file"):
+            cache_file.write_bytes(content)
+            self.assertIsNone(self.cache.load(key=key))
+            self.assertFalse(cache_file.exists())
+
+        plot = HistogramPlot(hist_var=self.hist_var, histogram_cache=self.cache)
+        plot.add_component(data=self.data, label="bkg")
+        self.assertEqual(plot.histogram.get_total_bin_count().sum(), fill_1d(data=self.data, edges=edges).counts.sum())
+        self.assertIsNotNone(self.cache.load(key=key))
+
+    def test_entries_of_read_only_caches_are_used(self):
+        edges = self.hist_var.get_bin_edges()
+        key = self.cache.get_key(hist_var=self.hist_var, data=self.data)
+        cache_file = self.cache._get_cache_file(key=key)
+        self.cache.store(key=key, bin_edges=edges, bin_contents=fill_1d(data=self.data, edges=edges))
+
+        with mock.patch("os.utime", side_effect=PermissionError), mock.patch("os.remove", side_effect=PermissionError):
+            self.assertIsNotNone(self.cache.load(key=key))
+            cache_file.write_bytes(b"no npz file")
+            self.assertIsNone(self.cache.load(key=key))
+        self.assertTrue(cache_file.exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
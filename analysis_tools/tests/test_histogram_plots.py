@@ -0,0 +1,216 @@
+import itertools
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+import matplotlib.pyplot as plt  # noqa: E402
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from analysis_tools.plotting.comparison import ComparisonMode  # noqa: E402
+from analysis_tools.plotting.histogram import Histogram  # noqa: E402
+from analysis_tools.plotting.histogram_component import HistogramComponent  # noqa: E402
+from analysis_tools.plotting.histogram_plots import HistogramPlot  # noqa: E402
+from analysis_tools.plotting.plot_variables import HistVariable  # noqa: E402
+
+
+class HistogramPlotTests(unittest.TestCase):
+    def setUp(self) -> None:
+        rng = np.random.default_rng(3)
+        self.df = pd.DataFrame({"x": rng.normal(size=10000), "w": rng.uniform(0.5, 1.5, size=10000)})
+        self.hist_var = HistVariable(df_label="x", label="x", bins=25, scope=(-2.5, 2.5))
+
+    def tearDown(self) -> None:
+        plt.close("all")
+
+    def test_component_from_chunks_matches_in_memory_component(self):
+        in_memory_plot = HistogramPlot(hist_var=self.hist_var)
+        in_memory_plot.add_component(data=self.df, label="bkg", weights="w")
+
+        chunked_plot = HistogramPlot(hist_var=self.hist_var)
+        chunks = (self.df.iloc[start : start + 999] for start in range(0, len(self.df), 999))
+        chunked_plot.add_component_from_chunks(chunks=chunks, label="bkg", weights="w")
+        chunked_plot.add_data_from_chunks(chunks=np.array_split(self.df["x"].to_numpy(), 4), label="data")
+
+        self.assertIsNone(chunked_plot.histogram.components[0].data)
+        self.assertTrue(
+            np.allclose(chunked_plot.histogram.get_bin_counts()[0], in_memory_plot.histogram.get_bin_counts()[0])
+        )
+        self.assertTrue(np.allclose(chunked_plot.histogram.get_bin_errors(), in_memory_plot.histogram.get_bin_errors()))
+        chunked_plot.plot_on(add_pull=True)
+
+    def test_weights_from_npy_files(self):
+        in_memory_plot = HistogramPlot(hist_var=self.hist_var)
+        in_memory_plot.add_component(data=self.df, label="bkg", weights="w")
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            data_path = os.path.join(tmp_dir, "x.npy")
+            weights_path = os.path.join(tmp_dir, "w.npy")
+            np.save(data_path, self.df["x"].to_numpy())
+            np.save(weights_path, self.df["w"].to_numpy())
+            for weights in (weights_path, Path(weights_path)):
+                plot = HistogramPlot(hist_var=self.hist_var)
+                plot.add_component(data=data_path, label="bkg", weights=weights)
+                self.assertTrue(
+                    np.allclose(plot.histogram.get_bin_counts()[0], in_memory_plot.histogram.get_bin_counts()[0])
+                )
+            with self.assertRaises(ValueError):
+                HistogramPlot(hist_var=self.hist_var).add_component(data=data_path, label="bkg", weights="w")
+
+    def test_component_from_chunks_requires_scope(self):
+        plot = HistogramPlot(hist_var=HistVariable(df_label="x", label="x", bins=25))
+        with self.assertRaises(ValueError):
+            plot.add_component_from_chunks(chunks=[self.df], label="bkg")
+
+    def test_variable_width_binning(self):
+        df = pd.DataFrame({"x": np.random.default_rng(4).exponential(scale=10.0, size=5000) + 0.1})
+        for hist_var in (
+            HistVariable(df_label="x", label="x", bins=(0.1, 1.0, 2.0, 5.0, 20.0, 100.0)),
+            HistVariable(df_label="x", label="x", bins=15, scope=(0.1, 100.0), x_scale_log=True, log_binning=True),
+        ):
+            plot = HistogramPlot(hist_var=hist_var)
+            plot.add_component(data=df, label="bkg")
+            plot.add_data(data=df, label="data")
+            edges = plot.histogram.get_binning()
+            self.assertFalse(plot.histogram.is_uniform_binning)
+            self.assertTrue(np.allclose(plot.histogram.get_bin_widths(), np.diff(edges)))
+            self.assertTrue(np.array_equal(plot.histogram.get_bin_counts()[0], np.histogram(df["x"], bins=edges)[0]))
+            self.assertEqual(plot.y_label, "Candidates / bin")
+
+            fig, ax = plot.plot_on(add_pull=True)
+            (uncertainty_bars,) = [container for container in ax.containers if container.get_label() == "MC stat. unc."]
+            bars = uncertainty_bars.patches
+            self.assertTrue(np.allclose([bar.get_x() for bar in bars], edges[:-1]))
+            self.assertTrue(np.allclose([bar.get_width() for bar in bars], np.diff(edges)))
+            self.assertEqual(ax.get_xscale(), "log" if hist_var.x_scale_log else "linear")
+
+    def test_refresh_matches_new_plot(self):
+        batches = [self.df.iloc[start : start + 2000] for start in range(0, len(self.df), 2000)]
+        for hist_type, renderer in itertools.product(("stepfilled", "step"), ("hist", "stairs")):
+            live_plot = HistogramPlot(hist_var=self.hist_var, hist_type=hist_type, renderer=renderer)
+            live_plot.add_component_from_chunks(chunks=[], label="bkg 1", weights="w")
+            live_plot.add_component(data=batches[0], label="bkg 2")
+            live_plot.add_signal_component(data=batches[0], label="signal")
+            live_plot.add_data_from_chunks(chunks=[batches[0] * 1.1], label="data")
+            fig, ax = live_plot.plot_on(add_pull=True)
+            patches = list(ax.patches)
+            for batch in batches[1:]:
+                live_plot.fill(component_label="bkg 1", data=batch, weights="w")
+                live_plot.fill(component_label="bkg 2", data=batch)
+                live_plot.fill(component_label="signal", data=batch[:100])
+                live_plot.fill(component_label="data", data=batch * 1.1)
+                live_plot.refresh()
+
+            new_plot = HistogramPlot(hist_var=self.hist_var, hist_type=hist_type, renderer=renderer)
+            new_plot.add_component(data=pd.concat(batches[1:]), label="bkg 1", weights="w")
+            new_plot.add_component(data=self.df, label="bkg 2")
+            new_plot.add_signal_component(data=pd.concat([batches[0]] + [b[:100] for b in batches[1:]]), label="signal")
+            new_plot.add_data(data=self.df * 1.1, label="data")
+            _, new_ax = new_plot.plot_on(add_pull=True)
+
+            self.assertEqual(list(ax.patches), patches)
+            self.assertEqual(len(ax.patches), len(new_ax.patches))
+            for live, new in zip(ax.patches, new_ax.patches):
+                self.assertTrue(np.allclose(live.get_path().vertices, new.get_path().vertices))
+            for live, new in zip(ax.containers[-1].lines[1], new_ax.containers[-1].lines[1]):
+                self.assertTrue(np.allclose(live.get_ydata(), new.get_ydata(), equal_nan=True))
+            self.assertTrue(np.allclose(ax.get_ylim(), new_ax.get_ylim()))
+
+        with self.assertRaises(ValueError):
+            HistogramPlot(hist_var=self.hist_var).refresh()
+
+    def test_stairs_renderer_draws_one_patch_per_layer(self):
+        hist_var = HistVariable(df_label="x", label="x", bins=200, scope=(-2.5, 2.5))
+        patches = {}
+        y_limits = {}
+        for renderer in ("hist", "stairs"):
+            plot = HistogramPlot(hist_var=hist_var, renderer=renderer)
+            for i in range(3):
+                plot.add_component(data=self.df.iloc[i::3], label=f"bkg {i}", weights="w")
+            plot.add_signal_component(data=self.df, label="signal")
+            _, ax = plot.plot_on()
+            patches[renderer] = ax.patches
+            y_limits[renderer] = ax.get_ylim()
+            self.assertEqual([text.get_text() for text in ax.get_legend().get_texts()][-2:], ["signal", "MC stat. unc."])
+            # The uncertainty band of the components is drawn before the signal components
+            band_size = 200 if renderer == "hist" else 1
+            self.assertEqual([patch.get_label() for patch in ax.patches].index("signal"), 3 + band_size)
+
+        self.assertTrue(np.allclose(y_limits["hist"], y_limits["stairs"]))
+
+        self.assertEqual(len(patches["hist"]), 3 + 1 + 2 * 200)
+        self.assertEqual(len(patches["stairs"]), 3 + 1 + 2)
+        for hist_patch, stairs_patch in zip(patches["hist"][:3], patches["stairs"]):
+            self.assertEqual(hist_patch.get_label(), stairs_patch.get_label())
+            self.assertEqual(hist_patch.get_facecolor(), stairs_patch.get_facecolor())
+            self.assertTrue(
+                np.allclose(hist_patch.get_path().get_extents().bounds, stairs_patch.get_path().get_extents().bounds)
+            )
+        with self.assertRaises(ValueError):
+            HistogramPlot(hist_var=hist_var, hist_type="bar", renderer="stairs")
+
+    def test_pull_and_ratio_panels(self):
+        x = self.df["x"].to_numpy()
+        plot = HistogramPlot(hist_var=self.hist_var)
+        plot.add_component(data=self.df, label="bkg", weights="w")
+        plot.add_data(data=np.concatenate([x, np.full(2000, 1.0), np.full(3000, -1.0)]), label="data")
+        for pull_mode in ComparisonMode:
+            fig, _ = plot.plot_on(add_pull=True, pull_mode=pull_mode)
+            ax2 = fig.axes[1]
+            comparison = plot.histogram.get_data_mc_comparison(mode=pull_mode)
+            self.assertEqual(ax2.get_ylabel(), pull_mode.value)
+            self.assertTrue(np.allclose(ax2.containers[0].lines[0].get_ydata(), comparison.values, equal_nan=True))
+
+            (markers,) = ax2.collections[-1:]
+            lower, upper = ax2.get_ylim()
+            outside = (comparison.values > upper) | (comparison.values < lower)
+            self.assertGreaterEqual(outside.sum(), 2)
+            self.assertEqual(len(markers.get_offsets()), outside.sum())
+            self.assertTrue(np.allclose(markers.get_offsets()[:, 0], plot.histogram.get_bin_mids()[outside]))
+            self.assertEqual(len(ax2.patches), 1 if pull_mode is ComparisonMode.ratio else 0)
+            self.assertEqual(
+                [text.get_text() for text in ax2.texts],
+                [str(round(value, 1)) for value in comparison.values[outside].tolist()],
+            )
+
+        plot.fill(component_label="data", data=np.full(20000, 2.0))
+        plot.refresh()
+        self.assertEqual(len(markers.get_offsets()), outside.sum() + 1)
+        self.assertEqual(len(ax2.texts), outside.sum() + 1)
+
+    def test_pull_panel_without_out_of_range_labels(self):
+        plot = HistogramPlot(hist_var=self.hist_var)
+        plot.add_component(data=self.df, label="bkg", weights="w")
+        plot.add_data(data=np.concatenate([self.df["x"].to_numpy(), np.full(2000, 1.0)]), label="data")
+        fig, _ = plot.plot_on(add_pull=True, label_out_of_range=False)
+        self.assertEqual(len(fig.axes[1].collections[-1].get_offsets()), 1)
+        self.assertEqual(len(fig.axes[1].texts), 0)
+
+    def test_plot_on_reuses_artists(self):
+        plot = HistogramPlot(hist_var=self.hist_var)
+        plot.add_component(data=self.df, label="bkg", weights="w")
+        plot.add_data(data=self.df, label="data")
+        fig, ax = plot.plot_on(add_pull=True, reuse_artists=True)
+        patches = list(ax.patches)
+
+        variation = Histogram(variable=self.hist_var)
+        variation.add_component(hist_component=HistogramComponent(data=self.df["x"].to_numpy() * 1.05, label="bkg"))
+        variation.add_data(hist_component=HistogramComponent(data=self.df["x"].to_numpy(), label="data"))
+        plot.set_histogram(histogram=variation)
+        self.assertEqual(plot.plot_on(add_pull=True, reuse_artists=True), (fig, ax))
+        self.assertEqual(list(ax.patches), patches)
+        _, new_ax = HistogramPlot(hist_var=self.hist_var, histogram=variation).plot_on(add_pull=True)
+        for live, new in zip(ax.patches, new_ax.patches):
+            self.assertTrue(np.allclose(live.get_path().vertices, new.get_path().vertices))
+
+        self.assertNotEqual(plot.plot_on(add_pull=False, reuse_artists=True)[1], ax)
+        with self.assertRaises(ValueError):
+            plot.set_histogram(histogram=Histogram(variable=HistVariable(df_label="x", label="x", bins=3)))
+
+
+if __name__ == "__main__":
+    unittest.main()
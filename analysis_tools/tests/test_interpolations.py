@@ -0,0 +1,144 @@
+import pickle
+import unittest
+
+import numpy as np
+from scipy.interpolate import interp1d
+
+from analysis_tools.interpolations import (
+    LogLogInterpolator,
+    find_intersections_between_curves,
+    find_intersections_between_interpolations,
+    logarithmic_interpolation,
+)
+
+
+class LogLogInterpolatorTests(unittest.TestCase):
+    def test_matches_interp1d(self):
+        rng = np.random.default_rng(3)
+        knots = [
+            np.geomspace(1.0, 1e4, 200),
+            np.sort(rng.uniform(1.0, 1e4, 200)),
+            np.sort(10.0 ** rng.uniform(-3.0, 3.0, 50)),
+            np.array([1.0, 2.0, 1e4]),
+        ]
+        for x in knots:
+            y = 1e-3 * x**1.3 * (1.0 + 0.1 * np.sin(x))
+            interpolation = LogLogInterpolator(x=x, y=y)
+            reference = interp1d(np.log10(x), np.log10(y))
+            for values in (rng.uniform(x[0], x[-1], size=100_000), rng.uniform(x[0], x[-1], size=10), x):
+                expected = np.power(10.0, reference(np.log10(values)))
+                self.assertTrue(np.allclose(interpolation(values), expected, rtol=1e-10, atol=0.0))
+            self.assertAlmostEqual(float(interpolation(x[1])), y[1], places=12)
+
+    def test_output_buffer_and_pickling(self):
+        x = np.geomspace(1.0, 100.0, 30)
+        interpolation = pickle.loads(pickle.dumps(LogLogInterpolator(x=x, y=x**2)))
+        values = np.linspace(1.0, 100.0, 1000)
+        out = np.empty_like(values)
+        self.assertIs(interpolation(values, out=out), out)
+        self.assertTrue(np.allclose(out, values**2, rtol=1e-12))
+        self.assertTrue(np.isnan(interpolation(np.array([np.nan] * 300))).all())
+        with self.assertRaises(ValueError):
+            interpolation(np.array([0.5, 2.0]))
+
+
+class IntersectionTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.x = np.geomspace(1.0, 100.0, 20)
+        # Power laws are straight lines in log-log space, they intersect at x = 50**(1 / 1.2)
+        self.log_interpolations = (
+            logarithmic_interpolation(x=self.x, y=1e-3 * self.x**1.5),
+            logarithmic_interpolation(x=self.x, y=5e-2 * self.x**0.3),
+        )
+
+    def test_methods_agree(self):
+        expected = 50.0 ** (1.0 / 1.2)
+        scan = find_intersections_between_interpolations(self.x, self.log_interpolations, use_log=True)
+        brent = find_intersections_between_interpolations(self.x, self.log_interpolations, method="brent")
+        exact = find_intersections_between_interpolations(self.x, self.log_interpolations, method="exact")
+        self.assertEqual(len(scan), 1)
+        self.assertLess(abs(scan[0] - expected), 0.01)
+        self.assertAlmostEqual(brent[0], expected, places=9)
+        self.assertAlmostEqual(exact[0], expected, places=9)
+
+    def test_several_intersections_in_one_bracket(self):
+        x = np.array([0.0, 4.0, 8.0])
+        curve = interp1d([0.0, 1.0, 2.0, 3.0, 5.0, 6.0, 7.0, 8.0], [0.0, 2.0, 0.0, 2.0, 2.0, 0.0, 2.0, 2.0])
+        interpolations = (curve, interp1d(x, np.ones(3)))
+        expected = [0.5, 1.5, 2.5, 5.5, 6.5]
+        exact = find_intersections_between_interpolations(x, interpolations, method="exact")
+        self.assertTrue(np.allclose(exact, expected, atol=1e-10))
+        for method in ("scan", "brent"):
+            atol = 1e-2 if method == "scan" else 1e-10
+            intersections = find_intersections_between_interpolations(
+                x, interpolations, method=method, scan_all_brackets=True
+            )
+            self.assertTrue(np.allclose(intersections, expected, atol=atol))
+
+        # Without scanning all brackets, the pair of intersections in the second bracket is not found
+        scan = find_intersections_between_interpolations(x, interpolations, method="scan")
+        self.assertTrue(np.allclose(scan, expected[:3], atol=1e-2))
+        (brent,) = find_intersections_between_interpolations(x, interpolations, method="brent")
+        self.assertTrue(np.isclose(expected[:3], brent, atol=1e-10).any())
+
+    def test_intersections_at_points(self):
+        x = np.array([0.0, 1.0, 2.0, 3.0])
+        interpolations = (interp1d(x, [0.0, 1.0, 0.0, 1.0]), interp1d(x, [1.0, 1.0, 1.0, 1.0]))
+        for method in ("scan", "brent", "exact"):
+            for scan_all_brackets in (False, True):
+                intersections = find_intersections_between_interpolations(
+                    x, interpolations, method=method, scan_all_brackets=scan_all_brackets
+                )
+                self.assertEqual(intersections, [1.0, 3.0])
+
+    def test_exact_requires_linear_interpolations(self):
+        interpolations = (self.log_interpolations[0], interp1d(self.x, self.x))
+        with self.assertRaises(ValueError):
+            find_intersections_between_interpolations(self.x, interpolations, method="exact")
+        with self.assertRaises(ValueError):
+            find_intersections_between_interpolations(self.x, interpolations, method="newton")
+        for kind in ("nearest", "quadratic", "cubic"):
+            interpolations = (interp1d(self.x, np.sqrt(self.x), kind=kind), interp1d(self.x, np.full(20, 5.0)))
+            with self.assertRaises(ValueError):
+                find_intersections_between_interpolations(self.x, interpolations, method="exact")
+        interpolations = (interp1d(self.x, np.sqrt(self.x), kind="slinear"), interp1d(self.x, np.full(20, 5.0)))
+        exact = find_intersections_between_interpolations(self.x, interpolations, method="exact")
+        brent = find_intersections_between_interpolations(self.x, interpolations, method="brent")
+        self.assertTrue(np.allclose(exact, brent, rtol=1e-10))
+
+
+class CurveIntersectionTests(unittest.TestCase):
+    def test_matches_pairwise_intersections(self):
+        rng = np.random.default_rng(7)
+        x = np.geomspace(1.0, 1000.0, 40)
+        curves = np.exp(rng.normal(size=(5, len(x))).cumsum(axis=1) * 0.3)
+        reference_curves = np.exp(rng.normal(size=(3, len(x))).cumsum(axis=1) * 0.3)
+
+        for use_log in (False, True):
+            intersections = find_intersections_between_curves(
+                x=x, curves=curves, reference_curves=reference_curves, use_log=use_log
+            )
+            make_interpolation = logarithmic_interpolation if use_log else interp1d
+            for curve_id, curve in enumerate(curves):
+                for ref_id, reference_curve in enumerate(reference_curves):
+                    expected = find_intersections_between_interpolations(
+                        x, (make_interpolation(x, curve), make_interpolation(x, reference_curve)), method="exact"
+                    )
+                    found = intersections[(intersections["curve_id"] == curve_id) & (intersections["ref_id"] == ref_id)]
+                    self.assertTrue(np.allclose(found["x"], expected, rtol=1e-12))
+                    # Crossings alternate in direction, the first one depends on the start
+                    directions = found["direction"]
+                    self.assertTrue(np.all(directions[1:] == -directions[:-1]))
+                    if len(found) > 0:
+                        self.assertEqual(directions[0], 1 if curve[0] < reference_curve[0] else -1)
+
+    def test_direction(self):
+        x = np.arange(4.0)
+        intersections = find_intersections_between_curves(
+            x=x, curves=[[0.0, 2.0, 2.0, 0.0]], reference_curves=[[1.0, 1.0, 1.0, 1.0], [3.0, 3.0, 3.0, 3.0]]
+        )
+        self.assertEqual(intersections.tolist(), [(0, 0, 0.5, 1), (0, 0, 2.5, -1)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+import subprocess
+import sys
+import unittest
+
+from analysis_tools.statistics import bayes_divide
+from analysis_tools.utilities.lazy_import import LazyModule, is_module_available
+
+MODULES = [
+    "analysis_tools.statistics",
+    "analysis_tools.interpolations",
+    "analysis_tools.value_printer",
+    "analysis_tools.utilities.array_utils",
+    "analysis_tools.utilities.cache_utils",
+    "analysis_tools.utilities.lazy_import",
+    "analysis_tools.plotting.histogram",
+    "analysis_tools.plotting.histogram_plots",
+    "analysis_tools.plotting.histogram_cache",
+    "analysis_tools.plotting.binning",
+    "analysis_tools.plotting.comparison",
+    "analysis_tools.plotting.heatmap",
+    "analysis_tools.plotting.plot_functions",
+    "analysis_tools.plotting.plot_book",
+    "analysis_tools.plotting.batch_rendering",
+]
+
+HEAVY_MODULES = ["ROOT", "matplotlib", "scipy", "pandas"]
+
+
+class LazyImportTests(unittest.TestCase):
+    def test_heavy_backends_are_not_imported(self):
+        code = "\n".join(
+            [f"import {module}" for module in MODULES]
+            + ["import sys", f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"]
+        )
+        output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+        self.assertEqual(output.strip(), "")
+
+    def test_module_is_loaded_on_first_use(self):
+        json = LazyModule("json")
+        self.assertFalse(json.is_loaded)
+        self.assertEqual(json.dumps([1]), "[1]")
+        self.assertTrue(json.is_loaded)
+
+    def test_missing_module(self):
+        module = LazyModule("analysis_tools_missing_module", error_message="not installed")
+        self.assertFalse(is_module_available("analysis_tools_missing_module"))
+        with self.assertRaisesRegex(ImportError, "not installed"):
+            module.anything
+
+    @unittest.skipIf(is_module_available("ROOT"), "ROOT is installed")
+    def test_root_engine_without_root(self):
+        self.assertIsNotNone(bayes_divide(a=10, b=3)[1])
+        with self.assertRaises(ImportError):
+            bayes_divide(a=10, b=3, engine="root")
+
+
+if __name__ == "__main__":
+    unittest.main()
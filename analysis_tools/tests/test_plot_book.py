@@ -0,0 +1,96 @@
+import unittest
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+import matplotlib.pyplot as plt  # noqa: E402
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from analysis_tools.plotting.histogram_plots import HistogramPlot  # noqa: E402
+from analysis_tools.plotting.plot_book import PlotBook  # noqa: E402
+from analysis_tools.plotting.plot_variables import HistVariable  # noqa: E402
+
+
+class PlotBookTests(unittest.TestCase):
+    def setUp(self) -> None:
+        rng = np.random.default_rng(5)
+        n = 5000
+        self.df = pd.DataFrame(
+            {
+                "x": rng.normal(size=n),
+                "y": rng.exponential(size=n),
+                "w": rng.uniform(0.5, 1.5, size=n),
+                "process": rng.choice(["qq", "tau", "bb"], size=n),
+                "is_data": rng.uniform(size=n) > 0.5,
+            }
+        )
+        self.variables = [
+            HistVariable(df_label="x", label="x", bins=15, scope=(-2.0, 2.0)),
+            HistVariable(df_label="y", label="y", bins=10),
+        ]
+
+    def tearDown(self) -> None:
+        plt.close("all")
+
+    def _get_reference_plot(self, variable: HistVariable) -> HistogramPlot:
+        plot = HistogramPlot(hist_var=variable)
+        for process in pd.unique(self.df["process"]):
+            plot.add_component(data=self.df[self.df["process"] == process], label=process, weights="w")
+        plot.add_data(data=self.df[self.df["is_data"]], label="data")
+        return plot
+
+    def test_label_column_matches_individual_plots(self):
+        plot_book = PlotBook(
+            df=self.df,
+            variables=self.variables,
+            components="process",
+            weights="w",
+            data_components={"data": self.df["is_data"]},
+        )
+        for variable in self.variables:
+            histogram = plot_book.get_histogram(variable=variable)
+            reference = self._get_reference_plot(variable=variable).histogram
+            self.assertTrue(np.allclose(histogram.get_binning(), reference.get_binning()))
+            self.assertEqual(histogram.get_labels(), reference.get_labels())
+            for bin_count, expected in zip(histogram.get_bin_counts(), reference.get_bin_counts()):
+                self.assertTrue(np.allclose(bin_count, expected))
+            self.assertTrue(np.allclose(histogram.get_bin_errors(), reference.get_bin_errors()))
+            self.assertTrue(
+                np.array_equal(
+                    histogram.get_bin_count_for_component(histogram.data_components[0]),
+                    reference.get_bin_count_for_component(reference.data_components[0]),
+                )
+            )
+        plot_book.get_histogram_plot(variable="x").plot_on(add_pull=True)
+
+    def test_overlapping_masks(self):
+        plot_book = PlotBook(
+            df=self.df,
+            variables=self.variables[:1],
+            components={"all": np.ones(len(self.df), dtype=bool), "qq": self.df["process"] == "qq"},
+        )
+        all_counts, qq_counts = plot_book.get_histogram(variable="x").get_bin_counts()
+        expected, _ = np.histogram(self.df["x"], bins=np.linspace(-2.0, 2.0, 16))
+        self.assertTrue(np.array_equal(all_counts, expected))
+        self.assertTrue(np.all(qq_counts <= all_counts))
+
+    def test_several_binnings_of_one_column(self):
+        coarse = HistVariable(df_label="x", label="x", bins=10, scope=(-3.0, 3.0))
+        fine = HistVariable(df_label="x", label="x", bins=50, scope=(-1.0, 1.0))
+        plot_book = PlotBook(df=self.df, variables=[coarse, fine], components="process", weights="w", chunk_size=1000)
+        for variable in (coarse, fine):
+            histogram = plot_book.get_histogram(variable=variable)
+            self.assertIs(histogram.variable, variable)
+            reference = self._get_reference_plot(variable=variable).histogram
+            self.assertTrue(np.allclose(histogram.get_total_bin_count(), reference.get_total_bin_count()))
+            self.assertIs(plot_book.get_histogram_plot(variable=variable).hist_var, variable)
+        with self.assertRaises(ValueError):
+            plot_book.get_histogram(variable="x")
+        with self.assertRaises(ValueError):
+            plot_book.get_histogram(variable=HistVariable(df_label="x", label="x", bins=10, scope=(-3.0, 3.0)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,154 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import scipy.stats
+
+import analysis_tools.statistics
+from analysis_tools.statistics import (
+    bayes_divide,
+    bayes_efficiency,
+    construct_fc_belt,
+    get_fc_upper_limit,
+    get_fc_upper_limits,
+    get_mu_grid,
+    poisson_errors,
+)
+
+try:
+    import ROOT as root
+except ImportError:
+    root = None
+
+
+class BayesEfficiencyTests(unittest.TestCase):
+    def setUp(self) -> None:
+        rng = np.random.default_rng(2)
+        self.total = np.concatenate([rng.integers(1, 5000, size=200), [1, 10, 10, 7.5]]).astype(float)
+        self.selected = np.concatenate([rng.integers(0, self.total[:200] + 1), [0, 0, 10, 2.5]]).astype(float)
+
+    def test_shortest_interval_properties(self):
+        cl = 0.9
+        efficiency, error_low, error_high = bayes_efficiency(total=self.total, selected=self.selected, cl=cl)
+        lower, upper = efficiency - error_low, efficiency + error_high
+        a, b = self.selected + 1, self.total - self.selected + 1
+
+        self.assertTrue(np.allclose(efficiency, self.selected / self.total))
+        self.assertTrue(np.allclose(scipy.stats.beta.cdf(upper, a, b) - scipy.stats.beta.cdf(lower, a, b), cl))
+        two_sided = (self.selected > 0) & (self.selected < self.total)
+        self.assertTrue(
+            np.allclose(
+                scipy.stats.beta.logpdf(lower[two_sided], a[two_sided], b[two_sided]),
+                scipy.stats.beta.logpdf(upper[two_sided], a[two_sided], b[two_sided]),
+                atol=1e-6,
+            )
+        )
+        self.assertTrue(np.all(lower[self.selected == 0] == 0))
+        self.assertTrue(np.all(upper[self.selected == self.total] == 1))
+
+    def test_invalid_inputs(self):
+        efficiency, error_low, error_high = bayes_efficiency(total=np.array([0.0, 5.0]), selected=np.array([0.0, 6.0]))
+        self.assertEqual(efficiency[0], 0.0)
+        self.assertTrue(np.isnan(error_low[0]) and np.isnan(error_high[0]))
+        self.assertTrue(np.all(np.isnan([efficiency[1], error_low[1], error_high[1]])))
+
+    def test_bayes_divide(self):
+        self.assertEqual(bayes_divide(a=5, b=6), (None, None, None))
+        self.assertEqual(bayes_divide(a=0, b=0), (0, None, None))
+        efficiency, error_low, error_high = bayes_efficiency(total=10, selected=3)
+        self.assertEqual(bayes_divide(a=10, b=3), (0.3, float(error_low), float(error_high)))
+
+    @unittest.skipIf(root is None, "ROOT is not installed")
+    def test_matches_root(self):
+        for cl in (0.683, 0.9):
+            efficiency, error_low, error_high = bayes_efficiency(total=self.total, selected=self.selected, cl=cl)
+            for i, (total, selected) in enumerate(zip(self.total, self.selected)):
+                root_efficiency, root_error_low, root_error_high = bayes_divide(a=total, b=selected, cl=cl, engine="root")
+                self.assertAlmostEqual(efficiency[i], root_efficiency, places=6)
+                self.assertAlmostEqual(error_low[i], root_error_low, places=6)
+                self.assertAlmostEqual(error_high[i], root_error_high, places=6)
+
+
+class PoissonErrorTests(unittest.TestCase):
+    def test_garwood_interval(self):
+        n = np.array([0.0, 1.0, 4.0, 37.0, 1e4])
+        for cl in (0.683, 0.95):
+            error_low, error_high = poisson_errors(n=n, cl=cl)
+            alpha = 1.0 - cl
+            self.assertTrue(np.allclose(n[1:] - error_low[1:], scipy.stats.chi2.ppf(alpha / 2, 2 * n[1:]) / 2))
+            self.assertTrue(np.allclose(n + error_high, scipy.stats.chi2.ppf(1 - alpha / 2, 2 * n + 2) / 2))
+            self.assertEqual(error_low[0], 0.0)
+        # Large numbers of events approach the symmetric sqrt(n) errors
+        self.assertTrue(np.allclose(poisson_errors(n=1e4)[0], 100.0, rtol=0.01))
+        self.assertTrue(np.all(np.isnan(poisson_errors(n=-1.0))))
+
+
+class FeldmanCousinsTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        analysis_tools.statistics._fc_belt_cache.clear()
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def test_upper_limits_from_paper(self):
+        # Table IV of Feldman and Cousins, Phys. Rev. D 57 (1998) 3873, 90% CL
+        for n_background, n_observed, expected in [
+            (0.0, 0, 2.44),
+            (0.0, 1, 4.36),
+            (0.0, 2, 5.91),
+            (0.0, 3, 7.42),
+            (0.5, 0, 1.94),
+            (1.0, 0, 1.61),
+        ]:
+            upper_limit = get_fc_upper_limit(
+                n_background=n_background, n_observed=n_observed, cache_dir=self.tmp_dir.name
+            )
+            self.assertAlmostEqual(upper_limit, expected, delta=0.006)
+
+    def test_batch_and_disk_cache(self):
+        n_background = np.array([0.0, 1.0, 0.0, 2.5, 1.0])
+        n_observed = np.array([0, 3, 4, 2, 1])
+        upper_limits = get_fc_upper_limits(n_background=n_background, n_observed=n_observed, cache_dir=self.tmp_dir.name)
+        self.assertEqual(len(os.listdir(self.tmp_dir.name)), 3)
+
+        analysis_tools.statistics._fc_belt_cache.clear()
+        for i in range(len(n_background)):
+            self.assertEqual(
+                get_fc_upper_limit(n_background=n_background[i], n_observed=n_observed[i], cache_dir=self.tmp_dir.name),
+                upper_limits[i],
+            )
+
+        belt = construct_fc_belt(n_background=2.5)
+        self.assertTrue(np.all(belt.n_low <= belt.n_high))
+        self.assertTrue(np.array_equal(belt.get_upper_limits(n_observed=n_observed[3:4]), upper_limits[3:4]))
+
+    def test_corrupt_belt_file_is_rebuilt(self):
+        upper_limit = get_fc_upper_limit(n_background=1.0, n_observed=2, cache_dir=self.tmp_dir.name)
+        (belt_file,) = os.listdir(self.tmp_dir.name)
+        belt_path = os.path.join(self.tmp_dir.name, belt_file)
+        with open(belt_path, "rb") as f:
+            content = f.read()
+
+        for corrupt_content in (content[:100], b""):
+            with open(belt_path, "wb") as f:
+                f.write(corrupt_content)
+            analysis_tools.statistics._fc_belt_cache.clear()
+            self.assertEqual(get_fc_upper_limit(n_background=1.0, n_observed=2, cache_dir=self.tmp_dir.name), upper_limit)
+            self.assertEqual(os.listdir(self.tmp_dir.name), [belt_file])
+            with open(belt_path, "rb") as f:
+                self.assertEqual(len(f.read()), len(content))
+
+    def test_limit_outside_of_mu_grid(self):
+        upper_limits = get_fc_upper_limits(
+            n_background=0.0, n_observed=[1, 10], mu_grid=get_mu_grid(mu_max=5.0), use_disk_cache=False
+        )
+        self.assertAlmostEqual(upper_limits[0], 4.36, delta=0.006)
+        self.assertTrue(np.isnan(upper_limits[1]))
+        with self.assertRaises(ValueError):
+            get_fc_upper_limits(n_background=0.0, n_observed=1.5, use_disk_cache=False)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,7 +1,13 @@
 import unittest
 
-from analysis_tools.value_printer import significant_digit_index, get_rounded_to_significant_digit, \
-    get_rounded_to_significant_digit_ufloat
+import numpy as np
+from analysis_tools.value_printer import (
+    significant_digit_index,
+    get_rounded_to_significant_digit,
+    get_rounded_to_significant_digit_ufloat,
+    significant_digit_indices,
+    get_rounded_to_significant_digits,
+)
 from uncertainties import ufloat
 
 
@@ -173,5 +179,54 @@ class ValuePrinterTests(unittest.TestCase):
         )
 
 
+class VectorizedValuePrinterTests(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(1234)
+        n = 20000
+        self.values = rng.uniform(-10, 10, size=n) * 10.0 ** rng.integers(-12, 12, size=n)
+        self.values[::11] = 0
+        self.values[::13] = np.round(self.values[::13], 2)
+        self.errors = rng.uniform(0, 10, size=n) * 10.0 ** rng.integers(-12, 12, size=n)
+        self.errors[::7] = 0
+        self.sig_digit_indices = rng.integers(-5, 8, size=n)
+
+    def test_significant_digit_indices_match_scalar_function(self):
+        special_values = [0.0, 0.01, 0.03, 0.3, 0.1, 0.2999999999999999, 1e-300, 1.0, 3.0, 10.0, 1e4, 1e22, 3e22]
+        values = np.concatenate([np.abs(self.values), self.errors, special_values])
+        self.assertEqual(significant_digit_indices(values).tolist(), [significant_digit_index(x=x) for x in values])
+
+    def test_significant_digit_indices_reject_negative_values(self):
+        with self.assertRaises(ValueError):
+            significant_digit_indices(np.array([-1.0]))
+
+    def test_vectorized_printer_matches_scalar_function(self):
+        self.assertEqual(
+            get_rounded_to_significant_digits(x=self.values),
+            [get_rounded_to_significant_digit(x=x) for x in self.values.tolist()],
+        )
+        self.assertEqual(
+            get_rounded_to_significant_digits(x=self.values, errors=self.errors),
+            [get_rounded_to_significant_digit(x=x, error=e) for x, e in zip(self.values.tolist(), self.errors.tolist())],
+        )
+        self.assertEqual(
+            get_rounded_to_significant_digits(
+                x=self.values, errors=self.errors, sig_digit_indices=self.sig_digit_indices
+            ),
+            [
+                get_rounded_to_significant_digit(x=x, error=e, sig_digit_index=s)
+                for x, e, s in zip(self.values.tolist(), self.errors.tolist(), self.sig_digit_indices.tolist())
+            ],
+        )
+
+    def test_vectorized_printer_examples(self):
+        self.assertEqual(
+            get_rounded_to_significant_digits(
+                x=np.array([1.23456789e1, 5.6789e1, -0.001]), errors=np.array([1.23456789, 5.6789, 13])
+            ),
+            [r"$(123 \pm 13) \times 10^{-1}$", r"$57 \pm 6$", r"$-0 \pm 14$"],
+        )
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,89 @@
+import os
+import sys
+from pathlib import Path
+from typing import Any, Optional
+
+import numpy as np
+
+__all__ = [
+    "has_columns",
+    "as_read_only_array",
+]
+
+
+def _is_pyarrow_object(values: Any) -> bool:
+    return type(values).__module__.split(".")[0] == "pyarrow"
+
+
+def _is_pandas_object(values: Any, class_name: str) -> bool:
+    # A pandas object can only exist if pandas has already been imported, so there is no need to import it here.
+    pd = sys.modules.get("pandas")
+    return pd is not None and isinstance(values, getattr(pd, class_name))
+
+
+def has_columns(values: Any) -> bool:
+    return _is_pandas_object(values, "DataFrame") or (_is_pyarrow_object(values) and hasattr(values, "column"))
+
+
+def _pyarrow_to_numpy(values: Any, strict: bool) -> np.ndarray:
+    if hasattr(values, "num_chunks"):
+        if values.num_chunks == 1:
+            values = values.chunk(0)
+        elif strict:
+            raise ValueError(f"A pyarrow ChunkedArray with {values.num_chunks} chunks cannot be converted without copy!")
+        else:
+            return values.to_numpy()
+    try:
+        return values.to_numpy(zero_copy_only=True)
+    except Exception as e:
+        if strict:
+            raise ValueError(f"The pyarrow array of type {values.type} cannot be converted without copy!") from e
+        return values.to_numpy(zero_copy_only=False)
+
+
+def as_read_only_array(
+    values: Any,
+    column: Optional[str] = None,
+    strict: bool = False,
+) -> np.ndarray:
+    """
+    Converts the input into a read-only NumPy array while avoiding copies wherever possible.
+
+    Supported inputs are NumPy arrays (including np.memmap), pandas Series, DataFrames,
+    pyarrow Arrays, ChunkedArrays and Tables, paths to .npy files, which are memory-mapped,
+    and any object exposing the buffer protocol.
+
+    :param values: Input data.
+    :param column: Column to be selected if the input is a DataFrame or a pyarrow Table.
+    :param strict: If True, a ValueError is raised if the conversion requires a copy.
+    :return: Read-only view of the input data.
+    """
+    if isinstance(values, (str, Path, os.PathLike)):
+        if not str(values).endswith(".npy"):
+            raise ValueError(f"Only .npy files can be memory-mapped, got {values}!")
+        array = np.load(values, mmap_mode="r")
+    else:
+        if column is not None:
+            if has_columns(values):
+                values = values[column] if _is_pandas_object(values, "DataFrame") else values.column(column)
+            else:
+                raise ValueError(
+                    f"A column can only be selected from a DataFrame or a pyarrow Table, got {type(values)}!"
+                )
+
+        if isinstance(values, np.ndarray):
+            array = values
+        elif _is_pandas_object(values, "Series"):
+            if not isinstance(values.dtype, np.dtype) and strict:
+                raise ValueError(f"The Series {values.name} of type {values.dtype} cannot be converted without copy!")
+            array = values.to_numpy(copy=False)
+        elif _is_pyarrow_object(values):
+            array = _pyarrow_to_numpy(values=values, strict=strict)
+        else:
+            array = np.asarray(values)
+            if strict and array.flags.owndata:
+                raise ValueError(f"The input of type {type(values)} cannot be converted without copy!")
+
+    read_only_array = array.view()
+    read_only_array.flags.writeable = False
+    return read_only_array
@@ -0,0 +1,54 @@
+import os
+import tempfile
+from pathlib import Path
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+
+from analysis_tools.utilities.base_utils import PathType
+
+__all__ = [
+    "get_default_cache_dir",
+    "save_npz_atomically",
+    "load_npz",
+]
+
+
+def get_default_cache_dir(name: str) -> Path:
+    """
+    :param name: Name of the cache, used as sub-directory.
+    :return: $XDG_CACHE_HOME/analysis_tools/<name>, with ~/.cache as fallback for $XDG_CACHE_HOME.
+    """
+    return Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")) / "analysis_tools" / name
+
+
+def save_npz_atomically(path: PathType, **arrays: np.ndarray) -> None:
+    """
+    Saves the arrays to an .npz file, creating its directory if needed. The file is written to a temporary file
+    next to it first and moved into place afterwards, such that parallel jobs never read a partially written file.
+    """
+    path = Path(path)
+    os.makedirs(path.parent, exist_ok=True)
+    with tempfile.NamedTemporaryFile(dir=path.parent, suffix=".npz.tmp", delete=False) as tmp_file:
+        np.savez(tmp_file, **arrays)
+    os.replace(tmp_file.name, path)
+
+
+def load_npz(path: PathType, keys: Sequence[str]) -> Optional[Dict[str, np.ndarray]]:
+    """
+    Loads the arrays with the given names from an .npz file, e.g. written by save_npz_atomically.
+
+    :return: Arrays by name, None if the file does not exist or cannot be read. Unreadable files, e.g. truncated
+             by a crashed job, are removed, such that they are written again.
+    """
+    try:
+        with np.load(path) as npz_file:
+            return {key: npz_file[key] for key in keys}
+    except FileNotFoundError:
+        return None
+    except Exception:  # Corrupt or truncated files
+        try:
+            os.remove(path)
+        except OSError:  # Already removed by a parallel job or a read-only cache directory
+            pass
+        return None
@@ -0,0 +1,60 @@
+import importlib
+import importlib.util
+import types
+from typing import Any, List, Optional
+
+__all__ = [
+    "LazyModule",
+    "is_module_available",
+]
+
+
+class LazyModule(types.ModuleType):
+    """
+    Placeholder for a module which is only imported when one of its attributes is accessed for the first time.
+
+    Heavy backends like ROOT, matplotlib, scipy or pandas are wrapped with this class, such that importing
+    analysis_tools stays cheap for scripts which never use them.
+    """
+
+    def __init__(self, name: str, error_message: Optional[str] = None) -> None:
+        """
+        :param name: Fully qualified name of the module, e.g. "matplotlib.pyplot".
+        :param error_message: Message of the ImportError raised if the module is not installed.
+        """
+        super().__init__(name)
+        self._error_message = error_message  # type: Optional[str]
+        self._module = None  # type: Optional[types.ModuleType]
+
+    def _load(self) -> types.ModuleType:
+        if self._module is None:
+            try:
+                self._module = importlib.import_module(self.__name__)
+            except ImportError as e:
+                if self._error_message is None:
+                    raise
+                raise ImportError(self._error_message) from e
+        return self._module
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._module is not None
+
+    def __getattr__(self, attribute: str) -> Any:
+        return getattr(self._load(), attribute)
+
+    def __dir__(self) -> List[str]:
+        return dir(self._load())
+
+    def __repr__(self) -> str:
+        return f"<lazy module '{self.__name__}' ({'loaded' if self.is_loaded else 'not loaded'})>"
+
+
+def is_module_available(name: str) -> bool:
+    """
+    Checks whether a module can be imported without actually importing it.
+    """
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
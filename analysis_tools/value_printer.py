@@ -1,14 +1,30 @@
-from typing import Optional
+from typing import List, Optional
 import numpy as np
 import uncertainties
 
-
 __all__ = [
     "significant_digit_index",
+    "significant_digit_indices",
     "get_rounded_to_significant_digit",
-    "get_rounded_to_significant_digit_ufloat"
+    "get_rounded_to_significant_digits",
+    "get_rounded_to_significant_digit_ufloat",
 ]
 
+# Floats closest to 1e-k and 3e-k for k = 0, ..., 330. They are the thresholds at which the shortest
+# decimal representation of a float, which is used by significant_digit_index for values < 1, gains a
+# leading zero or its first digit reaches 3.
+_ONE_TIMES_TEN_TO_MINUS = np.array([float(f"1e-{k}") for k in range(331)])
+_THREE_TIMES_TEN_TO_MINUS = np.array([float(f"3e-{k}") for k in range(331)])
+# Powers of ten exactly as evaluated by the scalar functions, i.e. float(10**k) and 10.0**k, because
+# np.power does not necessarily give the same last bit as the C library pow used by Python.
+_INTEGER_POWERS_OF_TEN = np.array([float(10**k) for k in range(309)])
+_MIN_FLOAT_POWER_OF_TEN = -323
+_FLOAT_POWERS_OF_TEN = np.array([10.0**k for k in range(_MIN_FLOAT_POWER_OF_TEN, 309)])
+
+
+def _float_power_of_ten(exponents: np.ndarray) -> np.ndarray:
+    return _FLOAT_POWERS_OF_TEN[exponents - _MIN_FLOAT_POWER_OF_TEN]
+
 
 def significant_digit_index(x: float) -> int:
     if x >= 1:
@@ -25,6 +41,61 @@ def significant_digit_index(x: float) -> int:
         return index
 
 
+def significant_digit_indices(x: np.ndarray) -> np.ndarray:
+    """
+    Vectorized version of significant_digit_index, which gives identical results for every element.
+    """
+    x = np.asarray(x, dtype=float)
+    if not np.all(np.isfinite(x)) or np.any(x < 0):
+        raise ValueError("Significant digit indices can only be determined for finite, non-negative values!")
+    indices = np.ones(x.shape, dtype=int)
+
+    large = x >= 1
+    large_values = x[large]
+    exponents = np.log10(large_values).astype(int)
+    digits = (large_values / _INTEGER_POWERS_OF_TEN[exponents]).astype(int)
+    indices[large] = np.where(digits < 3, -exponents + 1, -exponents)
+
+    small = (x < 1) & (x > 0)
+    small_values = x[small]
+    leading_zeros = np.clip(-np.floor(np.log10(small_values)).astype(int), 1, 330)
+    # Correct the floating point estimate of the logarithm by comparing with the exact thresholds
+    leading_zeros += small_values < _ONE_TIMES_TEN_TO_MINUS[leading_zeros]
+    leading_zeros -= (leading_zeros > 1) & (small_values >= _ONE_TIMES_TEN_TO_MINUS[leading_zeros - 1])
+    first_digit_below_three = small_values < _THREE_TIMES_TEN_TO_MINUS[leading_zeros]
+    indices[small] = np.where(first_digit_below_three, leading_zeros + 1, leading_zeros)
+
+    return indices
+
+
+def _round_to_decimals(x: np.ndarray, decimals: np.ndarray) -> np.ndarray:
+    # Python's round is correctly rounded while np.round first scales by a power of ten, which can create
+    # or destroy exact ties. The few values whose scaled value is that close to a tie are rounded with round.
+    scale = _INTEGER_POWERS_OF_TEN[np.minimum(np.abs(decimals), 308)]
+    scaled = np.where(decimals >= 0, x * scale, x / scale)
+    rounded_scaled = np.rint(scaled)
+    rounded = np.where(decimals >= 0, rounded_scaled / scale, rounded_scaled * scale)
+    ambiguous = (np.abs(np.abs(scaled - np.trunc(scaled)) - 0.5) <= 4 * np.spacing(np.abs(scaled))) | (
+        (np.abs(decimals) > 22) | (np.abs(scaled) >= 2**52)
+    )
+    for i in np.flatnonzero(ambiguous):
+        rounded[i] = round(float(x[i]), int(decimals[i]))
+    return rounded
+
+
+def _format_integral_values(x: np.ndarray) -> List[str]:
+    integral = np.rint(x)
+    exact = np.abs(integral) < 2**53
+    return [
+        (
+            ("-0" if np.signbit(v) else "0")
+            if v == 0
+            else (str(int(v)) if is_exact else np.format_float_positional(v, unique=False, precision=0, trim="-"))
+        )
+        for v, is_exact in zip(integral.tolist(), exact.tolist())
+    ]
+
+
 def get_rounded_to_significant_digit(
     x: float,
     error: Optional[float] = None,
@@ -84,9 +155,62 @@ def get_rounded_to_significant_digit(
     return final_str
 
 
+def get_rounded_to_significant_digits(
+    x: np.ndarray,
+    errors: Optional[np.ndarray] = None,
+    sig_digit_indices: Optional[np.ndarray] = None,
+) -> List[str]:
+    """
+    Vectorized version of get_rounded_to_significant_digit for tables with many values.
+    Returns the same LaTeX string as the scalar function for every (value, error) pair.
+
+    :param x: Array of values.
+    :param errors: Optional array of errors, elements equal to 0 are treated like a missing error.
+    :param sig_digit_indices: Optional array of significant digit indices, elements equal to 0 are
+                              determined from the error or the value, like in the scalar function.
+    :return: List of LaTeX strings.
+    """
+    x = np.asarray(x, dtype=float).ravel()
+    has_error = np.zeros(x.shape, dtype=bool)
+    if errors is not None:
+        errors = np.asarray(errors, dtype=float).ravel()
+        assert errors.shape == x.shape, (errors.shape, x.shape)
+        if np.any(errors < 0):
+            print("Warning: Setting error to abs(error) because you gave a negative error!")
+            errors = np.abs(errors)
+        has_error = errors != 0
+    else:
+        errors = np.zeros(x.shape)
+
+    if sig_digit_indices is None:
+        sig_digit_indices = np.zeros(x.shape, dtype=int)
+    sig_digit_indices = np.asarray(sig_digit_indices, dtype=int).ravel()
+    assert sig_digit_indices.shape == x.shape, (sig_digit_indices.shape, x.shape)
+    missing = sig_digit_indices == 0
+    sig_digit_indices = np.where(missing, 0, sig_digit_indices)
+    sig_digit_indices[missing] = significant_digit_indices(np.where(has_error, errors, np.abs(x))[missing])
+
+    exponents = -sig_digit_indices
+    power = _float_power_of_ten(exponents)
+    x_strs = _format_integral_values(_round_to_decimals(x, sig_digit_indices) / power)
+
+    errors = errors + 5 * _float_power_of_ten(-sig_digit_indices - 1)
+    error_strs = _format_integral_values(_round_to_decimals(errors, sig_digit_indices) / power)
+
+    final_strs = []  # type: List[str]
+    for x_str, error_str, exponent, with_error in zip(x_strs, error_strs, exponents.tolist(), has_error.tolist()):
+        if not with_error:
+            final_strs.append(rf"${x_str} \times 10^{{{exponent}}}$" if exponent != 0 else x_str)
+        elif exponent != 0:
+            final_strs.append(rf"$({x_str} \pm {error_str}) \times 10^{{{exponent}}}$")
+        else:
+            final_strs.append(rf"${x_str} \pm {error_str}$")
+    return final_strs
+
+
 def get_rounded_to_significant_digit_ufloat(
     x: uncertainties.core.Variable,
     sig_digit_index: Optional[int] = None,
 ) -> str:
-    assert(isinstance(x, uncertainties.core.Variable))
+    assert isinstance(x, uncertainties.core.Variable)
     return get_rounded_to_significant_digit(x=x.nominal_value, error=x.std_dev, sig_digit_index=sig_digit_index)
@@ -0,0 +1,66 @@
+"""
+Compares the number of artists, the savefig time and the file size of a stacked histogram plot
+drawn with the hist renderer, i.e. Axes.hist and one uncertainty bar per bin, and with the stairs renderer,
+which draws every stack layer and uncertainty band as a single StepPatch.
+
+    python benchmarks/histogram_export.py [--bins 200] [--components 12] [--repeat 3]
+"""
+
+import argparse
+import io
+import time
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+import matplotlib.pyplot as plt  # noqa: E402
+import numpy as np  # noqa: E402
+
+from analysis_tools.plotting.histogram_plots import HistogramPlot  # noqa: E402
+from analysis_tools.plotting.plot_variables import HistVariable  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bins", type=int, default=200)
+    parser.add_argument("--components", type=int, default=12)
+    parser.add_argument("--entries", type=int, default=20_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(9)
+    hist_var = HistVariable(df_label="x", label="x", bins=args.bins, scope=(-4.0, 4.0))
+    components = [rng.normal(loc=0.1 * i, size=args.entries) for i in range(args.components)]
+
+    print(f"{args.bins} bins, {args.components} components, one signal component, data and pull")
+    print(f"{'renderer':<10} {'patches':>8} {'artists':>8} {'pdf [ms]':>9} {'pdf [kB]':>9} {'png [ms]':>9}")
+    for renderer in ("hist", "stairs"):
+        plot = HistogramPlot(hist_var=hist_var, renderer=renderer)
+        for i, data in enumerate(components):
+            plot.add_component(data=data, label=f"bkg {i}", weights=rng.uniform(0.5, 1.5, size=args.entries))
+        plot.add_signal_component(data=components[0], label="signal")
+        plot.add_data(data=np.concatenate(components), label="data")
+        fig, _ = plot.plot_on(add_pull=True, show_legend=False)
+
+        n_patches = sum(len(ax.patches) for ax in fig.axes)
+        n_artists = len(fig.findobj())
+        timings = {}
+        for file_format in ("pdf", "png"):
+            durations = []
+            for _ in range(args.repeat):
+                buffer = io.BytesIO()
+                start = time.perf_counter()
+                fig.savefig(buffer, format=file_format)
+                durations.append(time.perf_counter() - start)
+            timings[file_format] = (min(durations), buffer.getbuffer().nbytes)
+        plt.close(fig)
+
+        print(
+            f"{renderer:<10} {n_patches:>8} {n_artists:>8} {timings['pdf'][0] * 1e3:>9.1f} "
+            f"{timings['pdf'][1] / 1e3:>9.1f} {timings['png'][0] * 1e3:>9.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Compares the filling of a 10M entry histogram component with uniform bins via the arithmetic bin index,
+via a binary search over the bin edges and via np.histogram.
+
+    python benchmarks/histogram_filling.py [--entries 10000000] [--bins 100] [--repeat 3]
+"""
+
+import argparse
+import time
+from typing import Callable
+
+import numpy as np
+
+from analysis_tools.plotting.binning import fill_1d
+from analysis_tools.plotting.histogram import Histogram
+from analysis_tools.plotting.histogram_component import HistogramComponent
+from analysis_tools.plotting.plot_variables import HistVariable
+
+
+def best_time(function: Callable[[], object], repeat: int) -> float:
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        durations.append(time.perf_counter() - start)
+    return min(durations)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, default=10_000_000)
+    parser.add_argument("--bins", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(1)
+    data = rng.normal(size=args.entries)
+    weights = rng.uniform(0.5, 1.5, size=args.entries)
+    edges = np.linspace(-3.0, 3.0, args.bins + 1)
+
+    def fill_histogram() -> None:
+        histogram = Histogram(variable=HistVariable(df_label="x", label="x", bins=args.bins, scope=(-3.0, 3.0)))
+        histogram.add_component(hist_component=HistogramComponent(label="x", data=data, weights=weights))
+        histogram.get_bin_counts()
+
+    candidates = {
+        "Histogram (uniform fast path)": fill_histogram,
+        "fill_1d, uniform=True": lambda: fill_1d(data=data, edges=edges, weights=weights, uniform=True),
+        "fill_1d, uniform=False": lambda: fill_1d(data=data, edges=edges, weights=weights, uniform=False),
+        "np.histogram, edge array (x3)": lambda: [
+            np.histogram(data, bins=edges, weights=w) for w in (None, weights, weights**2)
+        ],
+        "np.histogram, bins and range (x3)": lambda: [
+            np.histogram(data, bins=args.bins, range=(-3.0, 3.0), weights=w) for w in (None, weights, weights**2)
+        ],
+    }
+
+    print(f"{args.entries} entries, {args.bins} bins, counts, sum of weights and sum of squared weights")
+    for name, function in candidates.items():
+        print(f"{name:<40} {best_time(function=function, repeat=args.repeat) * 1e3:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Compares rendering a series of systematic variations of a histogram plot by rebuilding the figure for every variation
+with updating the artists of an existing figure via plot_on(reuse_artists=True).
+
+    python benchmarks/histogram_rendering.py [--variations 20] [--bins 50] [--entries 100000]
+"""
+
+import argparse
+import io
+import time
+from typing import Callable, List
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+import matplotlib.pyplot as plt  # noqa: E402
+import numpy as np  # noqa: E402
+
+from analysis_tools.plotting.histogram import Histogram  # noqa: E402
+from analysis_tools.plotting.histogram_component import HistogramComponent  # noqa: E402
+from analysis_tools.plotting.histogram_plots import HistogramPlot  # noqa: E402
+from analysis_tools.plotting.plot_variables import HistVariable  # noqa: E402
+
+
+def create_variations(hist_var: HistVariable, n_variations: int, n_entries: int) -> List[Histogram]:
+    rng = np.random.default_rng(5)
+    data = np.concatenate([rng.normal(loc=0.3 * i, size=n_entries) for i in range(3)])
+    variations = []
+    for _ in range(n_variations):
+        histogram = Histogram(variable=hist_var)
+        for i, label in enumerate(("bkg 1", "bkg 2", "bkg 3")):
+            histogram.add_component(
+                hist_component=HistogramComponent(
+                    data=rng.normal(loc=0.3 * i, size=n_entries), label=label, weights=rng.normal(1.0, 0.01, n_entries)
+                )
+            )
+        histogram.add_data(hist_component=HistogramComponent(data=data, label="data"))
+        histogram.compact()
+        variations.append(histogram)
+    return variations
+
+
+def total_time(function: Callable[[], object]) -> float:
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--variations", type=int, default=20)
+    parser.add_argument("--bins", type=int, default=50)
+    parser.add_argument("--entries", type=int, default=100_000)
+    args = parser.parse_args()
+
+    hist_var = HistVariable(df_label="x", label="x", bins=args.bins, scope=(-3.0, 3.0))
+    variations = create_variations(hist_var=hist_var, n_variations=args.variations, n_entries=args.entries)
+
+    def render(reuse_artists: bool, save: bool) -> None:
+        plot = HistogramPlot(hist_var=hist_var, histogram=variations[0])
+        for histogram in variations:
+            plot.set_histogram(histogram=histogram)
+            fig, _ = plot.plot_on(add_pull=True, reuse_artists=reuse_artists)
+            if save:
+                fig.savefig(io.BytesIO(), format="png")
+            if not reuse_artists:
+                plt.close(fig)
+        plt.close("all")
+
+    render(reuse_artists=True, save=False)  # warm up the imports and font caches
+    print(f"{args.variations} variations, {args.bins} bins, 3 components, data and pull")
+    for save in (False, True):
+        for reuse_artists in (False, True):
+            duration = total_time(lambda: render(reuse_artists=reuse_artists, save=save))
+            name = f"{'reuse artists' if reuse_artists else 'rebuild figure'}{', savefig png' if save else ''}"
+            print(f"{name:<40} {duration / args.variations * 1e3:8.1f} ms / variation")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Measures the cold-start import time of the analysis_tools modules, each in a fresh interpreter.
+
+    python benchmarks/import_time.py [--repeat 5] [--max-seconds 0.5]
+
+The script exits with a non-zero status if the median import time of any module exceeds --max-seconds
+or if a heavy backend (ROOT, matplotlib, scipy, pandas) is imported as a side effect.
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+from typing import List, Tuple
+
+MODULES = [
+    "numpy",
+    "analysis_tools.statistics",
+    "analysis_tools.interpolations",
+    "analysis_tools.value_printer",
+    "analysis_tools.utilities.array_utils",
+    "analysis_tools.utilities.cache_utils",
+    "analysis_tools.utilities.lazy_import",
+    "analysis_tools.plotting.histogram",
+    "analysis_tools.plotting.histogram_plots",
+    "analysis_tools.plotting.histogram_cache",
+    "analysis_tools.plotting.binning",
+    "analysis_tools.plotting.comparison",
+    "analysis_tools.plotting.heatmap",
+    "analysis_tools.plotting.plot_functions",
+    "analysis_tools.plotting.plot_book",
+    "analysis_tools.plotting.batch_rendering",
+]
+
+HEAVY_MODULES = ["ROOT", "matplotlib", "scipy", "pandas"]
+
+_CODE = """
+import sys, time
+start = time.perf_counter()
+import {module}
+duration = time.perf_counter() - start
+print(duration, ",".join(m for m in {heavy!r} if m in sys.modules))
+"""
+
+
+def measure(module: str) -> Tuple[float, List[str]]:
+    output = subprocess.run(
+        [sys.executable, "-c", _CODE.format(module=module, heavy=HEAVY_MODULES)],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout.split()
+    return float(output[0]), output[1].split(",") if len(output) > 1 else []
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--max-seconds", type=float, default=None)
+    args = parser.parse_args()
+
+    failed = False
+    for module in MODULES:
+        durations, loaded = [], []
+        for _ in range(args.repeat):
+            duration, loaded = measure(module)
+            durations.append(duration)
+        median = statistics.median(durations)
+        too_slow = args.max_seconds is not None and median > args.max_seconds
+        failed |= too_slow or (module != "numpy" and bool(loaded))
+        print(f"{module:<45} {median * 1e3:8.1f} ms  {' '.join(loaded)}{'  TOO SLOW' if too_slow else ''}")
+    return int(failed)
+
+
+if __name__ == "__main__":
+    sys.exit(main())